@@ -0,0 +1,7 @@
+# SPDX-License-Identifier: MIT
+
+import sys
+from pathlib import Path
+
+# Benchmarks are built on the mock providers of the test suite
+sys.path.insert(0, str(Path(__file__).resolve().parents[1] / "tests"))
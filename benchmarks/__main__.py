@@ -0,0 +1,76 @@
+# SPDX-License-Identifier: MIT
+
+import argparse
+import sys
+from pathlib import Path
+
+from benchmarks import (
+    formatters,
+    listing_details,
+    listings_file,
+    seen_listings,
+    session_headers,
+)
+from benchmarks.common import compare, load_results, report, save_results
+
+SUITES = {
+    "formatters": formatters.run,
+    "listing_details": listing_details.run,
+    "listings_file": listings_file.run,
+    "seen_listings": seen_listings.run,
+    "session_headers": session_headers.run,
+}
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(
+        prog="python -m benchmarks", description="Run the Oikotool benchmarks."
+    )
+    parser.add_argument(
+        "suites",
+        nargs="*",
+        metavar="SUITE",
+        help=f"Suites to run, all by default: {', '.join(SUITES)}.",
+    )
+    parser.add_argument(
+        "--json", type=Path, metavar="FILE", help="Write the results to a JSON file."
+    )
+    parser.add_argument(
+        "--compare",
+        type=Path,
+        metavar="FILE",
+        help="Compare the results with a baseline written with --json.",
+    )
+    parser.add_argument(
+        "--threshold",
+        type=float,
+        default=1.25,
+        metavar="RATIO",
+        help="Slowdown over the baseline reported as a regression (default: 1.25).",
+    )
+    args = parser.parse_args()
+    unknown = sorted(set(args.suites) - set(SUITES))
+    if unknown:
+        parser.error(f"unknown suites: {', '.join(unknown)}")
+
+    baseline = load_results(args.compare) if args.compare else None
+    results = []
+    for name in args.suites or SUITES:
+        suite_results = SUITES[name]()
+        if baseline is None:
+            report(suite_results)
+        results.extend(suite_results)
+
+    if args.json:
+        save_results(results, args.json)
+
+    if baseline is not None:
+        regressions = compare(results, baseline, args.threshold)
+        if regressions:
+            print(f"{len(regressions)} benchmark(s) regressed", file=sys.stderr)
+            return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
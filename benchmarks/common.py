@@ -0,0 +1,65 @@
+# SPDX-License-Identifier: MIT
+
+import json
+import platform
+import timeit
+from pathlib import Path
+from typing import Callable, NamedTuple
+
+
+class BenchmarkResult(NamedTuple):
+    name: str
+    seconds: float
+    number: int
+
+
+def compare(
+    results: list[BenchmarkResult],
+    baseline: dict[str, float],
+    threshold: float,
+) -> list[str]:
+    regressions = []
+    for result in results:
+        previous = baseline.get(result.name)
+        if not previous:
+            print(f"{result.name:<60} {result.seconds * 1e3:>12.3f} ms {'new':>8}")
+            continue
+
+        ratio = result.seconds / previous
+        flag = " !" if ratio > threshold else ""
+        print(
+            f"{result.name:<60} {result.seconds * 1e3:>12.3f} ms {ratio:>7.2f}x{flag}"
+        )
+        if ratio > threshold:
+            regressions.append(result.name)
+    return regressions
+
+
+def load_results(path: Path) -> dict[str, float]:
+    with path.open("r") as f:
+        data = json.load(f)
+    return {str(item["name"]): float(item["seconds"]) for item in data["results"]}
+
+
+def measure(
+    name: str, func: Callable[[], object], number: int = 1, repeat: int = 5
+) -> BenchmarkResult:
+    timer = timeit.Timer(func)
+    best = min(timer.repeat(repeat=repeat, number=number))
+    return BenchmarkResult(name, best / number, number)
+
+
+def report(results: list[BenchmarkResult]) -> None:
+    for result in results:
+        print(f"{result.name:<60} {result.seconds * 1e3:>12.3f} ms")
+
+
+def save_results(results: list[BenchmarkResult], path: Path) -> None:
+    data = {
+        "python": platform.python_version(),
+        "machine": platform.machine(),
+        "results": [result._asdict() for result in results],
+    }
+    with path.open("w") as f:
+        json.dump(data, f, indent=2)
+        f.write("\n")
@@ -0,0 +1,68 @@
+# SPDX-License-Identifier: MIT
+
+from mocks import MockListingProvider
+
+from benchmarks.common import BenchmarkResult, measure, report
+from oikotool.core import Oikotool
+from oikotool.formatters import ListingBaseFormatter, ListingBatchFormatter
+from oikotool.models import Listing
+from oikotool.templates import SlackTemplate
+from oikotool.translations import Language, Translations
+
+
+def format_all(listings: list[Listing]) -> list[tuple[str, str, str, str]]:
+    formatted = []
+    for listing in listings:
+        formatter = ListingBaseFormatter(listing)
+        formatted.append(
+            (formatter.address, formatter.price, formatter.size, formatter.image)
+        )
+    return formatted
+
+
+THROUGHPUT_SCALE = 100_000
+
+
+def run() -> list[BenchmarkResult]:
+    oikotool = Oikotool()
+    cards = MockListingProvider().large_card_set
+    listings = [Listing.from_card(c) for c in cards]
+    count = len(cards)
+    formatted = ListingBatchFormatter().format(listings)
+    template = SlackTemplate(SlackTemplate.DEFAULT, Translations(Language.FINNISH))
+    many = listings * (THROUGHPUT_SCALE // count)
+
+    return [
+        measure(
+            f"formatters.from_card[{count}]",
+            lambda: [Listing.from_card(c) for c in cards],
+        ),
+        measure(f"formatters.base[{count}]", lambda: format_all(listings)),
+        measure(
+            f"formatters.batch[{count}]",
+            lambda: ListingBatchFormatter().format(listings),
+        ),
+        measure(f"formatters.base[{len(many)}]", lambda: format_all(many), 1, 3),
+        measure(
+            f"formatters.batch[{len(many)}]",
+            lambda: ListingBatchFormatter().format(many),
+            1,
+            3,
+        ),
+        measure(
+            f"formatters.console[{count}]",
+            lambda: [oikotool._create_console_message(s) for s in formatted],
+        ),
+        measure(
+            f"formatters.slack_message[{count}]",
+            lambda: [SlackTemplate.compose([template.render(s)]) for s in formatted],
+        ),
+        measure(
+            f"formatters.slack_messages[{count},batch=10]",
+            lambda: oikotool._create_slack_batches(formatted, batch=10),
+        ),
+    ]
+
+
+if __name__ == "__main__":
+    report(run())
@@ -0,0 +1,56 @@
+# SPDX-License-Identifier: MIT
+
+from types import SimpleNamespace
+from typing import Any
+
+from mocks import MockHtmlProvider, MockListingProvider
+
+from benchmarks.common import BenchmarkResult, measure, report
+from oikotool.core import Oikotool
+from oikotool.models import Listing
+from oikotool.utils import HttpUtils
+
+LISTING_URL = "https://asunnot.oikotie.fi/myytavat-asunnot/helsinki/12345678"
+
+
+def run() -> list[BenchmarkResult]:
+    oikotool = Oikotool()
+    html = MockHtmlProvider()
+    listings = [Listing.from_card(c) for c in MockListingProvider().large_card_set]
+    pages = {
+        "small": html.listing_images_page,
+        "large": html.large_listing_images_page,
+    }
+    results = []
+
+    # The listing page is served from memory so that only parsing is measured
+    get_with_retry = HttpUtils.get_with_retry
+    try:
+        for label, page in pages.items():
+            response = SimpleNamespace(text=page)
+
+            def get(url: str, **kwargs: Any) -> Any:
+                return response
+
+            setattr(HttpUtils, "get_with_retry", get)
+            results.append(
+                measure(
+                    f"listing_details.parse[{label}]",
+                    lambda: oikotool._get_listing_details(LISTING_URL),
+                    number=5 if label == "large" else 200,
+                )
+            )
+    finally:
+        setattr(HttpUtils, "get_with_retry", get_with_retry)
+
+    results.append(
+        measure(
+            f"listing_details.from_card[{len(listings)}]",
+            lambda: [oikotool._get_listing_details_from_card(s) for s in listings],
+        )
+    )
+    return results
+
+
+if __name__ == "__main__":
+    report(run())
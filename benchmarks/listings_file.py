@@ -0,0 +1,49 @@
+# SPDX-License-Identifier: MIT
+
+import itertools
+import tempfile
+from pathlib import Path
+
+from benchmarks.common import BenchmarkResult, measure, report
+from oikotool.core import Oikotool
+
+SCALES = [1_000, 10_000, 100_000]
+NEW_PER_RUN = 10
+
+
+def run() -> list[BenchmarkResult]:
+    oikotool = Oikotool()
+    results = []
+
+    with tempfile.TemporaryDirectory() as tmp:
+        for scale in SCALES:
+            listings_file = Path(tmp) / f"{scale}" / Oikotool.LISTINGS_FILE
+            listings_file.parent.mkdir()
+            ids = [str(i) for i in range(20_000_000, 20_000_000 + scale)]
+            oikotool._update_listings_file(listings_file, ids, scale)
+            counter = itertools.count(30_000_000)
+
+            def update() -> None:
+                new_ids = [str(next(counter)) for _ in range(NEW_PER_RUN)]
+                oikotool._update_listings_file(listings_file, new_ids, scale)
+
+            results.append(
+                measure(
+                    f"listings_file.read[{scale}]",
+                    lambda: oikotool._read_listings_file(listings_file),
+                    max(1, 10_000 // scale),
+                )
+            )
+            results.append(
+                measure(
+                    f"listings_file.update[{scale}]",
+                    update,
+                    max(1, 10_000 // scale),
+                )
+            )
+
+    return results
+
+
+if __name__ == "__main__":
+    report(run())
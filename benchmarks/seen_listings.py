@@ -0,0 +1,86 @@
+# SPDX-License-Identifier: MIT
+
+from typing import Any
+
+from benchmarks.common import BenchmarkResult, measure, report
+from oikotool.core import Oikotool
+from oikotool.models import Listing
+from oikotool.seen import SeenListings
+
+SCALES = [1_000, 10_000, 100_000, 1_000_000]
+LEGACY_MAX_SCALE = 100_000
+PAGE_SIZE = 1_000
+
+
+def legacy_filter(listings: list[dict[str, Any]], seen_ids: list[str]) -> list[str]:
+    return [
+        str(listing["cardId"])
+        for listing in reversed(listings)
+        if str(listing["cardId"]) not in seen_ids
+    ]
+
+
+def legacy_refresh(seen: list[str], new: list[str], limit: int) -> list[str]:
+    seen = list(seen)
+    for item in new:
+        if item and item not in seen:
+            seen.append(item)
+    return seen[-limit:]
+
+
+def run() -> list[BenchmarkResult]:
+    oikotool = Oikotool()
+    results = []
+
+    for scale in SCALES:
+        ids = [str(i) for i in range(20_000_000, 20_000_000 + scale)]
+        # Half of the page is already seen, the other half is new
+        page_ids = ids[-PAGE_SIZE // 2 :]
+        page_ids += [str(i) for i in range(30_000_000, 30_000_000 + PAGE_SIZE // 2)]
+        cards = [{"cardId": int(i)} for i in reversed(page_ids)]
+        page = [Listing.from_card(card) for card in cards]
+        seen = SeenListings(ids)
+        number = max(1, 100_000 // scale)
+
+        results.append(
+            measure(f"seen_listings.build[{scale}]", lambda: SeenListings(ids), 1, 3)
+        )
+        results.append(
+            measure(
+                f"seen_listings.filter[{scale}]",
+                lambda: oikotool._filter_unseen_listings(page, seen),
+                number,
+            )
+        )
+        results.append(
+            measure(
+                f"seen_listings.refresh[{scale}]",
+                lambda: oikotool._refresh_recent_listings(ids, page_ids, scale),
+                1,
+                3,
+            )
+        )
+
+        if scale <= LEGACY_MAX_SCALE:
+            results.append(
+                measure(
+                    f"seen_listings.legacy_filter[{scale}]",
+                    lambda: legacy_filter(cards, ids),
+                    1,
+                    3,
+                )
+            )
+            results.append(
+                measure(
+                    f"seen_listings.legacy_refresh[{scale}]",
+                    lambda: legacy_refresh(ids, page_ids, scale),
+                    1,
+                    3,
+                )
+            )
+
+    return results
+
+
+if __name__ == "__main__":
+    report(run())
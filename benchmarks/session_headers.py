@@ -0,0 +1,55 @@
+# SPDX-License-Identifier: MIT
+
+from bs4 import BeautifulSoup
+from mocks import MockHtmlProvider
+
+from benchmarks.common import BenchmarkResult, measure, report
+from oikotool.core import Oikotool
+
+
+def extract_with_beautifulsoup(html: str) -> dict[str, str]:
+    soup = BeautifulSoup(html, "html.parser")
+    mapping = {"cuid": "OTA-cuid", "loaded": "OTA-loaded", "api-token": "OTA-token"}
+    headers = {}
+    for meta, header in mapping.items():
+        tag = soup.select_one(f"meta[name={meta}]")
+        if tag and "content" in tag.attrs:
+            headers[header] = str(tag.attrs.get("content", ""))
+    return headers
+
+
+def chunked(html: str, size: int = 8192) -> list[str]:
+    return [html[i : i + size] for i in range(0, len(html), size)]
+
+
+def run() -> list[BenchmarkResult]:
+    oikotool = Oikotool()
+    html = MockHtmlProvider()
+    pages = {
+        "small": html.website_with_session_headers,
+        "large": html.large_website_with_session_headers,
+    }
+    results = []
+
+    for label, page in pages.items():
+        chunks = chunked(page)
+        results.append(
+            measure(
+                f"session_headers.beautifulsoup[{label}]",
+                lambda: extract_with_beautifulsoup(page),
+                number=10 if label == "large" else 1000,
+            )
+        )
+        results.append(
+            measure(
+                f"session_headers.streaming[{label}]",
+                lambda: oikotool._extract_session_headers(iter(chunks)),
+                number=1000,
+            )
+        )
+
+    return results
+
+
+if __name__ == "__main__":
+    report(run())
@@ -0,0 +1,105 @@
+# SPDX-License-Identifier: MIT
+
+import hashlib
+import json
+import sys
+import time
+from pathlib import Path
+from types import TracebackType
+from typing import IO, Any, Callable, Optional
+from urllib.parse import parse_qsl, urlencode, urlsplit, urlunsplit
+
+from oikotool.utils import FileUtils
+
+if sys.platform != "win32":
+    import fcntl
+
+
+class FileLock:
+    """
+    An exclusive advisory lock on a file, usable as a context manager.
+
+    The lock is held on an open file description, so it excludes other
+    processes as well as other threads of the same process. On platforms
+    without flock the lock is a no-op.
+    """
+
+    def __init__(self, path: Path) -> None:
+        self._path = path
+        self._file: Optional[IO[str]] = None
+
+    def __enter__(self) -> "FileLock":
+        self._file = self._path.open("a")
+        if sys.platform != "win32":
+            fcntl.flock(self._file.fileno(), fcntl.LOCK_EX)
+        return self
+
+    def __exit__(
+        self,
+        exc_type: Optional[type[BaseException]],
+        exc_value: Optional[BaseException],
+        traceback: Optional[TracebackType],
+    ) -> None:
+        if self._file is not None:
+            if sys.platform != "win32":
+                fcntl.flock(self._file.fileno(), fcntl.LOCK_UN)
+            self._file.close()
+            self._file = None
+
+
+class ResponseCache:
+    """
+    A short-lived on-disk cache for JSON responses, keyed by request URL.
+
+    URLs are canonicalized by sorting their query parameters, so equivalent
+    requests share an entry. Entries are shared between threads and
+    processes: a miss is fetched while holding a per-entry file lock, and
+    anyone waiting for that lock uses the freshly stored response instead of
+    fetching it again.
+    """
+
+    def __init__(self, cache_dir: Path, ttl: float) -> None:
+        self._cache_dir = cache_dir
+        self._ttl = ttl
+
+    @staticmethod
+    def canonicalize(url: str) -> str:
+        scheme, netloc, path, query, fragment = urlsplit(url)
+        query = urlencode(sorted(parse_qsl(query, keep_blank_values=True)))
+        return urlunsplit((scheme, netloc.lower(), path, query, None))
+
+    def _get_entry_path(self, key: str) -> Path:
+        return self._cache_dir / f"{hashlib.sha256(key.encode()).hexdigest()}.json"
+
+    def _read_entry(self, path: Path, key: str) -> Optional[Any]:
+        try:
+            with path.open("r") as f:
+                entry = json.load(f)
+            if entry["url"] == key and time.time() - entry["fetched"] < self._ttl:
+                return entry["data"]
+        except (OSError, ValueError, KeyError, TypeError):
+            pass
+        return None
+
+    def get_or_fetch(self, url: str, fetch: Callable[[], Any]) -> Any:
+        if self._ttl <= 0:
+            return fetch()
+
+        key = self.canonicalize(url)
+        path = self._get_entry_path(key)
+        data = self._read_entry(path, key)
+        if data is not None:
+            return data
+
+        self._cache_dir.mkdir(parents=True, exist_ok=True)
+        with FileLock(path.with_suffix(".lock")):
+            # The response may have been stored while waiting for the lock
+            data = self._read_entry(path, key)
+            if data is not None:
+                return data
+
+            data = fetch()
+            entry = {"url": key, "fetched": time.time(), "data": data}
+            FileUtils.write_atomic(path, json.dumps(entry))
+
+        return data
@@ -1,12 +1,21 @@
 # SPDX-License-Identifier: MIT
 
 import os
+import re
+import signal
+import sys
 from pathlib import Path
 from typing import Annotated, Optional
+from urllib.parse import urlsplit
 
 import typer
 
+from oikotool.config import load_queries
 from oikotool.core import Oikotool
+from oikotool.exceptions import OikotoolConfigError
+from oikotool.profiling import Profiler
+from oikotool.utils import HttpUtils
+from oikotool.watcher import Watcher
 
 OIKOTOOL_APP_NAME = "oikotool"
 
@@ -18,9 +27,70 @@ app = typer.Typer(
     rich_markup_mode=None,
 )
 
+base_url: Optional[str] = None
 cache_dir = Path.home() / ".cache" / OIKOTOOL_APP_NAME
 
 
+def _create_oikotool(metrics: bool = False, api_cache: bool = False) -> Oikotool:
+    metrics_dir = cache_dir / Oikotool.METRICS_DIR if metrics else None
+    return Oikotool(
+        cache_dir=cache_dir,
+        api_cache=api_cache,
+        base_url=base_url,
+        metrics_dir=metrics_dir,
+    )
+
+
+@app.callback()
+def options(
+    ctx: typer.Context,
+    url: Annotated[
+        Optional[str],
+        typer.Option(
+            "--base-url",
+            metavar="URL",
+            help="Use another server in place of Oikotie, such as the fake server.",
+        ),
+    ] = None,
+    profile: Annotated[
+        bool,
+        typer.Option(
+            "--profile",
+            envvar="OIKOTOOL_PROFILE",
+            help="Profile the command and write the reports to the cache directory.",
+        ),
+    ] = False,
+    profile_memory: Annotated[
+        bool,
+        typer.Option(
+            "--profile-memory",
+            envvar="OIKOTOOL_PROFILE_MEMORY",
+            help="Profile the command with memory allocations, implies --profile.",
+        ),
+    ] = False,
+) -> None:
+    global base_url, cache_dir
+    if url:
+        # Sessions and seen listings of other servers are kept apart
+        base_url = url
+        cache_dir = (
+            cache_dir / "servers" / re.sub(r"[^\w.-]", "_", urlsplit(url).netloc)
+        )
+        cache_dir.mkdir(parents=True, exist_ok=True)
+
+    if profile or profile_memory:
+        profiler = Profiler(
+            cache_dir / "profiles", ctx.invoked_subcommand or "", profile_memory
+        )
+
+        def write_reports() -> None:
+            for path in profiler.stop():
+                print(f"Profile written to {path}", file=sys.stderr)
+
+        profiler.start()
+        ctx.call_on_close(write_reports)
+
+
 @app.command()
 def check(
     url: Annotated[str, typer.Argument(help="Property listing query to check.")],
@@ -45,6 +115,32 @@ def check(
             help="Slack webhook for notifications about new listings.",
         ),
     ] = None,
+    slack_batch: Annotated[
+        int,
+        typer.Option(
+            "--slack-batch",
+            metavar="NUMBER",
+            min=1,
+            help="Maximum number of listings per Slack message.",
+        ),
+    ] = 1,
+    slack_budget: Annotated[
+        float,
+        typer.Option(
+            "--slack-budget",
+            metavar="SECONDS",
+            min=0,
+            help="Time to spend delivering queued Slack messages.",
+        ),
+    ] = Oikotool.SLACK_BUDGET,
+    slack_template: Annotated[
+        Optional[str],
+        typer.Option(
+            "--slack-template",
+            metavar="FILE",
+            help="JSON template for Slack messages about new listings.",
+        ),
+    ] = None,
     healthchecks_url: Annotated[
         Optional[str],
         typer.Option(
@@ -63,6 +159,56 @@ def check(
             help="Uptime Kuma push address for status monitoring.",
         ),
     ] = None,
+    archive_path: Annotated[
+        Optional[str],
+        typer.Option(
+            "-a",
+            "--archive",
+            metavar="PATH",
+            help="Directory where images of new listings will be saved.",
+        ),
+    ] = None,
+    pages: Annotated[
+        int,
+        typer.Option(
+            "-p",
+            "--pages",
+            metavar="NUMBER",
+            min=1,
+            help="Maximum number of result pages to walk for new listings.",
+        ),
+    ] = 1,
+    prefetch: Annotated[
+        bool,
+        typer.Option(
+            "--prefetch",
+            help="Fetch the next result page while processing the current one.",
+        ),
+    ] = False,
+    api_cache: Annotated[
+        bool,
+        typer.Option(
+            "--api-cache",
+            envvar="OIKOTOOL_API_CACHE",
+            help="Share search API responses with other checks for a short time.",
+        ),
+    ] = False,
+    deadline: Annotated[
+        Optional[float],
+        typer.Option(
+            "--deadline",
+            metavar="SECONDS",
+            min=0,
+            help="Time limit for all network requests of the run.",
+        ),
+    ] = None,
+    metrics: Annotated[
+        bool,
+        typer.Option(
+            "--metrics",
+            help="Record timings and counters of each run in the cache folder.",
+        ),
+    ] = False,
     quiet: Annotated[
         bool,
         typer.Option(
@@ -75,17 +221,144 @@ def check(
     """
     Check a property search query for new listings.
     """
-    oikotool = Oikotool()
-    oikotool.check(
-        url=url,
-        name=name,
-        limit=limit,
-        cache_dir=cache_dir,
-        slack_url=slack_url,
-        healthchecks_url=healthchecks_url,
-        uptime_url=uptime_url,
-        quiet=quiet,
-    )
+    HttpUtils.set_deadline(deadline)
+    oikotool = _create_oikotool(metrics, api_cache=api_cache)
+    try:
+        oikotool.check(
+            url=url,
+            name=name,
+            limit=limit,
+            cache_dir=cache_dir,
+            slack_url=slack_url,
+            healthchecks_url=healthchecks_url,
+            uptime_url=uptime_url,
+            archive_dir=Path(archive_path).absolute() if archive_path else None,
+            pages=pages,
+            prefetch=prefetch,
+            slack_batch=slack_batch,
+            slack_budget=slack_budget,
+            slack_template=oikotool.load_slack_template(Path(slack_template))
+            if slack_template
+            else None,
+            quiet=quiet,
+        )
+    except OikotoolConfigError as e:
+        raise typer.BadParameter(str(e)) from e
+
+
+@app.command(name="check-all")
+def check_all(
+    config: Annotated[
+        str,
+        typer.Argument(help="Configuration file with the queries to check."),
+    ],
+    jobs: Annotated[
+        int,
+        typer.Option(
+            "-j",
+            "--jobs",
+            metavar="NUMBER",
+            min=1,
+            help="Number of checks to run concurrently.",
+        ),
+    ] = Oikotool.CHECK_JOBS,
+    deadline: Annotated[
+        Optional[float],
+        typer.Option(
+            "--deadline",
+            metavar="SECONDS",
+            min=0,
+            help="Time limit for all network requests of the run.",
+        ),
+    ] = None,
+    metrics: Annotated[
+        bool,
+        typer.Option(
+            "--metrics",
+            help="Record timings and counters of each run in the cache folder.",
+        ),
+    ] = False,
+    quiet: Annotated[
+        bool,
+        typer.Option(
+            "-q",
+            "--quiet",
+            help="Suppress all console output except errors.",
+        ),
+    ] = False,
+) -> None:
+    """
+    Check all property search queries of a configuration file once.
+    """
+    HttpUtils.set_deadline(deadline)
+    try:
+        queries = load_queries(Path(config))
+    except OikotoolConfigError as e:
+        raise typer.BadParameter(str(e)) from e
+
+    oikotool = _create_oikotool(metrics, api_cache=True)
+    failed = oikotool.check_all(queries, cache_dir, jobs=jobs, quiet=quiet)
+    if failed:
+        raise typer.Exit(code=1)
+
+
+@app.command()
+def drain(
+    names: Annotated[
+        Optional[list[str]],
+        typer.Option(
+            "-n",
+            "--name",
+            help="Name of the monitoring task, all tasks if not given.",
+            show_default=False,
+        ),
+    ] = None,
+    budget: Annotated[
+        Optional[float],
+        typer.Option(
+            "--budget",
+            metavar="SECONDS",
+            min=0,
+            help="Time to spend delivering, unlimited if not given.",
+        ),
+    ] = None,
+    deadline: Annotated[
+        Optional[float],
+        typer.Option(
+            "--deadline",
+            metavar="SECONDS",
+            min=0,
+            help="Time limit for all network requests of the run.",
+        ),
+    ] = None,
+    quiet: Annotated[
+        bool,
+        typer.Option(
+            "-q",
+            "--quiet",
+            help="Suppress all console output except errors.",
+        ),
+    ] = False,
+) -> None:
+    """
+    Deliver Slack messages left undelivered by earlier checks.
+    """
+    HttpUtils.set_deadline(deadline)
+    oikotool = _create_oikotool()
+    pending = oikotool.drain(cache_dir, names=names or None, budget=budget, quiet=quiet)
+    if pending:
+        if not quiet:
+            print(f"{pending} message(s) still pending", file=sys.stderr)
+        raise typer.Exit(code=1)
+
+
+def _read_urls(input_file: str) -> list[str]:
+    if input_file == "-":
+        lines = sys.stdin.read().splitlines()
+    else:
+        with open(input_file, "r") as f:
+            lines = f.read().splitlines()
+    return [s.strip() for s in lines if s.strip() and not s.startswith("#")]
 
 
 @app.command()
@@ -94,9 +367,23 @@ def save(
         str,
         typer.Argument(help="Directory where the listing images will be saved."),
     ],
-    url: Annotated[
-        str, typer.Argument(help="Address of the property listing to be saved.")
-    ],
+    urls: Annotated[
+        Optional[list[str]],
+        typer.Argument(
+            metavar="URL...",
+            help="Addresses of the property listings to be saved.",
+            show_default=False,
+        ),
+    ] = None,
+    input_file: Annotated[
+        Optional[str],
+        typer.Option(
+            "-i",
+            "--input",
+            metavar="FILE",
+            help="File with listing addresses, one per line, or '-' for stdin.",
+        ),
+    ] = None,
     batch: Annotated[
         bool,
         typer.Option(
@@ -105,6 +392,42 @@ def save(
             help="Batch mode that creates target subfolder automatically.",
         ),
     ] = False,
+    jobs: Annotated[
+        int,
+        typer.Option(
+            "-j",
+            "--jobs",
+            metavar="NUMBER",
+            min=1,
+            help="Number of images to download concurrently.",
+        ),
+    ] = Oikotool.DOWNLOAD_JOBS,
+    listing_jobs: Annotated[
+        int,
+        typer.Option(
+            "-p",
+            "--parallel",
+            metavar="NUMBER",
+            min=1,
+            help="Number of listings to process concurrently.",
+        ),
+    ] = Oikotool.SAVE_LISTING_JOBS,
+    deadline: Annotated[
+        Optional[float],
+        typer.Option(
+            "--deadline",
+            metavar="SECONDS",
+            min=0,
+            help="Time limit for all network requests of the run.",
+        ),
+    ] = None,
+    metrics: Annotated[
+        bool,
+        typer.Option(
+            "--metrics",
+            help="Record timings and counters of each run in the cache folder.",
+        ),
+    ] = False,
     quiet: Annotated[
         bool,
         typer.Option(
@@ -115,14 +438,88 @@ def save(
     ] = False,
 ) -> None:
     """
-    Save images from a property listing to a specified directory.
+    Save images from property listings to a specified directory.
     """
-    oikotool = Oikotool()
+    HttpUtils.set_deadline(deadline)
+    urls = list(urls or [])
+    if input_file:
+        urls.extend(_read_urls(input_file))
+    if not urls:
+        raise typer.BadParameter("At least one listing address is required.")
+
+    oikotool = _create_oikotool(metrics)
     output = Path(path).absolute()
-    oikotool.save(url=url, base_dir=output, batch=batch, quiet=quiet)
+
+    if len(urls) == 1:
+        oikotool.save(url=urls[0], base_dir=output, batch=batch, quiet=quiet, jobs=jobs)
+        return
+
+    if not batch:
+        raise typer.BadParameter("Saving multiple listings requires --batch.")
+
+    results = oikotool.save_many(
+        urls=urls,
+        base_dir=output,
+        quiet=quiet,
+        jobs=jobs,
+        listing_jobs=listing_jobs,
+    )
+    if any(result.error is not None for result in results):
+        raise typer.Exit(code=1)
+
+
+@app.command()
+def watch(
+    config: Annotated[
+        str,
+        typer.Argument(help="Configuration file with the queries to check."),
+    ],
+    jobs: Annotated[
+        int,
+        typer.Option(
+            "-j",
+            "--jobs",
+            metavar="NUMBER",
+            min=1,
+            help="Number of checks to run concurrently.",
+        ),
+    ] = Watcher.WORKERS,
+    metrics: Annotated[
+        bool,
+        typer.Option(
+            "--metrics",
+            help="Record timings and counters of each run in the cache folder.",
+        ),
+    ] = False,
+    quiet: Annotated[
+        bool,
+        typer.Option(
+            "-q",
+            "--quiet",
+            help="Suppress all console output except errors.",
+        ),
+    ] = False,
+) -> None:
+    """
+    Check property search queries on their own intervals until stopped.
+    """
+    try:
+        queries = load_queries(Path(config))
+    except OikotoolConfigError as e:
+        raise typer.BadParameter(str(e)) from e
+
+    oikotool = _create_oikotool(metrics, api_cache=True)
+    watcher = Watcher(oikotool, queries, cache_dir, workers=jobs, quiet=quiet)
+    signal.signal(signal.SIGTERM, lambda signum, frame: watcher.stop())
+
+    try:
+        watcher.run()
+    except KeyboardInterrupt:
+        watcher.stop()
 
 
 if "DEBUG" in os.environ:
+    from oikotool.fakeserver import FakeOikotieServer, FakeServerConfig
 
     @app.command()
     def dump(
@@ -136,11 +533,19 @@ if "DEBUG" in os.environ:
                 help="Maximum number of listings to include.",
             ),
         ] = 1,
+        api_cache: Annotated[
+            bool,
+            typer.Option(
+                "--api-cache",
+                envvar="OIKOTOOL_API_CACHE",
+                help="Reuse a search API response cached by a recent check.",
+            ),
+        ] = False,
     ) -> None:
         """
         Display raw API response for property listing query on console.
         """
-        oikotool = Oikotool()
+        oikotool = _create_oikotool(api_cache=api_cache)
         oikotool.dump(url=url, limit=limit)
 
     @app.command()
@@ -159,10 +564,91 @@ if "DEBUG" in os.environ:
         """
         Process property listing query and output Slack messages to console.
         """
-        oikotool = Oikotool()
+        oikotool = _create_oikotool()
         oikotool.slack(url=url, limit=limit)
 
+    @app.command(name="fake-server")
+    def fake_server(
+        port: Annotated[
+            int,
+            typer.Option("--port", metavar="NUMBER", help="Port to listen on."),
+        ] = 8080,
+        listings: Annotated[
+            int,
+            typer.Option(
+                "--listings", metavar="NUMBER", help="Number of initial listings."
+            ),
+        ] = FakeServerConfig._field_defaults["listings"],
+        images: Annotated[
+            int,
+            typer.Option(
+                "--images", metavar="NUMBER", help="Number of images per listing."
+            ),
+        ] = FakeServerConfig._field_defaults["images"],
+        publish_rate: Annotated[
+            float,
+            typer.Option(
+                "--publish-rate",
+                metavar="NUMBER",
+                help="New listings published per second.",
+            ),
+        ] = FakeServerConfig._field_defaults["publish_rate"],
+        latency: Annotated[
+            float,
+            typer.Option(
+                "--latency", metavar="SECONDS", help="Delay added to every response."
+            ),
+        ] = FakeServerConfig._field_defaults["latency"],
+        error_rate: Annotated[
+            float,
+            typer.Option(
+                "--error-rate",
+                metavar="RATIO",
+                help="Share of requests answered with 503.",
+            ),
+        ] = FakeServerConfig._field_defaults["error_rate"],
+        rate_limit_rate: Annotated[
+            float,
+            typer.Option(
+                "--rate-limit-rate",
+                metavar="RATIO",
+                help="Share of requests answered with 429 and Retry-After.",
+            ),
+        ] = FakeServerConfig._field_defaults["rate_limit_rate"],
+    ) -> None:
+        """
+        Serve a local stand-in for Oikotie, its CDN, Slack and health services.
+        """
+        config = FakeServerConfig(
+            listings=listings,
+            images=images,
+            publish_rate=publish_rate,
+            latency=latency,
+            error_rate=error_rate,
+            rate_limit_rate=rate_limit_rate,
+        )
+        server = FakeOikotieServer(port=port, config=config).start()
+        print(
+            f"Serving on {server.url}, Slack: {server.url}slack/, "
+            f"health: {server.url}health/"
+        )
+        try:
+            signal.pause()
+        except KeyboardInterrupt:
+            pass
+        finally:
+            server.stop()
+
 
 def main() -> None:
     cache_dir.mkdir(parents=True, exist_ok=True)
-    app()
+    try:
+        app()
+    finally:
+        if "DEBUG" in os.environ:
+            stats = HttpUtils.connection_stats()
+            print(
+                "HTTP requests: {requests}, connections: {connections}, "
+                "reused: {reused}".format(**stats),
+                file=sys.stderr,
+            )
@@ -0,0 +1,139 @@
+# SPDX-License-Identifier: MIT
+
+import json
+from pathlib import Path
+from typing import Any, NamedTuple, Optional
+
+from oikotool.exceptions import OikotoolConfigError
+from oikotool.templates import SlackTemplate
+from oikotool.translations import Language, Translations
+
+
+class QueryConfig(NamedTuple):
+    name: str
+    url: str
+    interval: float = 300
+    limit: int = 10
+    slack_url: Optional[str] = None
+    healthchecks_url: Optional[str] = None
+    uptime_url: Optional[str] = None
+    archive_dir: Optional[Path] = None
+    pages: int = 1
+    prefetch: bool = False
+    slack_batch: int = 1
+    slack_budget: float = 30
+    slack_template: Optional[SlackTemplate] = None
+
+
+def _load_template(name: str, path: str, translations: Translations) -> SlackTemplate:
+    try:
+        return SlackTemplate.load(Path(path).expanduser(), translations)
+    except OikotoolConfigError as e:
+        raise OikotoolConfigError(
+            f"Query '{name}' has an invalid 'slack_template': {e}"
+        ) from e
+
+
+def _parse_query(index: int, item: Any, translations: Translations) -> QueryConfig:
+    if not isinstance(item, dict):
+        raise OikotoolConfigError(f"Query #{index + 1} must be an object.")
+
+    name = item.get("name")
+    url = item.get("url")
+    if not isinstance(name, str) or not name:
+        raise OikotoolConfigError(f"Query #{index + 1} is missing 'name'.")
+    if not isinstance(url, str) or not url:
+        raise OikotoolConfigError(f"Query '{name}' is missing 'url'.")
+
+    # JSON true and false are parsed as bools, which are ints in Python
+    for key in ["interval", "limit", "pages", "slack_batch", "slack_budget"]:
+        if isinstance(item.get(key), bool):
+            raise OikotoolConfigError(f"Query '{name}' has an invalid '{key}'.")
+
+    interval = item.get("interval", QueryConfig._field_defaults["interval"])
+    limit = item.get("limit", QueryConfig._field_defaults["limit"])
+    pages = item.get("pages", QueryConfig._field_defaults["pages"])
+    prefetch = item.get("prefetch", QueryConfig._field_defaults["prefetch"])
+    slack_batch = item.get("slack_batch", QueryConfig._field_defaults["slack_batch"])
+    slack_budget = item.get("slack_budget", QueryConfig._field_defaults["slack_budget"])
+    if not isinstance(interval, (int, float)) or interval <= 0:
+        raise OikotoolConfigError(f"Query '{name}' has an invalid 'interval'.")
+    if not isinstance(limit, int) or limit <= 0:
+        raise OikotoolConfigError(f"Query '{name}' has an invalid 'limit'.")
+    if not isinstance(pages, int) or pages <= 0:
+        raise OikotoolConfigError(f"Query '{name}' has an invalid 'pages'.")
+    if not isinstance(prefetch, bool):
+        raise OikotoolConfigError(f"Query '{name}' has an invalid 'prefetch'.")
+    if not isinstance(slack_batch, int) or slack_batch <= 0:
+        raise OikotoolConfigError(f"Query '{name}' has an invalid 'slack_batch'.")
+    if not isinstance(slack_budget, (int, float)) or slack_budget < 0:
+        raise OikotoolConfigError(f"Query '{name}' has an invalid 'slack_budget'.")
+
+    options = {}
+    for key in ["slack", "healthchecks", "uptime", "archive", "slack_template"]:
+        value = item.get(key)
+        if value is not None and not isinstance(value, str):
+            raise OikotoolConfigError(f"Query '{name}' has an invalid '{key}'.")
+        options[key] = value or None
+
+    known = {
+        "name",
+        "url",
+        "interval",
+        "limit",
+        "pages",
+        "prefetch",
+        "slack_batch",
+        "slack_budget",
+        *options,
+    }
+    unknown = set(item) - known
+    if unknown:
+        keys = ", ".join(sorted(unknown))
+        raise OikotoolConfigError(f"Query '{name}' has unknown keys: {keys}.")
+
+    return QueryConfig(
+        name=name,
+        url=url,
+        interval=float(interval),
+        limit=limit,
+        slack_url=options["slack"],
+        healthchecks_url=options["healthchecks"],
+        uptime_url=options["uptime"],
+        archive_dir=Path(options["archive"]).expanduser()
+        if options["archive"]
+        else None,
+        pages=pages,
+        prefetch=prefetch,
+        slack_batch=slack_batch,
+        slack_budget=float(slack_budget),
+        slack_template=_load_template(name, options["slack_template"], translations)
+        if options["slack_template"]
+        else None,
+    )
+
+
+def load_queries(
+    path: Path, translations: Translations = Translations(Language.FINNISH)
+) -> list[QueryConfig]:
+    try:
+        with path.open("r") as f:
+            data = json.load(f)
+    except OSError as e:
+        raise OikotoolConfigError(f"Failed to read {path}: {e.strerror}.") from e
+    except ValueError as e:
+        raise OikotoolConfigError(f"Invalid JSON in {path}: {e}.") from e
+
+    items = data.get("queries") if isinstance(data, dict) else None
+    if not isinstance(items, list) or not items:
+        raise OikotoolConfigError(f"No queries defined in {path}.")
+
+    # Slack templates are compiled here, so that a broken template is reported
+    # with the other configuration errors instead of failing every check
+    queries = [_parse_query(i, item, translations) for i, item in enumerate(items)]
+    names = [query.name for query in queries]
+    duplicates = sorted({name for name in names if names.count(name) > 1})
+    if duplicates:
+        raise OikotoolConfigError(f"Duplicate query names: {', '.join(duplicates)}.")
+
+    return queries
@@ -1,124 +1,373 @@
 # SPDX-License-Identifier: MIT
 
+from __future__ import annotations
+
+import hashlib
 import json
+import os
 import re
 import shutil
+import sys
+import threading
+import time
+from collections.abc import Container, Iterable, Iterator
+from concurrent.futures import Executor, ThreadPoolExecutor
+from contextlib import contextmanager
 from pathlib import Path
-from typing import Any, Optional
+from typing import TYPE_CHECKING, Any, Callable, NamedTuple, Optional, Union
 from urllib.parse import parse_qsl, urlencode, urlsplit, urlunsplit
 
-from bs4 import BeautifulSoup
-
+from oikotool import metrics
+from oikotool.cache import ResponseCache
+from oikotool.config import QueryConfig
 from oikotool.exceptions import (
     OikotieAddressException,
     OikotieSessionError,
     OikotieUrlError,
 )
-from oikotool.formatters import ListingConsoleFormatter, ListingSlackFormatter
+from oikotool.formatters import (
+    FormattedListing,
+    ListingBatchFormatter,
+)
+from oikotool.metrics import RunMetrics
+from oikotool.models import Listing
+from oikotool.outbox import SlackOutbox
+from oikotool.parsers import extract_meta_tags
+from oikotool.seen import SeenListings, SeenListingsJournal
+from oikotool.templates import RenderedMessage, SlackTemplate
 from oikotool.translations import Language, Translations
-from oikotool.utils import HttpUtils
+from oikotool.utils import FileUtils, HashingWriter, HttpUtils
+
+if TYPE_CHECKING:
+    from requests import Response
+
+
+class SaveResult(NamedTuple):
+    url: str
+    duration: float
+    images: int = 0
+    error: Optional[BaseException] = None
 
 
 class Oikotool:
-    LISTINGS_FILE: str = "seen.txt"
+    API_CACHE_DIR: str = "api"
+    API_CACHE_TTL: float = 30
+    CHECK_JOBS: int = 4
+    DOWNLOAD_JOBS: int = 4
+    HEALTH_PING_DEADLINE: float = 10
+    LEGACY_LISTINGS_FILE: str = "seen.txt"
+    LISTINGS_FILE: str = "seen.log"
+    MANIFEST_FILE: str = ".oikotool.json"
+    METRICS_DIR: str = "metrics"
+    METRICS_FILE: str = "metrics.jsonl"
     OIKOTIE_API_PATH: str = "/api/search"
     OIKOTIE_ASUNNOT_CDN_URL: str = "https://cdn.asunnot.oikotie.fi/"
     OIKOTIE_ASUNNOT_WEB_URL: str = "https://asunnot.oikotie.fi/"
     OIKOTIE_IMAGES_PATH: str = "/kuvat"
+    OUTBOX_DIR: str = "outbox"
+    SAVE_LISTING_JOBS: int = 4
+    SESSION_FILE: str = "session.json"
+    SLACK_BUDGET: float = 30
+    SLACK_MAX_BLOCKS: int = 50
+    SLACK_MAX_PAYLOAD: int = 40000
+    SESSION_MAX_AGE: int = 3600
 
     def __init__(
-        self, translations: Translations = Translations(Language.FINNISH)
+        self,
+        translations: Translations = Translations(Language.FINNISH),
+        cache_dir: Optional[Path] = None,
+        api_cache: bool = False,
+        api_cache_ttl: float = API_CACHE_TTL,
+        base_url: Optional[str] = None,
+        metrics_dir: Optional[Path] = None,
     ) -> None:
+        if base_url:
+            # A stand-in server, such as the fake server, serves the images too
+            self.OIKOTIE_ASUNNOT_WEB_URL = f"{base_url.rstrip('/')}/"
+            self.OIKOTIE_ASUNNOT_CDN_URL = f"{self.OIKOTIE_ASUNNOT_WEB_URL}cdn/"
         _, netloc, _, _, _ = urlsplit(self.OIKOTIE_ASUNNOT_WEB_URL)
         self.OIKOTIE_ASUNNOT_WEB_HOST = netloc
         self._translations = translations
+        self._cache_dir = cache_dir
+        self._metrics_dir = metrics_dir
+        # Responses are only cached on disk when asked for, as checks that
+        # share no searches would miss and write the cache for nothing
+        self._api_cache = (
+            ResponseCache(cache_dir / self.API_CACHE_DIR, api_cache_ttl)
+            if cache_dir and api_cache
+            else None
+        )
+        self._output_lock = threading.Lock()
+        self._session: Optional[dict[str, str]] = None
+        self._session_lock = threading.Lock()
+        self._slack_template = SlackTemplate(SlackTemplate.DEFAULT, translations)
 
-    def _create_console_message(self, listing: dict[str, Any]) -> str:
-        formatter = ListingConsoleFormatter(listing)
-        details = [formatter.address, formatter.size, formatter.price, listing["url"]]
+    def _archive_listings(
+        self, listings: list[Listing], archive_dir: Path, quiet: bool = False
+    ) -> None:
+        HttpUtils.set_pool_size(self.OIKOTIE_ASUNNOT_CDN_URL, self.DOWNLOAD_JOBS)
+        with ThreadPoolExecutor(max_workers=self.DOWNLOAD_JOBS) as executor:
+            for listing in listings:
+                # A listing that fails to archive does not fail the check, the
+                # listing has already been reported and marked as seen
+                try:
+                    self._save_listing(
+                        listing.url, archive_dir, executor, True, quiet, listing=listing
+                    )
+                except Exception as e:
+                    metrics.count("archive_errors")
+                    print(f"Failed to archive {listing.url}: {e}", file=sys.stderr)
+
+    def _create_console_message(self, listing: FormattedListing) -> str:
+        details = [listing.address, listing.size, listing.price, listing.url]
         return ", ".join(s for s in details if s)
 
-    def _create_slack_message(self, listing: dict[str, Any]) -> dict[str, Any]:
-        formatter = ListingSlackFormatter(listing, self._translations)
-        return {
-            "text": formatter.address,
-            "blocks": [
-                {
-                    "type": "header",
-                    "text": {
-                        "type": "plain_text",
-                        "text": formatter.address,
-                    },
-                },
-                {
-                    "type": "image",
-                    "image_url": formatter.image,
-                    "alt_text": formatter.address,
-                },
-                {
-                    "type": "section",
-                    "fields": [
-                        {
-                            "type": "mrkdwn",
-                            "text": f"*{self._translations.label_price}:*\n{formatter.price}",
-                        },
-                        {
-                            "type": "mrkdwn",
-                            "text": f"*{self._translations.label_size}:*\n{formatter.size}",
-                        },
-                    ],
-                },
-                {
-                    "type": "rich_text",
-                    "elements": [
-                        {
-                            "type": "rich_text_section",
-                            "elements": [
-                                {
-                                    "type": "text",
-                                    "text": f"{self._translations.label_listing}:\n",
-                                    "style": {"bold": True},
-                                },
-                                {
-                                    "type": "link",
-                                    "url": listing["url"],
-                                },
-                            ],
-                        }
-                    ],
-                },
-            ],
-        }
-
-    def _extract_session_headers(self, html: str) -> dict[str, str]:
-        soup = BeautifulSoup(html, "html.parser")
+    def _create_slack_batches(
+        self,
+        listings: list[FormattedListing],
+        batch: int = 1,
+        template: Optional[SlackTemplate] = None,
+    ) -> list[tuple[list[str], str]]:
+        template = template or self._slack_template
+        batches: list[tuple[list[str], str]] = []
+        ids: list[str] = []
+        messages: list[RenderedMessage] = []
+        blocks = 0
+        size = 0
+
+        # Rendered fragments are composed into messages as strings, the size of
+        # each message is known exactly without serializing it
+        divider_size = len(SlackTemplate.DIVIDER) + 4
+        empty_size = len(SlackTemplate.compose([RenderedMessage("", "")]))
+
+        for listing in listings:
+            message = template.render(listing)
+            extra_blocks = template.block_count + 1
+            extra_size = len(message.text) + len(message.blocks) + divider_size + 2
+
+            # Listings are kept in order, a new message is started whenever
+            # the next listing would not fit into the current one
+            if messages and (
+                len(ids) >= batch
+                or blocks + extra_blocks > self.SLACK_MAX_BLOCKS
+                or empty_size + size + extra_size > self.SLACK_MAX_PAYLOAD
+            ):
+                batches.append((ids, SlackTemplate.compose(messages)))
+                ids, messages, blocks, size = [], [], 0, 0
+
+            if not messages:
+                extra_blocks = template.block_count
+                extra_size = len(message.text) + len(message.blocks)
+
+            ids.append(str(listing.id))
+            messages.append(message)
+            blocks += extra_blocks
+            size += extra_size
+
+        if messages:
+            batches.append((ids, SlackTemplate.compose(messages)))
+        return batches
+
+    def _create_slack_message(
+        self, listing: FormattedListing, template: Optional[SlackTemplate] = None
+    ) -> dict[str, Any]:
+        template = template or self._slack_template
+        return dict(json.loads(SlackTemplate.compose([template.render(listing)])))
+
+    def _create_slack_messages(
+        self,
+        listings: list[FormattedListing],
+        batch: int = 1,
+        template: Optional[SlackTemplate] = None,
+    ) -> list[dict[str, Any]]:
+        return [
+            json.loads(payload)
+            for _, payload in self._create_slack_batches(listings, batch, template)
+        ]
+
+    def _download_image(
+        self, url: str, base_dir: Path, manifest: dict[str, dict[str, Any]]
+    ) -> tuple[Path, bool]:
+        entry = manifest.get(url, {})
+        headers, offset = self._prepare_download_headers(base_dir, entry)
+
+        try:
+            response = HttpUtils.get_with_retry(
+                url, headers=headers, stream=True, policy=HttpUtils.CDN_POLICY
+            )
+        except Exception as e:
+            if offset and HttpUtils.get_status_code(e) == 416:
+                # The partial file no longer matches the remote image, start over
+                (base_dir / f"{entry['file']}.part").unlink(missing_ok=True)
+                manifest.pop(url, None)
+                return self._download_image(url, base_dir, manifest)
+            raise
+
+        with response:
+            if response.status_code == 304:
+                metrics.count("images_unchanged")
+                return base_dir / entry["file"], False
+
+            ctype = str(response.headers.get("Content-Type"))
+            bname = url.split("/")[-1]
+            ext = ctype.split("/")[-1]
+            output = base_dir / f"{bname}.{ext}"
+            resume = response.status_code == 206 and entry.get("file") == output.name
+            if response.status_code == 206 and not resume:
+                if not offset:
+                    raise ValueError(f"Unexpected partial response for {url}")
+                # The range belongs to a partial file of another name, start over
+                (base_dir / f"{entry['file']}.part").unlink(missing_ok=True)
+                manifest.pop(url, None)
+                return self._download_image(url, base_dir, manifest)
+
+            etag = response.headers.get("ETag")
+            last_modified = response.headers.get("Last-Modified")
+            manifest[url] = {
+                "file": output.name,
+                "size": None,
+                "etag": etag,
+                "last_modified": last_modified,
+                "sha256": None,
+            }
+
+            # Write to a temporary file first so an interrupted download never
+            # leaves a truncated image behind under the final name
+            partial = output.with_name(f"{output.name}.part")
+            digest = hashlib.sha256()
+            if resume:
+                with partial.open("rb") as f:
+                    for chunk in iter(lambda: f.read(65536), b""):
+                        digest.update(chunk)
+
+            try:
+                with partial.open("ab" if resume else "wb") as f:
+                    response.raw.decode_content = True
+                    shutil.copyfileobj(response.raw, HashingWriter(f, digest))
+                os.replace(partial, output)
+            except BaseException:
+                # Partial files can only be resumed when the image has a validator
+                if not etag and not last_modified:
+                    partial.unlink(missing_ok=True)
+                raise
+
+        size = output.stat().st_size
+        manifest[url].update(size=size, sha256=digest.hexdigest())
+        metrics.count("images_downloaded")
+        metrics.count("bytes_downloaded", size - (offset if resume else 0))
+        return output, True
+
+    def _extract_session_headers(
+        self, html: Union[str, Iterable[str]]
+    ) -> dict[str, str]:
         mapping = {"cuid": "OTA-cuid", "loaded": "OTA-loaded", "api-token": "OTA-token"}
+        chunks = [html] if isinstance(html, str) else html
+        tags = extract_meta_tags(chunks, mapping.keys())
         headers = {}
 
         for meta, header in mapping.items():
-            tag = soup.select_one(f"meta[name={meta}]")
-            if tag and "content" in tag.attrs:
-                headers[header] = tag.attrs.get("content", "")
+            content = tags.get(meta)
+            if content is not None:
+                headers[header] = content
             else:
                 raise OikotieSessionError(f"'{meta}' tag is missing from the response.")
 
         return headers
 
+    def _fetch_api_data(self, url: str) -> Any:
+        if self._api_cache is None:
+            return self._fetch_api_response(url).json()
+        return self._api_cache.get_or_fetch(
+            url, lambda: self._fetch_api_response(url).json()
+        )
+
+    def _fetch_api_response(self, url: str) -> Response:
+        session = self._initialize_session()
+        try:
+            with metrics.timed("api"):
+                response: Response = HttpUtils.get_with_retry(url, headers=session)
+            return response
+        except Exception as e:
+            if not HttpUtils.is_auth_error(e):
+                raise
+
+        # The cached session tokens were rejected, fetch a fresh set and retry once
+        session = self._initialize_session(rejected=session)
+        with metrics.timed("api"):
+            response = HttpUtils.get_with_retry(url, headers=session)
+        return response
+
+    def _fetch_listings(
+        self,
+        url: str,
+        seen_ids: Container[str],
+        pages: int = 1,
+        prefetch: bool = False,
+    ) -> list[Listing]:
+        params = dict(parse_qsl(urlsplit(url).query))
+        page_size = int(params.get("limit", "0"))
+
+        # Walking further pages only makes sense when results are sorted by
+        # publication time and there are seen listings to stop at
+        if params.get("sortBy") != "published_sort_desc" or not seen_ids:
+            pages = 1
+
+        listings: list[Listing] = []
+        taken: set[str] = set()
+        with ThreadPoolExecutor(max_workers=1) as executor:
+            future = executor.submit(metrics.wrap(self._fetch_api_data), url)
+            for page in range(1, pages + 1):
+                data = future.result()
+                more = page < pages
+                if more and prefetch:
+                    next_url = self._prepare_api_page_url(url, page + 1)
+                    future = executor.submit(
+                        metrics.wrap(self._fetch_api_data), next_url
+                    )
+
+                # Cards are projected right away, so that only the compact
+                # records are kept across pages
+                cards = data["cards"]
+                page_listings = [Listing.from_card(card) for card in cards]
+
+                # Listings published while the pages are walked push earlier
+                # cards down, so the same card can show up on the next page
+                for listing in page_listings:
+                    if listing.id is None or listing.id not in taken:
+                        listings.append(listing)
+                        if listing.id is not None:
+                            taken.add(listing.id)
+                if len(page_listings) < page_size or any(
+                    s.id in seen_ids for s in page_listings if s.id is not None
+                ):
+                    break
+
+                if more and not prefetch:
+                    next_url = self._prepare_api_page_url(url, page + 1)
+                    future = executor.submit(
+                        metrics.wrap(self._fetch_api_data), next_url
+                    )
+
+        return listings
+
     def _filter_unseen_listings(
-        self, listings: list[dict[str, Any]], seen_ids: list[str]
-    ) -> tuple[list[str], list[dict[str, Any]]]:
+        self, listings: list[Listing], seen_ids: Container[str]
+    ) -> tuple[list[str], list[Listing]]:
         new_ids = []
         new_listings = []
         for listing in reversed(listings):
-            listing_id = listing.get("cardId")
-            if listing_id is not None:
-                str_id = str(listing_id)
-                if str_id not in seen_ids:
-                    new_ids.append(str_id)
-                    new_listings.append(listing)
+            listing_id = listing.id
+            if listing_id is not None and listing_id not in seen_ids:
+                new_ids.append(listing_id)
+                new_listings.append(listing)
         return new_ids, new_listings
 
+    def _format_listings(self, listings: list[Listing]) -> list[FormattedListing]:
+        return ListingBatchFormatter().format(listings)
+
     def _get_listing_details(self, url: str) -> tuple[Optional[str], list[str]]:
+        from bs4 import BeautifulSoup
+
         url = self._prepare_listing_images_url(url)
         response = HttpUtils.get_with_retry(url)
         soup = BeautifulSoup(response.text, "html.parser")
@@ -136,60 +385,191 @@ class Oikotool:
 
         return (address, urls)
 
+    def _get_listing_details_from_card(
+        self, listing: Listing
+    ) -> Optional[tuple[Optional[str], list[str]]]:
+        urls = [s for s in listing.images if s.startswith(self.OIKOTIE_ASUNNOT_CDN_URL)]
+
+        # Without images the card is of no use, the listing page has to be scraped
+        if not urls:
+            return None
+
+        # The folder name is built as the listing page header shows it, without
+        # the formatting of the output, so that save --batch uses the same folder
+        parts = [listing.address, listing.district, listing.city]
+        address = ", ".join(part for part in parts if part) or None
+        return (address, urls)
+
+    def _get_session_expiry(self, session: dict[str, str]) -> float:
+        # Tokens are considered valid for a fixed time after the page was loaded
+        try:
+            loaded = float(session["OTA-loaded"])
+        except (KeyError, ValueError):
+            loaded = time.time()
+        return loaded + self.SESSION_MAX_AGE
+
     def _get_unseen_listings(
-        self, url: str, listings_file: Optional[Path]
-    ) -> tuple[list[str], list[dict[str, Any]]]:
-        session = self._initialize_session()
-        response = HttpUtils.get_with_retry(url, headers=session)
-        listings = response.json()["cards"]
-        seen_listings = self._read_listings_file(listings_file)
-        return self._filter_unseen_listings(listings, seen_listings)
+        self,
+        url: str,
+        listings_file: Optional[Path],
+        pages: int = 1,
+        prefetch: bool = False,
+    ) -> tuple[list[str], list[Listing]]:
+        with metrics.timed("seen_file"):
+            seen_listings = self._read_listings_file(listings_file)
+        listings = self._fetch_listings(url, seen_listings, pages, prefetch)
+        with metrics.timed("filter"):
+            return self._filter_unseen_listings(listings, seen_listings)
+
+    def _initialize_session(
+        self, rejected: Optional[dict[str, str]] = None
+    ) -> dict[str, str]:
+        with self._session_lock:
+            if self._session is None:
+                self._session = self._read_session_file()
+
+            # Another thread may have replaced rejected tokens in the meantime
+            session = self._session
+            if session is not None and session is not rejected:
+                if self._get_session_expiry(session) > time.time():
+                    return session
+
+            # The tags are in the head section, so the response is parsed as it
+            # arrives and the connection is closed without reading the whole page
+            with metrics.timed("session"):
+                with HttpUtils.get_with_retry(
+                    self.OIKOTIE_ASUNNOT_WEB_URL, stream=True
+                ) as response:
+                    response.encoding = response.encoding or "utf-8"
+                    chunks = response.iter_content(chunk_size=8192, decode_unicode=True)
+                    self._session = self._extract_session_headers(chunks)
+            self._write_session_file(self._session)
+            return self._session
+
+    def _open_listings_file(self, listings_file: Path) -> SeenListingsJournal:
+        legacy_file = listings_file.with_name(self.LEGACY_LISTINGS_FILE)
+        return SeenListingsJournal(listings_file, legacy_file)
 
-    def _initialize_session(self) -> dict[str, str]:
-        response = HttpUtils.get_with_retry(self.OIKOTIE_ASUNNOT_WEB_URL)
-        return self._extract_session_headers(response.text)
+    def _open_outbox(self, check_dir: Path) -> SlackOutbox:
+        return SlackOutbox(check_dir / self.OUTBOX_DIR)
 
-    def _output_image_path_to_console(self, path: Path) -> None:
-        print(f"Saved file: {path}")
+    def _output_image_path_to_console(self, path: Path, saved: bool = True) -> None:
+        with self._output_lock:
+            print(f"{'Saved' if saved else 'Unchanged'} file: {path}")
 
-    def _output_listings_to_console(self, listings: list[dict[str, Any]]) -> None:
+    def _output_listings_to_console(self, listings: list[FormattedListing]) -> None:
         for listing in listings:
             message = self._create_console_message(listing)
             print(message)
 
+    def _output_save_results_to_console(
+        self, results: list[SaveResult], duration: float, quiet: bool = False
+    ) -> None:
+        for result in results:
+            if result.error is not None:
+                print(
+                    f"Failed in {result.duration:.1f} s: {result.url}: {result.error}",
+                    file=sys.stderr,
+                )
+            elif not quiet:
+                print(
+                    f"Saved {result.images} images in {result.duration:.1f} s: "
+                    f"{result.url}"
+                )
+
+        if not quiet:
+            saved = sum(1 for result in results if result.error is None)
+            print(f"Saved {saved} of {len(results)} listings in {duration:.1f} s")
+
     def _ping_health_services(
         self,
         healthchecks_url: Optional[str],
         uptime_url: Optional[str],
         failure: bool = False,
+        duration: Optional[float] = None,
+        new_listings: Optional[int] = None,
+        error: Optional[BaseException] = None,
     ) -> None:
+        pings = []
         if healthchecks_url:
-            try:
-                self._ping_healthchecks_io(healthchecks_url, failure=failure)
-            except Exception:
-                pass
-
+            pings.append((self._ping_healthchecks_io, healthchecks_url))
         if uptime_url:
+            pings.append((self._ping_uptime_kuma, uptime_url))
+
+        def run(ping: Callable[..., None], url: str) -> None:
             try:
-                self._ping_uptime_kuma(uptime_url, failure=failure)
+                ping(url, failure, duration, new_listings, error)
             except Exception:
                 pass
 
-    def _ping_healthchecks_io(self, url: str, failure: bool = False) -> None:
+        # Pings run on daemon threads, so an unresponsive monitoring service
+        # cannot delay the run past the deadline or keep the process alive
+        threads = [
+            threading.Thread(target=metrics.wrap(run), args=ping, daemon=True)
+            for ping in pings
+        ]
+        for thread in threads:
+            thread.start()
+
+        with metrics.timed("health"):
+            deadline = time.monotonic() + self.HEALTH_PING_DEADLINE
+            for thread in threads:
+                thread.join(max(deadline - time.monotonic(), 0))
+
+    def _ping_healthchecks_io(
+        self,
+        url: str,
+        failure: bool = False,
+        duration: Optional[float] = None,
+        new_listings: Optional[int] = None,
+        error: Optional[BaseException] = None,
+    ) -> None:
         url = f"{url}/fail" if failure else url
-        HttpUtils.get_with_retry(url)
+        data: dict[str, Any] = {}
+        if duration is not None:
+            data["duration"] = round(duration, 3)
+        if new_listings is not None:
+            data["new_listings"] = new_listings
+        if error is not None:
+            data["error"] = str(error) or type(error).__name__
+        HttpUtils.post_with_retry(
+            url,
+            data=json.dumps(data),
+            headers={"Content-Type": "application/json"},
+            policy=HttpUtils.HEALTH_POLICY,
+        )
 
-    def _ping_uptime_kuma(self, url: str, failure: bool = False) -> None:
+    def _ping_uptime_kuma(
+        self,
+        url: str,
+        failure: bool = False,
+        duration: Optional[float] = None,
+        new_listings: Optional[int] = None,
+        error: Optional[BaseException] = None,
+    ) -> None:
         scheme, netloc, path, query, fragment = urlsplit(url)
-        query = urlencode([("status", "up" if not failure else "down")])
-        url = urlunsplit((scheme, netloc, path, query, None))
-        HttpUtils.get_with_retry(url)
+        params = [("status", "up" if not failure else "down")]
+        if error is not None:
+            params.append(("msg", str(error) or type(error).__name__))
+        elif new_listings is not None:
+            params.append(("msg", f"{new_listings} new listings"))
+        if duration is not None:
+            params.append(("ping", str(round(duration * 1000))))
+        url = urlunsplit((scheme, netloc, path, urlencode(params), None))
+        HttpUtils.get_with_retry(url, policy=HttpUtils.HEALTH_POLICY)
 
-    def _post_listings_to_slack(self, listings: list[dict[str, Any]], url: str) -> None:
+    def _post_slack_message(
+        self, url: str, payload: str, deadline: Optional[float] = None
+    ) -> None:
         headers = {"Content-Type": "application/json"}
-        for listing in listings:
-            message = self._create_slack_message(listing)
-            HttpUtils.post_with_retry(url, data=json.dumps(message), headers=headers)
+        HttpUtils.post_with_retry(
+            url,
+            data=payload,
+            headers=headers,
+            policy=HttpUtils.SLACK_POLICY,
+            deadline=deadline,
+        )
+        metrics.count("slack_messages")
 
     def _prepare_api_url(self, url: str, limit: int = 10) -> str:
         scheme, netloc, path, query, fragment = urlsplit(url)
@@ -217,6 +597,40 @@ class Oikotool:
             (scheme, netloc, self.OIKOTIE_API_PATH, urlencode(params), fragment)
         )
 
+    def _prepare_api_page_url(self, url: str, page: int) -> str:
+        scheme, netloc, path, query, fragment = urlsplit(url)
+        params = [
+            (k, str(page) if k == "pagination" else v) for k, v in parse_qsl(query)
+        ]
+        return urlunsplit((scheme, netloc, path, urlencode(params), fragment))
+
+    def _prepare_download_headers(
+        self, base_dir: Path, entry: dict[str, Any]
+    ) -> tuple[dict[str, str], int]:
+        headers: dict[str, str] = {}
+        if not entry.get("file"):
+            return headers, 0
+
+        output = base_dir / entry["file"]
+        partial = output.with_name(f"{output.name}.part")
+        etag = entry.get("etag")
+        last_modified = entry.get("last_modified")
+
+        if entry.get("sha256") and output.exists():
+            if output.stat().st_size == entry.get("size"):
+                if etag:
+                    headers["If-None-Match"] = etag
+                if last_modified:
+                    headers["If-Modified-Since"] = last_modified
+        elif (etag or last_modified) and partial.exists():
+            offset = partial.stat().st_size
+            if offset:
+                headers["Range"] = f"bytes={offset}-"
+                headers["If-Range"] = str(etag or last_modified)
+                return headers, offset
+
+        return headers, 0
+
     def _prepare_listing_images_url(self, url: str) -> str:
         scheme, netloc, path, query, fragment = urlsplit(url)
 
@@ -237,33 +651,172 @@ class Oikotool:
 
         return urlunsplit((scheme, netloc, path, None, None))
 
-    def _read_listings_file(self, listings_file: Optional[Path]) -> list[str]:
-        seen_listings = set()
-        if listings_file and listings_file.exists():
-            with listings_file.open("r") as f:
-                seen_listings = set(f.read().splitlines())
-        return list(seen_listings)
+    def _queue_listings_to_slack(
+        self,
+        listings: list[FormattedListing],
+        url: str,
+        outbox: SlackOutbox,
+        batch: int = 1,
+        template: Optional[SlackTemplate] = None,
+    ) -> None:
+        # Listings already waiting in or delivered from the outbox are left out,
+        # so a run repeated after a crash does not post them again
+        known = outbox.read_known_ids()
+        pending = [s for s in listings if str(s.id) not in known]
+        outbox.enqueue(url, self._create_slack_batches(pending, batch, template))
+
+    def _read_listings_file(self, listings_file: Optional[Path]) -> SeenListings:
+        if not listings_file:
+            return SeenListings()
+        return self._open_listings_file(listings_file).read()
+
+    def _read_manifest_file(self, base_dir: Path) -> dict[str, dict[str, Any]]:
+        try:
+            with (base_dir / self.MANIFEST_FILE).open("r") as f:
+                images = json.load(f)["images"]
+            return {str(k): dict(v) for k, v in images.items()}
+        except (OSError, ValueError, KeyError, TypeError, AttributeError):
+            return {}
+
+    def _read_session_file(self) -> Optional[dict[str, str]]:
+        if not self._cache_dir:
+            return None
+
+        session_file = self._cache_dir / self.SESSION_FILE
+        try:
+            with session_file.open("r") as f:
+                data = json.load(f)
+            if float(data["expires"]) > time.time():
+                return {str(k): str(v) for k, v in data["headers"].items()}
+        except (OSError, ValueError, KeyError, TypeError, AttributeError):
+            pass
+
+        return None
+
+    @contextmanager
+    def _record_run(
+        self, command: str, name: Optional[str] = None
+    ) -> Iterator[Optional[RunMetrics]]:
+        if self._metrics_dir is None:
+            yield None
+            return
+
+        run = RunMetrics(command, name)
+        with metrics.activate(run):
+            try:
+                yield run
+            except BaseException as e:
+                run.finish(e)
+                raise
+            else:
+                run.finish()
+            finally:
+                self._write_metrics_files(run)
 
     def _refresh_recent_listings(
-        self, seen: list[str], new: list[str], limit: int = 10
+        self, seen: Iterable[str], new: list[str], limit: int = 10
     ) -> list[str]:
-        for item in new:
-            if item and item not in seen:
-                seen.append(item)
-        return seen[-limit:]
+        recent = seen if isinstance(seen, SeenListings) else SeenListings(seen)
+        recent.update(new)
+        return recent.recent(limit)
+
+    def _save_listing(
+        self,
+        url: str,
+        base_dir: Path,
+        executor: Executor,
+        batch: bool = False,
+        quiet: bool = False,
+        listing: Optional[Listing] = None,
+    ) -> int:
+        with metrics.timed("listing_details"):
+            details = self._get_listing_details_from_card(listing) if listing else None
+            if details is None or (batch and not details[0]):
+                details = self._get_listing_details(url)
+        address, images = details
+
+        if batch:
+            if not address:
+                raise OikotieAddressException("Failed to extract listing address")
+            base_dir = base_dir / address / "Kuvat"
+
+        base_dir.mkdir(parents=True, exist_ok=True)
+        manifest = self._read_manifest_file(base_dir)
+        download = metrics.wrap(self._download_image)
+        futures = [
+            executor.submit(download, image, base_dir, manifest) for image in images
+        ]
+
+        try:
+            # Results are collected in the original order regardless of which
+            # download finishes first, which keeps the console output stable
+            for future in futures:
+                output, saved = future.result()
+                if not quiet:
+                    self._output_image_path_to_console(output, saved)
+        finally:
+            for future in futures:
+                future.cancel()
+            for future in futures:
+                if not future.cancelled():
+                    future.exception()
+            self._write_manifest_file(base_dir, manifest)
+
+        return len(images)
+
+    def _save_listing_timed(
+        self, url: str, base_dir: Path, executor: Executor, quiet: bool = False
+    ) -> SaveResult:
+        start = time.monotonic()
+        try:
+            images = self._save_listing(url, base_dir, executor, True, quiet)
+        except Exception as e:
+            return SaveResult(url, time.monotonic() - start, error=e)
+        return SaveResult(url, time.monotonic() - start, images)
 
     def _update_listings_file(
         self, listings_file: Path, new_ids: list[str], limit: int = 10
     ) -> None:
-        seen_listings = []
-        if listings_file.exists():
-            with listings_file.open("r") as f:
-                seen_listings = f.read().splitlines()
+        self._open_listings_file(listings_file).append(new_ids, limit)
 
-        seen_listings = self._refresh_recent_listings(seen_listings, new_ids, limit)
+    def _write_manifest_file(
+        self, base_dir: Path, manifest: dict[str, dict[str, Any]]
+    ) -> None:
+        data = {"version": 1, "images": manifest}
+        FileUtils.write_atomic(
+            base_dir / self.MANIFEST_FILE, json.dumps(data, indent=2)
+        )
 
-        with listings_file.open("w") as f:
-            f.write("\n".join(seen_listings))
+    def _write_metrics_files(self, run: RunMetrics) -> None:
+        if self._metrics_dir is None:
+            return
+
+        name = f"{run.command}-{run.name}" if run.name else run.command
+        prom_file = self._metrics_dir / f"{re.sub(r'[^0-9A-Za-z_.-]', '_', name)}.prom"
+
+        # Metrics are best effort and never fail the run they describe
+        try:
+            self._metrics_dir.mkdir(parents=True, exist_ok=True)
+            with self._output_lock:
+                with (self._metrics_dir / self.METRICS_FILE).open("a") as f:
+                    f.write(f"{run.to_json()}\n")
+            FileUtils.write_atomic(prom_file, run.to_prometheus())
+        except OSError as e:
+            print(f"Failed to write metrics: {e}", file=sys.stderr)
+
+    def _write_session_file(self, session: dict[str, str]) -> None:
+        if not self._cache_dir:
+            return
+
+        data = {"expires": self._get_session_expiry(session), "headers": session}
+
+        try:
+            self._cache_dir.mkdir(parents=True, exist_ok=True)
+            FileUtils.write_atomic(
+                self._cache_dir / self.SESSION_FILE, json.dumps(data)
+            )
+        except OSError:
+            pass
 
     def check(
         self,
@@ -274,33 +827,151 @@ class Oikotool:
         slack_url: Optional[str] = None,
         healthchecks_url: Optional[str] = None,
         uptime_url: Optional[str] = None,
+        archive_dir: Optional[Path] = None,
+        pages: int = 1,
+        prefetch: bool = False,
+        slack_batch: int = 1,
+        slack_budget: Optional[float] = SLACK_BUDGET,
+        slack_template: Optional[SlackTemplate] = None,
         quiet: bool = False,
     ) -> None:
-        try:
-            check_dir = cache_dir / name
-            check_dir.mkdir(parents=True, exist_ok=True)
-            listings_file = check_dir / self.LISTINGS_FILE
+        start = time.monotonic()
+        with self._record_run("check", name):
+            try:
+                check_dir = cache_dir / name
+                check_dir.mkdir(parents=True, exist_ok=True)
+                listings_file = check_dir / self.LISTINGS_FILE
+                outbox = self._open_outbox(check_dir)
 
-            url = self._prepare_api_url(url, limit)
-            unseen_ids, unseen_listings = self._get_unseen_listings(url, listings_file)
+                url = self._prepare_api_url(url, limit)
+                unseen_ids, unseen_listings = self._get_unseen_listings(
+                    url, listings_file, pages, prefetch
+                )
+                metrics.count("new_listings", len(unseen_ids))
 
-            if slack_url:
-                self._post_listings_to_slack(unseen_listings, slack_url)
-            if not quiet:
-                self._output_listings_to_console(unseen_listings)
+                # Listings are formatted once for both the Slack and console output
+                formatted: list[FormattedListing] = []
+                if slack_url or not quiet:
+                    with metrics.timed("format"):
+                        formatted = self._format_listings(unseen_listings)
+                if slack_url:
+                    with metrics.timed("slack"):
+                        self._queue_listings_to_slack(
+                            formatted, slack_url, outbox, slack_batch, slack_template
+                        )
+                if not quiet:
+                    with metrics.timed("console"):
+                        self._output_listings_to_console(formatted)
 
-            self._update_listings_file(listings_file, unseen_ids, limit)
-            self._ping_health_services(healthchecks_url, uptime_url)
+                # Queued messages survive a failed delivery, so the listings can
+                # be marked as seen before Slack has accepted them
+                with metrics.timed("seen_file"):
+                    self._update_listings_file(listings_file, unseen_ids, limit)
+                if archive_dir:
+                    with metrics.timed("archive"):
+                        self._archive_listings(unseen_listings, archive_dir, quiet)
+                with metrics.timed("slack"):
+                    outbox.drain(self._post_slack_message, slack_budget)
+                pending = outbox.pending()
+                if pending:
+                    print(
+                        f"Slack budget ran out, {pending} message(s) of '{name}' "
+                        "left queued for the next run",
+                        file=sys.stderr,
+                    )
+                self._ping_health_services(
+                    healthchecks_url,
+                    uptime_url,
+                    duration=time.monotonic() - start,
+                    new_listings=len(unseen_ids),
+                )
 
-        except Exception:
-            self._ping_health_services(healthchecks_url, uptime_url, failure=True)
-            raise
+            except Exception as e:
+                self._ping_health_services(
+                    healthchecks_url,
+                    uptime_url,
+                    failure=True,
+                    duration=time.monotonic() - start,
+                    error=e,
+                )
+                raise
+
+    def check_all(
+        self,
+        queries: list[QueryConfig],
+        cache_dir: Path,
+        jobs: int = CHECK_JOBS,
+        quiet: bool = False,
+    ) -> list[str]:
+        def run(query: QueryConfig) -> Optional[Exception]:
+            try:
+                self.check_query(query, cache_dir, quiet)
+            except Exception as e:
+                return e
+            return None
+
+        # Session tokens are fetched once under a lock and shared by all checks
+        with ThreadPoolExecutor(max_workers=jobs) as executor:
+            errors = list(executor.map(run, queries))
+
+        failed = []
+        for query, error in zip(queries, errors):
+            if error is not None:
+                print(f"Check '{query.name}' failed: {error}", file=sys.stderr)
+                failed.append(query.name)
+        return failed
+
+    def check_query(
+        self, query: QueryConfig, cache_dir: Path, quiet: bool = False
+    ) -> None:
+        self.check(
+            url=query.url,
+            name=query.name,
+            limit=query.limit,
+            cache_dir=cache_dir,
+            slack_url=query.slack_url,
+            healthchecks_url=query.healthchecks_url,
+            uptime_url=query.uptime_url,
+            archive_dir=query.archive_dir,
+            pages=query.pages,
+            prefetch=query.prefetch,
+            slack_batch=query.slack_batch,
+            slack_budget=query.slack_budget,
+            slack_template=query.slack_template,
+            quiet=quiet,
+        )
+
+    def drain(
+        self,
+        cache_dir: Path,
+        names: Optional[list[str]] = None,
+        budget: Optional[float] = None,
+        quiet: bool = False,
+    ) -> int:
+        if names is None:
+            check_dirs = sorted(
+                p.parent for p in cache_dir.glob(f"*/{self.OUTBOX_DIR}")
+            )
+        else:
+            check_dirs = [cache_dir / name for name in names]
+
+        pending = 0
+        for check_dir in check_dirs:
+            outbox = self._open_outbox(check_dir)
+            try:
+                delivered = outbox.drain(self._post_slack_message, budget)
+            finally:
+                pending += outbox.pending()
+            if not quiet and delivered:
+                print(f"Delivered {delivered} message(s) for '{check_dir.name}'")
+        return pending
 
     def dump(self, url: str, limit: int) -> None:
-        session = self._initialize_session()
         url = self._prepare_api_url(url, limit)
-        response = HttpUtils.get_with_retry(url, headers=session)
-        print(json.dumps(response.json()))
+        print(json.dumps(self._fetch_api_data(url)))
+
+    def load_slack_template(self, path: Path) -> SlackTemplate:
+        return SlackTemplate.load(path, self._translations)
 
     def save(
         self,
@@ -308,33 +979,47 @@ class Oikotool:
         base_dir: Path,
         batch: bool = False,
         quiet: bool = False,
+        jobs: int = DOWNLOAD_JOBS,
     ) -> None:
-        address, images = self._get_listing_details(url)
+        HttpUtils.set_pool_size(self.OIKOTIE_ASUNNOT_CDN_URL, jobs)
+        with self._record_run("save"):
+            with ThreadPoolExecutor(max_workers=jobs) as executor:
+                self._save_listing(url, base_dir, executor, batch, quiet)
 
-        if batch:
-            if not address:
-                raise OikotieAddressException("Failed to extract listing address")
-            base_dir = base_dir / address / "Kuvat"
-
-        base_dir.mkdir(parents=True, exist_ok=True)
-
-        for url in images:
-            with HttpUtils.get_with_retry(url, stream=True) as response:
-                ctype = str(response.headers.get("Content-Type"))
-                bname = url.split("/")[-1]
-                ext = ctype.split("/")[-1]
-                output = base_dir / f"{bname}.{ext}"
+    def save_many(
+        self,
+        urls: list[str],
+        base_dir: Path,
+        quiet: bool = False,
+        jobs: int = DOWNLOAD_JOBS,
+        listing_jobs: int = SAVE_LISTING_JOBS,
+    ) -> list[SaveResult]:
+        start = time.monotonic()
+        HttpUtils.set_pool_size(self.OIKOTIE_ASUNNOT_CDN_URL, jobs)
 
-                with output.open("wb") as f:
-                    response.raw.decode_content = True
-                    shutil.copyfileobj(response.raw, f)
+        # All listings share one image pool, which caps the number of image
+        # downloads in flight regardless of how many listings run at once
+        with self._record_run("save"):
+            with ThreadPoolExecutor(max_workers=jobs) as image_executor:
+                with ThreadPoolExecutor(max_workers=listing_jobs) as listing_executor:
+                    results = list(
+                        listing_executor.map(
+                            metrics.wrap(
+                                lambda url: self._save_listing_timed(
+                                    url, base_dir, image_executor, quiet
+                                )
+                            ),
+                            urls,
+                        )
+                    )
+            metrics.count("listings_saved", sum(r.error is None for r in results))
+            metrics.count("listings_failed", sum(r.error is not None for r in results))
 
-                    if not quiet:
-                        self._output_image_path_to_console(output)
+        self._output_save_results_to_console(results, time.monotonic() - start, quiet)
+        return results
 
     def slack(self, url: str, limit: int) -> None:
         url = self._prepare_api_url(url, limit)
         _, listings = self._get_unseen_listings(url, None)
-        for listing in listings:
-            message = self._create_slack_message(listing)
-            print(json.dumps(message))
+        for listing in self._format_listings(listings):
+            print(SlackTemplate.compose([self._slack_template.render(listing)]))
@@ -11,3 +11,15 @@ class OikotieSessionError(Exception):
 
 class OikotieUrlError(Exception):
     pass
+
+
+class OikotoolCircuitOpenError(Exception):
+    pass
+
+
+class OikotoolConfigError(Exception):
+    pass
+
+
+class OikotoolDeadlineError(Exception):
+    pass
@@ -0,0 +1,278 @@
+# SPDX-License-Identifier: MIT
+
+import hashlib
+import json
+import random
+import re
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Any, NamedTuple, Optional
+from urllib.parse import parse_qsl, urlsplit
+
+
+class FakeServerConfig(NamedTuple):
+    listings: int = 1000
+    images: int = 5
+    image_size: int = 64 * 1024
+    publish_rate: float = 0
+    latency: float = 0
+    error_rate: float = 0
+    rate_limit_rate: float = 0
+    retry_after: int = 1
+    seed: Optional[int] = None
+
+
+class FakeOikotieServer:
+    """
+    A local stand-in for Oikotie, its image CDN, Slack and health monitoring
+    services, for end-to-end and load testing without the real site.
+
+    The server serves the homepage with session meta tags, paginated search
+    results under /api/search, listing image pages, CDN images under /cdn/,
+    and accepts Slack messages under /slack/ and health pings under /health/.
+    New listings are published at publish_rate listings per second on top of
+    the initial ones. Latency, server errors and rate limiting with a
+    Retry-After header are injected into every request according to the
+    configuration, and request counters are served as JSON under /_stats.
+    """
+
+    API_TOKEN: str = "fake-api-token"
+    CARD_ID_BASE: int = 20000000
+    CUID: str = "fake-cuid"
+
+    def __init__(
+        self,
+        host: str = "127.0.0.1",
+        port: int = 0,
+        config: FakeServerConfig = FakeServerConfig(),
+    ) -> None:
+        self.config = config
+        self.slack_messages: list[Any] = []
+        self.health_pings: list[str] = []
+        self._lock = threading.Lock()
+        self._random = random.Random(config.seed)
+        self._started = time.monotonic()
+        self._stats: dict[str, int] = {}
+        self._thread: Optional[threading.Thread] = None
+
+        handler = type("Handler", (_FakeRequestHandler,), {"fake": self})
+        self._server = ThreadingHTTPServer((host, port), handler)
+        self._server.daemon_threads = True
+
+    def __enter__(self) -> "FakeOikotieServer":
+        return self.start()
+
+    def __exit__(self, *args: object) -> None:
+        self.stop()
+
+    def _count(self, key: str) -> None:
+        with self._lock:
+            self._stats[key] = self._stats.get(key, 0) + 1
+
+    def _inject_fault(self) -> Optional[int]:
+        if self.config.latency:
+            time.sleep(self.config.latency)
+        with self._lock:
+            roll = self._random.random()
+        if roll < self.config.rate_limit_rate:
+            return 429
+        if roll < self.config.rate_limit_rate + self.config.error_rate:
+            return 503
+        return None
+
+    def _total_listings(self) -> int:
+        elapsed = time.monotonic() - self._started
+        return self.config.listings + int(elapsed * self.config.publish_rate)
+
+    def create_card(self, card_id: int) -> dict[str, Any]:
+        return {
+            "cardId": card_id,
+            "url": f"{self.url}myytavat-asunnot/helsinki/{card_id}",
+            "data": {
+                "price": f"{100 + card_id % 900} 000 €",
+                "size": f"{20 + card_id % 180} m²",
+            },
+            "location": {
+                "address": f"Testikatu {card_id % 100}",
+                "district": "Kallio",
+                "city": "Helsinki",
+            },
+            "medias": [
+                {"imageLargeJPEG": f"{self.url}cdn/{card_id}/{card_id}-{n}"}
+                for n in range(self.config.images)
+            ],
+        }
+
+    def search(self, limit: int, page: int) -> list[dict[str, Any]]:
+        total = self._total_listings()
+        newest = self.CARD_ID_BASE + total - 1
+        start = (page - 1) * limit
+        return [
+            self.create_card(newest - i)
+            for i in range(start, min(start + limit, total))
+        ]
+
+    def start(self) -> "FakeOikotieServer":
+        self._thread = threading.Thread(target=self._server.serve_forever, daemon=True)
+        self._thread.start()
+        return self
+
+    def stats(self) -> dict[str, int]:
+        with self._lock:
+            return dict(self._stats)
+
+    def stop(self) -> None:
+        self._server.shutdown()
+        self._server.server_close()
+        if self._thread is not None:
+            self._thread.join()
+
+    @property
+    def url(self) -> str:
+        host, port = self._server.server_address[:2]
+        return f"http://{str(host)}:{port}/"
+
+
+class _FakeRequestHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+    body: bytes = b""
+    fake: FakeOikotieServer
+
+    LISTING_IMAGES_PATH = re.compile(r"^/myytavat-asunnot/[^/]+/(\d+)/kuvat$")
+    CDN_IMAGE_PATH = re.compile(r"^/cdn/(\d+)/[\w-]+$")
+
+    def _handle(self, method: str) -> None:
+        # The body is read up front so that a keep-alive connection stays
+        # usable when the request is answered with an injected fault
+        self.body = self._read_body()
+        path = urlsplit(self.path).path
+        if path == "/_stats":
+            return self._send_json(200, self.fake.stats())
+
+        route = self._route(method, path)
+        self.fake._count(f"{route}.requests")
+        fault = self.fake._inject_fault()
+        if fault == 429:
+            self.fake._count(f"{route}.rate_limited")
+            headers = {"Retry-After": str(self.fake.config.retry_after)}
+            return self._send(429, b"Too Many Requests", headers=headers)
+        if fault is not None:
+            self.fake._count(f"{route}.errors")
+            return self._send(fault, b"Service Unavailable")
+
+        handler = getattr(self, f"_handle_{route}", None)
+        if handler is None:
+            return self._send(404, b"Not Found")
+        handler()
+
+    def _handle_api(self) -> None:
+        if self.headers.get("OTA-token") != self.fake.API_TOKEN:
+            return self._send(401, b"Unauthorized")
+
+        params = dict(parse_qsl(urlsplit(self.path).query))
+        limit = int(params.get("limit", "10"))
+        page = int(params.get("pagination", "1"))
+        cards = self.fake.search(limit, page)
+        self._send_json(200, {"cards": cards, "found": len(cards)})
+
+    def _handle_cdn(self) -> None:
+        size = self.fake.config.image_size
+        seed = urlsplit(self.path).path.encode()
+        body = (hashlib.sha256(seed).digest() * (size // 32 + 1))[:size]
+        etag = f'"{hashlib.sha256(seed).hexdigest()[:16]}"'
+
+        if self.headers.get("If-None-Match") == etag:
+            return self._send(304, b"", headers={"ETag": etag})
+
+        status = 200
+        headers = {"Content-Type": "image/jpeg", "ETag": etag}
+        match = re.match(r"bytes=(\d+)-$", self.headers.get("Range", ""))
+        if match and self.headers.get("If-Range") == etag:
+            offset = int(match.group(1))
+            if offset >= size:
+                return self._send(416, b"")
+            status = 206
+            headers["Content-Range"] = f"bytes {offset}-{size - 1}/{size}"
+            body = body[offset:]
+        self._send(status, body, headers=headers)
+
+    def _handle_health(self) -> None:
+        with self.fake._lock:
+            self.fake.health_pings.append(self.path)
+        self._send(200, b"OK")
+
+    def _handle_home(self) -> None:
+        body = (
+            "<!DOCTYPE html><html><head>"
+            f'<meta name="api-token" content="{self.fake.API_TOKEN}" />'
+            f'<meta name="loaded" content="{int(time.time())}" />'
+            f'<meta name="cuid" content="{self.fake.CUID}" />'
+            "</head><body></body></html>"
+        )
+        self._send(200, body.encode(), headers={"Content-Type": "text/html"})
+
+    def _handle_images(self) -> None:
+        match = self.LISTING_IMAGES_PATH.match(urlsplit(self.path).path)
+        card = self.fake.create_card(int(match.group(1)) if match else 0)
+        location = card["location"]
+        links = "".join(
+            f'<a href="{media["imageLargeJPEG"]}">{n}</a>'
+            for n, media in enumerate(card["medias"])
+        )
+        body = (
+            "<!DOCTYPE html><html><head></head><body>"
+            '<h1 class="heading--no-styling"><span class="listing-header__text">'
+            f"{location['address']}, {location['district']}, {location['city']}"
+            f"</span></h1>{links}</body></html>"
+        )
+        self._send(200, body.encode(), headers={"Content-Type": "text/html"})
+
+    def _handle_slack(self) -> None:
+        payload = json.loads(self.body or b"null")
+        with self.fake._lock:
+            self.fake.slack_messages.append(payload)
+        self._send(200, b"ok")
+
+    def _read_body(self) -> bytes:
+        length = int(self.headers.get("Content-Length", "0"))
+        return self.rfile.read(length) if length else b""
+
+    def _route(self, method: str, path: str) -> str:
+        if method == "POST" and path.startswith("/slack/"):
+            return "slack"
+        if path.startswith("/health/"):
+            return "health"
+        if method == "GET" and path == "/":
+            return "home"
+        if method == "GET" and path == "/api/search":
+            return "api"
+        if method == "GET" and self.LISTING_IMAGES_PATH.match(path):
+            return "images"
+        if method == "GET" and self.CDN_IMAGE_PATH.match(path):
+            return "cdn"
+        return "unknown"
+
+    def _send(
+        self, status: int, body: bytes, headers: Optional[dict[str, str]] = None
+    ) -> None:
+        self.send_response(status)
+        for name, value in (headers or {}).items():
+            self.send_header(name, value)
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        if self.command != "HEAD":
+            self.wfile.write(body)
+
+    def _send_json(self, status: int, data: Any) -> None:
+        body = json.dumps(data).encode()
+        self._send(status, body, headers={"Content-Type": "application/json"})
+
+    def do_GET(self) -> None:
+        self._handle("GET")
+
+    def do_POST(self) -> None:
+        self._handle("POST")
+
+    def log_message(self, format: str, *args: object) -> None:
+        pass
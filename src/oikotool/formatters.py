@@ -1,11 +1,22 @@
 # SPDX-License-Identifier: MIT
 
 import re
-from typing import Any, Optional
+from collections.abc import Iterable
+from typing import Any, NamedTuple, Optional, Union
 
+from oikotool.models import Listing
 from oikotool.translations import Translations
 
 
+class FormattedListing(NamedTuple):
+    id: Optional[str]
+    url: str
+    address: str
+    price: str
+    size: str
+    image: str
+
+
 class ListingBaseFormatter:
     """
     A base formatter class for formatting listing data.
@@ -13,60 +24,69 @@ class ListingBaseFormatter:
     This class provides methods to format various attributes of a listing,
     such as address, price, and size. It uses lazy loading for its properties,
     meaning the formatted values are only calculated when first accessed and
-    then cached for subsequent accesses.
+    then cached for subsequent accesses. Raw API cards are accepted as well and
+    projected into a listing record first.
     """
 
-    _listing: dict[str, Any]
+    NON_NUMERIC_PATTERN = re.compile(r"[^\d,]")
+    PLACEHOLDER_IMAGE_URL: str = (
+        "https://asunnot.oikotie.fi/lib/images/placeholder/building/large.jpg"
+    )
+
+    _listing: Listing
     _formatted_address: Optional[str]
     _formatted_price: Optional[str]
     _formatted_size: Optional[str]
     _prepared_image_url: Optional[str]
 
-    def __init__(self, listing: dict[str, Any]) -> None:
+    def __init__(self, listing: Union[Listing, dict[str, Any]]) -> None:
+        if not isinstance(listing, Listing):
+            listing = Listing.from_card(listing)
         self._listing = listing
         self._formatted_address = None
         self._formatted_price = None
         self._formatted_size = None
         self._prepared_image_url = None
 
+    @staticmethod
+    def _format_address_parts(*parts: Optional[str]) -> str:
+        return ", ".join([value.title() for value in parts if value])
+
     def _format_address(self) -> str:
-        location = self._listing["location"]
-        return ", ".join(
-            [
-                value.title()
-                for value in [
-                    location["address"],
-                    location["district"],
-                    location["city"],
-                ]
-                if value
-            ]
+        listing = self._listing
+        return self._format_address_parts(
+            listing.address, listing.district, listing.city
         )
 
     def _format_price(self) -> str:
-        number = re.sub(r"[^\d,]", "", str(self._listing["data"]["price"]))
-        number = number.replace(",", ".")
-        price = float(number) if number else None
+        return self._format_price_value(self._listing.price)
+
+    @classmethod
+    def _format_price_value(cls, value: Optional[str]) -> str:
+        price = cls._parse_number(value)
         if price and price > 0:
             formatted = f"{price:_.0f}".replace("_", " ")
             return f"{formatted} €"
         return ""
 
     def _format_size(self) -> str:
-        number = re.sub(r"[^\d,]", "", str(self._listing["data"]["size"]))
-        number = number.replace(",", ".")
-        size = float(number) if number else None
+        return self._format_size_value(self._listing.size)
+
+    @classmethod
+    def _format_size_value(cls, value: Optional[str]) -> str:
+        size = cls._parse_number(value)
         if size and size > 0:
             formatted = f"{size:.1f}" if size % 1 else f"{size:.0f}"
             return f"{formatted} m²"
         return ""
 
+    @classmethod
+    def _parse_number(cls, value: Optional[str]) -> Optional[float]:
+        number = cls.NON_NUMERIC_PATTERN.sub("", value or "").replace(",", ".")
+        return float(number) if number else None
+
     def _prepare_image_url(self) -> str:
-        medias = self._listing["medias"]
-        image = medias[0]["imageLargeJPEG"] if len(medias) > 0 else None
-        if image and isinstance(image, str):
-            return str(image)
-        return "https://asunnot.oikotie.fi/lib/images/placeholder/building/large.jpg"
+        return self._listing.image or self.PLACEHOLDER_IMAGE_URL
 
     @property
     def address(self) -> str:
@@ -114,7 +134,9 @@ class ListingSlackFormatter(ListingBaseFormatter):
     needs, the necessary methods are overridden in this class.
     """
 
-    def __init__(self, listing: dict[str, Any], translations: Translations) -> None:
+    def __init__(
+        self, listing: Union[Listing, dict[str, Any]], translations: Translations
+    ) -> None:
         super().__init__(listing)
         self._translations = translations
 
@@ -125,3 +147,53 @@ class ListingSlackFormatter(ListingBaseFormatter):
     @property
     def size(self) -> str:
         return super().size or self._translations.empty_field
+
+
+class ListingBatchFormatter:
+    """
+    A formatter class for formatting many listings in one pass.
+
+    Each listing is formatted once into a FormattedListing that the console
+    and Slack outputs share, with the same results as ListingBaseFormatter.
+    Prices and sizes repeat a lot between listings, so the formatted value of
+    each raw value is remembered for the lifetime of the formatter. Raw API
+    cards are accepted as well and projected into a listing record first.
+    """
+
+    def __init__(self) -> None:
+        self._prices: dict[Optional[str], str] = {}
+        self._sizes: dict[Optional[str], str] = {}
+
+    def format(
+        self, listings: Iterable[Union[Listing, dict[str, Any]]]
+    ) -> list[FormattedListing]:
+        base = ListingBaseFormatter
+        prices = self._prices
+        sizes = self._sizes
+        formatted = []
+
+        for listing in listings:
+            if not isinstance(listing, Listing):
+                listing = Listing.from_card(listing)
+
+            price = prices.get(listing.price)
+            if price is None:
+                price = prices[listing.price] = base._format_price_value(listing.price)
+            size = sizes.get(listing.size)
+            if size is None:
+                size = sizes[listing.size] = base._format_size_value(listing.size)
+
+            formatted.append(
+                FormattedListing(
+                    listing.id,
+                    listing.url,
+                    base._format_address_parts(
+                        listing.address, listing.district, listing.city
+                    ),
+                    price,
+                    size,
+                    listing.image or base.PLACEHOLDER_IMAGE_URL,
+                )
+            )
+
+        return formatted
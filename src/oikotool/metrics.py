@@ -0,0 +1,154 @@
+# SPDX-License-Identifier: MIT
+
+import json
+import threading
+import time
+from collections.abc import Iterator
+from contextlib import contextmanager, nullcontext
+from typing import Any, Callable, ContextManager, Optional, TypeVar
+
+T = TypeVar("T")
+
+_local = threading.local()
+
+
+class RunMetrics:
+    """
+    Phase timings and counters collected during one run of a command.
+
+    A run is made current for a thread with activate, after which the module
+    level count and timed helpers record into it; without a current run they
+    do nothing. Work handed to other threads is recorded into the same run
+    when the callable is wrapped with wrap before it is submitted. Phases may
+    be entered from several threads at once, in which case their times add
+    up, so the phase times of a parallel run can exceed its duration.
+    """
+
+    def __init__(self, command: str, name: Optional[str] = None) -> None:
+        self.command = command
+        self.name = name
+        self.counters: dict[str, float] = {}
+        self.duration: Optional[float] = None
+        self.error: Optional[str] = None
+        self.phases: dict[str, float] = {}
+        self.started = time.time()
+        self._lock = threading.Lock()
+        self._start = time.monotonic()
+
+    def _labels(self, **extra: str) -> str:
+        labels = {"command": self.command, **({"name": self.name} if self.name else {})}
+        labels.update(extra)
+        escaped = (
+            (k, v.replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n"))
+            for k, v in labels.items()
+        )
+        return ",".join(f'{k}="{v}"' for k, v in escaped)
+
+    def add(self, counter: str, value: float = 1) -> None:
+        with self._lock:
+            self.counters[counter] = self.counters.get(counter, 0) + value
+
+    def add_time(self, phase: str, seconds: float) -> None:
+        with self._lock:
+            self.phases[phase] = self.phases.get(phase, 0) + seconds
+
+    def finish(self, error: Optional[BaseException] = None) -> None:
+        self.duration = time.monotonic() - self._start
+        if error is not None:
+            self.error = str(error) or type(error).__name__
+
+    def to_json(self) -> str:
+        data: dict[str, Any] = {
+            "command": self.command,
+            "name": self.name,
+            "started": round(self.started, 3),
+            "duration": round(self.duration or 0, 6),
+            "success": self.error is None,
+            "error": self.error,
+            "phases": {k: round(v, 6) for k, v in sorted(self.phases.items())},
+            "counters": dict(sorted(self.counters.items())),
+        }
+        return json.dumps(data)
+
+    def to_prometheus(self) -> str:
+        lines = []
+
+        def gauge(metric: str, help: str, samples: list[tuple[str, float]]) -> None:
+            lines.append(f"# HELP oikotool_{metric} {help}")
+            lines.append(f"# TYPE oikotool_{metric} gauge")
+            lines.extend(f"oikotool_{metric}{{{s}}} {v:g}" for s, v in samples)
+
+        labels = self._labels()
+        gauge(
+            "run_timestamp_seconds", "Start of the last run.", [(labels, self.started)]
+        )
+        gauge(
+            "run_duration_seconds",
+            "Duration of the last run.",
+            [(labels, self.duration or 0)],
+        )
+        gauge(
+            "run_success",
+            "Whether the last run succeeded.",
+            [(labels, 1 if self.error is None else 0)],
+        )
+        if self.phases:
+            gauge(
+                "phase_duration_seconds",
+                "Time spent in each phase of the last run.",
+                [(self._labels(phase=k), v) for k, v in sorted(self.phases.items())],
+            )
+        for counter, value in sorted(self.counters.items()):
+            gauge(
+                counter,
+                f"Total {counter.replace('_', ' ')} in the last run.",
+                [(labels, value)],
+            )
+
+        return "\n".join(lines) + "\n"
+
+
+@contextmanager
+def _timed(run: RunMetrics, phase: str) -> Iterator[None]:
+    start = time.monotonic()
+    try:
+        yield
+    finally:
+        run.add_time(phase, time.monotonic() - start)
+
+
+@contextmanager
+def activate(run: Optional[RunMetrics]) -> Iterator[Optional[RunMetrics]]:
+    previous = getattr(_local, "run", None)
+    _local.run = run
+    try:
+        yield run
+    finally:
+        _local.run = previous
+
+
+def count(counter: str, value: float = 1) -> None:
+    run = current()
+    if run is not None:
+        run.add(counter, value)
+
+
+def current() -> Optional[RunMetrics]:
+    return getattr(_local, "run", None)
+
+
+def timed(phase: str) -> ContextManager[None]:
+    run = current()
+    return _timed(run, phase) if run is not None else nullcontext()
+
+
+def wrap(func: Callable[..., T]) -> Callable[..., T]:
+    run = current()
+    if run is None:
+        return func
+
+    def wrapper(*args: Any, **kwargs: Any) -> T:
+        with activate(run):
+            return func(*args, **kwargs)
+
+    return wrapper
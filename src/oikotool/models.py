@@ -0,0 +1,66 @@
+# SPDX-License-Identifier: MIT
+
+from typing import Any, NamedTuple, Optional
+
+
+class Listing(NamedTuple):
+    """
+    A compact record of a listing, projected from an Oikotie API card.
+
+    Only the fields used for filtering and output are kept, so the full card
+    with its nested data, location and media dicts can be released as soon as
+    a page of results has been read. The projection is tolerant: a card with
+    missing or malformed fields results in None or empty values instead of an
+    error, and only image URLs that are strings are kept.
+    """
+
+    id: Optional[str]
+    url: str
+    address: Optional[str]
+    district: Optional[str]
+    city: Optional[str]
+    price: Optional[str]
+    size: Optional[str]
+    images: tuple[str, ...]
+    published: Optional[str]
+
+    @classmethod
+    def from_card(cls, card: Any) -> "Listing":
+        card = card if isinstance(card, dict) else {}
+        data = card.get("data") if isinstance(card.get("data"), dict) else {}
+        location = card.get("location")
+        location = location if isinstance(location, dict) else {}
+        meta = card.get("meta") if isinstance(card.get("meta"), dict) else {}
+        medias = card.get("medias")
+
+        card_id = card.get("cardId")
+        images = tuple(
+            image
+            for media in (medias if isinstance(medias, list) else [])
+            if isinstance(media, dict)
+            and isinstance(image := media.get("imageLargeJPEG"), str)
+        )
+
+        return cls(
+            id=str(card_id) if card_id is not None else None,
+            url=_text(card.get("url")) or "",
+            address=_text(location.get("address")),
+            district=_text(location.get("district")),
+            city=_text(location.get("city")),
+            price=_text(data.get("price")),
+            size=_text(data.get("size")),
+            images=images,
+            published=_text(card.get("published") or meta.get("published")),
+        )
+
+    @property
+    def image(self) -> Optional[str]:
+        return self.images[0] if self.images else None
+
+
+def _text(value: Any) -> Optional[str]:
+    if isinstance(value, str):
+        return value
+    if isinstance(value, (int, float)) and not isinstance(value, bool):
+        return str(value)
+    return None
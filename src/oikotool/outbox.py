@@ -0,0 +1,132 @@
+# SPDX-License-Identifier: MIT
+
+import json
+import os
+import sys
+import time
+from pathlib import Path
+from typing import Callable, NamedTuple, Optional
+
+from oikotool import metrics
+from oikotool.cache import FileLock
+from oikotool.exceptions import OikotoolDeadlineError
+from oikotool.seen import SeenListings, SeenListingsJournal
+from oikotool.utils import FileUtils, HttpUtils
+
+
+class OutboxMessage(NamedTuple):
+    path: Path
+    url: str
+    ids: list[str]
+    payload: str
+
+
+class SlackOutbox:
+    """
+    A persistent queue of rendered Slack messages waiting for delivery.
+
+    Every message is stored in its own file together with the webhook address
+    and the IDs of the listings it contains, and the file names sort in the
+    order the messages were queued. Delivery is at-least-once: a message is
+    removed only after Slack has accepted it. The IDs of delivered listings
+    are kept in a journal, so a listing that is queued again, for example
+    after a crash, is recognized and not sent twice. A message that Slack
+    rejects for good, such as one with invalid blocks or for a revoked
+    webhook, is moved to the failed folder so that it does not hold back the
+    messages queued after it.
+    """
+
+    DELIVERED_FILE: str = "delivered.log"
+    DELIVERED_LIMIT: int = 1000
+    FAILED_DIR: str = "failed"
+    LOCK_FILE: str = ".lock"
+
+    def __init__(self, outbox_dir: Path) -> None:
+        self._outbox_dir = outbox_dir
+        self._delivered = SeenListingsJournal(outbox_dir / self.DELIVERED_FILE)
+
+    def _move_to_failed(self, message: OutboxMessage, error: Exception) -> None:
+        failed_dir = self._outbox_dir / self.FAILED_DIR
+        failed_dir.mkdir(exist_ok=True)
+        path = failed_dir / message.path.name
+        os.replace(message.path, path)
+        metrics.count("slack_rejected")
+        print(f"Slack rejected a message, moved to {path}: {error}", file=sys.stderr)
+
+    def _read_message(self, path: Path) -> Optional[OutboxMessage]:
+        try:
+            with path.open("r") as f:
+                data = json.load(f)
+            return OutboxMessage(
+                path, str(data["url"]), [str(s) for s in data["ids"]], data["payload"]
+            )
+        except (OSError, ValueError, KeyError, TypeError):
+            return None
+
+    def _read_messages(self) -> list[OutboxMessage]:
+        paths = sorted(self._outbox_dir.glob("*.json"))
+        messages = [self._read_message(path) for path in paths]
+        return [message for message in messages if message is not None]
+
+    def drain(
+        self,
+        post: Callable[[str, str, Optional[float]], object],
+        budget: Optional[float] = None,
+    ) -> int:
+        if not self._outbox_dir.exists():
+            return 0
+
+        deadline = time.monotonic() + budget if budget is not None else None
+        delivered = 0
+
+        with FileLock(self._outbox_dir / self.LOCK_FILE):
+            for message in self._read_messages():
+                if deadline is not None and time.monotonic() >= deadline:
+                    break
+
+                # Messages are sent strictly in order, a failure stops the drain.
+                # A message cut short by the budget stays queued for later
+                try:
+                    post(message.url, message.payload, deadline)
+                except OikotoolDeadlineError:
+                    if deadline is None:
+                        raise
+                    break
+                except Exception as e:
+                    # Retrying a message that Slack refused would fail the same way
+                    status_code = HttpUtils.get_status_code(e)
+                    if status_code is None or HttpUtils.is_retryable(e):
+                        raise
+                    self._move_to_failed(message, e)
+                    continue
+                self._delivered.append(message.ids, self.DELIVERED_LIMIT)
+                message.path.unlink(missing_ok=True)
+                delivered += 1
+
+        return delivered
+
+    def enqueue(self, url: str, messages: list[tuple[list[str], str]]) -> None:
+        if not messages:
+            return
+
+        self._outbox_dir.mkdir(parents=True, exist_ok=True)
+        with FileLock(self._outbox_dir / self.LOCK_FILE):
+            prefix = f"{time.time_ns():020d}"
+            for i, (ids, payload) in enumerate(messages):
+                data = {"url": url, "ids": ids, "payload": payload}
+                path = self._outbox_dir / f"{prefix}-{i:04d}.json"
+                FileUtils.write_atomic(path, json.dumps(data))
+
+    def pending(self) -> int:
+        if not self._outbox_dir.exists():
+            return 0
+        return len(list(self._outbox_dir.glob("*.json")))
+
+    def read_known_ids(self) -> SeenListings:
+        if not self._outbox_dir.exists():
+            return SeenListings()
+
+        known = self._delivered.read()
+        for message in self._read_messages():
+            known.update(message.ids)
+        return known
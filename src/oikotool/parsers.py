@@ -0,0 +1,49 @@
+# SPDX-License-Identifier: MIT
+
+from collections.abc import Iterable
+from html.parser import HTMLParser
+from typing import Optional
+
+
+class MetaTagParser(HTMLParser):
+    """
+    An incremental HTML parser that collects named meta tags from a document.
+
+    The parser is fed the document piece by piece and marks itself done as
+    soon as the end of the head section is reached or every requested tag has
+    been found, so the rest of the document never needs to be read. Only the
+    first tag of each name is considered, and its value is None when the tag
+    has no content attribute.
+    """
+
+    def __init__(self, names: Iterable[str]) -> None:
+        super().__init__(convert_charrefs=True)
+        self._names = set(names)
+        self.done = False
+        self.tags: dict[str, Optional[str]] = {}
+
+    def handle_endtag(self, tag: str) -> None:
+        if tag == "head":
+            self.done = True
+
+    def handle_starttag(self, tag: str, attrs: list[tuple[str, Optional[str]]]) -> None:
+        if tag == "body":
+            self.done = True
+        elif tag == "meta":
+            attributes = dict(attrs)
+            name = attributes.get("name")
+            if name in self._names and name not in self.tags:
+                self.tags[name] = attributes.get("content")
+                if len(self.tags) == len(self._names):
+                    self.done = True
+
+
+def extract_meta_tags(
+    chunks: Iterable[str], names: Iterable[str]
+) -> dict[str, Optional[str]]:
+    parser = MetaTagParser(names)
+    for chunk in chunks:
+        parser.feed(chunk)
+        if parser.done:
+            break
+    return parser.tags
@@ -0,0 +1,104 @@
+# SPDX-License-Identifier: MIT
+
+import sys
+import threading
+import time
+from pathlib import Path
+from types import FrameType
+from typing import TYPE_CHECKING, Any
+
+if TYPE_CHECKING:
+    import cProfile
+
+
+class Profiler:
+    """
+    A CPU and optional memory profiler for a whole command run.
+
+    The main thread and every thread started while profiling are profiled
+    with cProfile and the results are merged into one report, so that work
+    done in the download and listing workers is included. With memory profiling,
+    tracemalloc records allocations and the lines that allocated the most
+    memory are reported. The profiler modules are only imported when
+    profiling is started, so an unused profiler costs nothing.
+    """
+
+    ALLOCATION_LIMIT: int = 25
+    STATS_LIMIT: int = 40
+    TRACEBACK_LIMIT: int = 10
+
+    def __init__(self, output_dir: Path, name: str, memory: bool = False) -> None:
+        self._output_dir = output_dir
+        self._name = name
+        self._memory = memory
+        self._lock = threading.Lock()
+        self._profiles: list["cProfile.Profile"] = []
+
+    def _profile_thread(self, frame: FrameType, event: str, arg: Any) -> None:
+        import cProfile
+
+        # Called on the first event of every new thread, after which the
+        # thread profile replaces this hook for the rest of the thread
+        sys.setprofile(None)
+        profile = cProfile.Profile()
+        try:
+            profile.enable()
+        except ValueError:
+            # Only one profiler may be active at a time from Python 3.12 on,
+            # where the main profile already covers every thread
+            return
+        with self._lock:
+            self._profiles.append(profile)
+
+    def _write_memory_report(self, path: Path) -> None:
+        import tracemalloc
+
+        snapshot = tracemalloc.take_snapshot()
+        tracemalloc.stop()
+        stats = snapshot.statistics("lineno")
+        total = sum(stat.size for stat in stats)
+
+        with path.open("w") as f:
+            f.write(f"Total allocated: {total / 1024:.1f} KiB\n\n")
+            for stat in stats[: self.ALLOCATION_LIMIT]:
+                frame = stat.traceback[0]
+                f.write(
+                    f"{stat.size / 1024:10.1f} KiB {stat.count:8d} blocks  "
+                    f"{frame.filename}:{frame.lineno}\n"
+                )
+
+    def start(self) -> None:
+        import cProfile
+
+        if self._memory:
+            import tracemalloc
+
+            tracemalloc.start(self.TRACEBACK_LIMIT)
+
+        profile = cProfile.Profile()
+        self._profiles.append(profile)
+        threading.setprofile(self._profile_thread)
+        profile.enable()
+
+    def stop(self) -> list[Path]:
+        self._profiles[0].disable()
+        threading.setprofile(None)
+
+        self._output_dir.mkdir(parents=True, exist_ok=True)
+        stamp = time.strftime("%Y%m%d-%H%M%S")
+        base = self._output_dir / f"{stamp}-{self._name}"
+        paths = [base.with_suffix(".prof"), base.with_suffix(".txt")]
+
+        # The allocations are taken before the reports below allocate more
+        if self._memory:
+            paths.append(base.with_name(f"{base.name}-memory.txt"))
+            self._write_memory_report(paths[2])
+
+        import pstats
+
+        with self._lock, paths[1].open("w") as f:
+            stats = pstats.Stats(*self._profiles, stream=f)
+            stats.dump_stats(paths[0])
+            stats.sort_stats("cumulative").print_stats(self.STATS_LIMIT)
+
+        return paths
@@ -0,0 +1,138 @@
+# SPDX-License-Identifier: MIT
+
+import os
+from collections.abc import Iterable, Iterator
+from pathlib import Path
+from typing import Optional, Union
+
+from oikotool.utils import FileUtils
+
+
+class SeenListings:
+    """
+    An insertion-ordered set of seen listing identifiers.
+
+    Membership checks and additions take constant time, and the insertion
+    order is preserved so that only the most recent identifiers can be kept
+    as a rolling window. Card IDs on Oikotie are numeric, so such identifiers
+    are stored as integers to keep large sets compact; any other identifier
+    is stored as is.
+    """
+
+    __slots__ = ("_ids",)
+
+    _ids: dict[Union[int, str], None]
+
+    def __init__(self, ids: Iterable[str] = ()) -> None:
+        self._ids = {}
+        self.update(ids)
+
+    def __contains__(self, listing_id: object) -> bool:
+        return isinstance(listing_id, str) and self._key(listing_id) in self._ids
+
+    def __iter__(self) -> Iterator[str]:
+        return (str(key) for key in self._ids)
+
+    def __len__(self) -> int:
+        return len(self._ids)
+
+    @staticmethod
+    def _key(listing_id: str) -> Union[int, str]:
+        # Leading zeros would be lost in the conversion, keep those as strings
+        if listing_id.isascii() and listing_id.isdecimal():
+            if listing_id[0] != "0" or listing_id == "0":
+                return int(listing_id)
+        return listing_id
+
+    def add(self, listing_id: str) -> bool:
+        key = self._key(listing_id)
+        if not listing_id or key in self._ids:
+            return False
+        self._ids[key] = None
+        return True
+
+    def recent(self, limit: int) -> list[str]:
+        if limit <= 0:
+            return []
+        ids = list(self._ids)
+        return [str(key) for key in ids[-limit:]]
+
+    def update(self, ids: Iterable[str]) -> None:
+        for listing_id in ids:
+            self.add(listing_id)
+
+
+class SeenListingsJournal:
+    """
+    An append-only journal of seen listing identifiers, one per line.
+
+    New identifiers are appended to the end of the file and synced to disk,
+    so a run without new listings does not write anything. A last line
+    without a newline can only be the result of an interrupted append; it is
+    ignored when reading and cut off before the next append. The journal is
+    compacted down to the most recent identifiers by atomically rewriting it
+    once it has grown well past the number of identifiers to keep.
+    """
+
+    COMPACTION_FACTOR: int = 2
+    COMPACTION_MIN_SLACK: int = 100
+
+    def __init__(self, path: Path, legacy_path: Optional[Path] = None) -> None:
+        self._path = path
+        self._legacy_path = legacy_path
+        self._entries = 0
+        self._valid_size = 0
+
+    def _migrate_legacy_file(self) -> None:
+        if self._path.exists() or not self._legacy_path:
+            return
+        if not self._legacy_path.exists():
+            return
+
+        with self._legacy_path.open("r") as f:
+            ids = [s for s in f.read().splitlines() if s]
+        FileUtils.write_atomic(self._path, "".join(f"{s}\n" for s in ids))
+        self._legacy_path.unlink()
+
+    def append(self, ids: list[str], limit: int) -> None:
+        seen = self.read()
+        new_ids = [s for s in ids if seen.add(s)]
+        if not new_ids:
+            return
+
+        with self._path.open("ab") as f:
+            # Drop the remains of an interrupted append before adding new lines
+            if f.tell() > self._valid_size:
+                f.truncate(self._valid_size)
+                f.seek(self._valid_size)
+            f.write("".join(f"{s}\n" for s in new_ids).encode())
+            f.flush()
+            os.fsync(f.fileno())
+            self._valid_size = f.tell()
+        self._entries += len(new_ids)
+
+        threshold = max(
+            limit * self.COMPACTION_FACTOR, limit + self.COMPACTION_MIN_SLACK
+        )
+        if self._entries > threshold:
+            self.compact(limit, seen)
+
+    def compact(self, limit: int, seen: Optional[SeenListings] = None) -> None:
+        recent = (seen if seen is not None else self.read()).recent(limit)
+        data = "".join(f"{s}\n" for s in recent)
+        FileUtils.write_atomic(self._path, data)
+        self._entries = len(recent)
+        self._valid_size = len(data.encode())
+
+    def read(self) -> SeenListings:
+        self._migrate_legacy_file()
+        try:
+            with self._path.open("rb") as f:
+                data = f.read()
+        except FileNotFoundError:
+            data = b""
+
+        self._valid_size = data.rfind(b"\n") + 1
+        ids = data[: self._valid_size].decode().splitlines()
+        self._entries = len(ids)
+        return SeenListings(ids)
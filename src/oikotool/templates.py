@@ -0,0 +1,155 @@
+# SPDX-License-Identifier: MIT
+
+import json
+import re
+from json.encoder import encode_basestring_ascii
+from pathlib import Path
+from typing import Any, NamedTuple
+
+from oikotool.exceptions import OikotoolConfigError
+from oikotool.formatters import FormattedListing
+from oikotool.translations import Translations
+
+
+class RenderedMessage(NamedTuple):
+    text: str
+    blocks: str
+
+
+class SlackTemplate:
+    """
+    A Slack message template compiled once and rendered for many listings.
+
+    The template is a Slack message object with a text and a list of Block
+    Kit blocks, where {{placeholders}} in strings are replaced with listing
+    fields (address, id, image, price, size, url) or translated labels
+    (empty_field, label_listing, label_price, label_size). Labels are filled
+    in when the template is compiled, and the rest of the template is turned
+    into format strings of JSON text, so that rendering a listing only
+    substitutes its JSON escaped fields. Messages of several listings are
+    composed from the rendered fragments without parsing them again.
+    """
+
+    DEFAULT: dict[str, Any] = {
+        "text": "{{address}}",
+        "blocks": [
+            {
+                "type": "header",
+                "text": {"type": "plain_text", "text": "{{address}}"},
+            },
+            {
+                "type": "image",
+                "image_url": "{{image}}",
+                "alt_text": "{{address}}",
+            },
+            {
+                "type": "section",
+                "fields": [
+                    {"type": "mrkdwn", "text": "*{{label_price}}:*\n{{price}}"},
+                    {"type": "mrkdwn", "text": "*{{label_size}}:*\n{{size}}"},
+                ],
+            },
+            {
+                "type": "rich_text",
+                "elements": [
+                    {
+                        "type": "rich_text_section",
+                        "elements": [
+                            {
+                                "type": "text",
+                                "text": "{{label_listing}}:\n",
+                                "style": {"bold": True},
+                            },
+                            {"type": "link", "url": "{{url}}"},
+                        ],
+                    }
+                ],
+            },
+        ],
+    }
+    DIVIDER: str = json.dumps({"type": "divider"})
+    FIELDS: tuple[str, ...] = ("address", "id", "image", "price", "size", "url")
+    LABELS: tuple[str, ...] = (
+        "empty_field",
+        "label_listing",
+        "label_price",
+        "label_size",
+    )
+    PLACEHOLDER_PATTERN = re.compile(r"\{\{\s*(\w+)\s*\}\}")
+
+    def __init__(self, template: Any, translations: Translations) -> None:
+        if not isinstance(template, dict) or set(template) - {"text", "blocks"}:
+            raise OikotoolConfigError(
+                "Slack template must be an object with 'text' and 'blocks'."
+            )
+        text = template.get("text", "")
+        blocks = template.get("blocks")
+        if not isinstance(text, str):
+            raise OikotoolConfigError("Slack template 'text' must be a string.")
+        if not isinstance(blocks, list) or not blocks:
+            raise OikotoolConfigError("Slack template 'blocks' must be a list.")
+
+        self._translations = translations
+        self._text = self._compile(json.dumps(text)[1:-1])
+        self._blocks = self._compile(json.dumps(blocks)[1:-1])
+        self.block_count = len(blocks)
+
+    def _compile(self, source: str) -> str:
+        parts = []
+        position = 0
+        for match in self.PLACEHOLDER_PATTERN.finditer(source):
+            name = match.group(1)
+            if name in self.LABELS:
+                value = self._escape(getattr(self._translations, name))
+                value = value.replace("{", "{{").replace("}", "}}")
+            elif name in self.FIELDS:
+                value = f"{{{name}}}"
+            else:
+                raise OikotoolConfigError(
+                    f"Unknown placeholder in Slack template: {name}."
+                )
+            literal = source[position : match.start()]
+            parts.append(literal.replace("{", "{{").replace("}", "}}"))
+            parts.append(value)
+            position = match.end()
+
+        parts.append(source[position:].replace("{", "{{").replace("}", "}}"))
+        return "".join(parts)
+
+    @staticmethod
+    def _escape(value: str) -> str:
+        # The same escaping as json.dumps applies to strings, without its overhead
+        return encode_basestring_ascii(value)[1:-1]
+
+    @staticmethod
+    def compose(messages: list[RenderedMessage]) -> str:
+        separator = f", {SlackTemplate.DIVIDER}, "
+        text = "\\n".join(message.text for message in messages)
+        blocks = separator.join(message.blocks for message in messages)
+        return f'{{"text": "{text}", "blocks": [{blocks}]}}'
+
+    @classmethod
+    def load(cls, path: Path, translations: Translations) -> "SlackTemplate":
+        try:
+            with path.open("r") as f:
+                template = json.load(f)
+        except OSError as e:
+            raise OikotoolConfigError(f"Failed to read {path}: {e.strerror}.") from e
+        except ValueError as e:
+            raise OikotoolConfigError(f"Invalid JSON in {path}: {e}.") from e
+        return cls(template, translations)
+
+    def render(self, listing: FormattedListing) -> RenderedMessage:
+        escape = self._escape
+        empty = self._translations.empty_field
+        fields = {
+            "address": escape(listing.address),
+            "id": escape(listing.id or ""),
+            "image": escape(listing.image),
+            "price": escape(listing.price or empty),
+            "size": escape(listing.size or empty),
+            "url": escape(listing.url),
+        }
+        return RenderedMessage(
+            self._text.format_map(fields), self._blocks.format_map(fields)
+        )
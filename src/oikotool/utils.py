@@ -1,48 +1,471 @@
 # SPDX-License-Identifier: MIT
 
-from typing import Any, Callable, Optional
+from __future__ import annotations
 
-import requests
-from tenacity import WrappedFn, retry, stop_after_attempt, wait_exponential_jitter
+import os
+import tempfile
+import threading
+import time
+from email.utils import parsedate_to_datetime
+from pathlib import Path
+from typing import TYPE_CHECKING, Any, BinaryIO, Callable, NamedTuple, Optional
+from urllib.parse import urlsplit
+
+from oikotool import metrics
+from oikotool.exceptions import OikotoolCircuitOpenError, OikotoolDeadlineError
+
+# requests and tenacity are only imported once the first request is sent, so
+# that commands which never reach the network start faster
+if TYPE_CHECKING:
+    import requests
+    from tenacity import RetryCallState
+
+
+class CircuitBreaker:
+    """
+    A circuit breaker that fails requests to an upstream host fast after
+    repeated errors.
+
+    After a number of consecutive failed requests the circuit opens, and
+    requests are rejected without being sent until a cooldown has passed.
+    Then a single trial request is let through: if it succeeds the circuit
+    closes again, otherwise it stays open for another cooldown.
+    """
+
+    def __init__(self, threshold: int, cooldown: float) -> None:
+        self._threshold = threshold
+        self._cooldown = cooldown
+        self._failures = 0
+        self._lock = threading.Lock()
+        self._opened: Optional[float] = None
+        self._trial = False
+
+    def before_request(self, host: str) -> None:
+        with self._lock:
+            if self._opened is None:
+                return
+            remaining = self._opened + self._cooldown - time.monotonic()
+            if remaining > 0 or self._trial:
+                raise OikotoolCircuitOpenError(
+                    f"Too many errors from {host}, "
+                    f"not retrying for {max(remaining, 0):.0f} seconds."
+                )
+            self._trial = True
+
+    def record_failure(self) -> None:
+        with self._lock:
+            self._failures += 1
+            self._trial = False
+            if self._failures >= self._threshold:
+                self._opened = time.monotonic()
+
+    def record_success(self) -> None:
+        with self._lock:
+            self._failures = 0
+            self._opened = None
+            self._trial = False
+
+    def release_trial(self) -> None:
+        with self._lock:
+            self._trial = False
+
+
+class FileUtils:
+    @staticmethod
+    def write_atomic(path: Path, data: str) -> None:
+        fd, tmp = tempfile.mkstemp(dir=path.parent, prefix=f".{path.name}.")
+        try:
+            with os.fdopen(fd, "w") as f:
+                f.write(data)
+                f.flush()
+                os.fsync(f.fileno())
+            os.replace(tmp, path)
+        except BaseException:
+            Path(tmp).unlink(missing_ok=True)
+            raise
+
+
+class HashingWriter:
+    """
+    A write-only file wrapper that feeds everything written through it into
+    a hash object, so content can be hashed while it is being copied.
+    """
+
+    def __init__(self, file: BinaryIO, digest: Any) -> None:
+        self._file = file
+        self._digest = digest
+
+    def write(self, data: bytes) -> int:
+        self._digest.update(data)
+        return self._file.write(data)
+
+
+class RetryPolicy(NamedTuple):
+    """
+    Retry and timeout settings for one class of endpoints.
+
+    Failed requests are retried with exponential backoff and jitter, starting
+    from initial_wait seconds and waiting at most max_wait seconds between
+    attempts, unless a Retry-After header asks for a different wait. Each
+    attempt may take up to timeout seconds.
+    """
+
+    attempts: int
+    initial_wait: float
+    max_wait: float
+    jitter: float
+    timeout: float
+
+
+class StopBeforeDeadline:
+    """
+    A tenacity stop strategy that gives up after a number of attempts, or
+    earlier when waiting for the next attempt would run past the deadline
+    set with HttpUtils.set_deadline or the deadline of the request itself.
+    """
+
+    def __init__(self, attempts: int, deadline: Optional[float] = None) -> None:
+        self._attempts = attempts
+        self._deadline = deadline
+        self.deadline_reached = False
+
+    def __call__(self, retry_state: RetryCallState) -> bool:
+        if retry_state.attempt_number >= self._attempts:
+            return True
+        remaining = HttpUtils.get_remaining_time(self._deadline)
+        if remaining is not None and retry_state.upcoming_sleep >= remaining:
+            self.deadline_reached = self._deadline is not None
+            return True
+        return False
+
+
+class WaitRetryAfter:
+    """
+    A tenacity wait strategy that honors the Retry-After header of rate
+    limited (429) and unavailable (503) responses, and falls back to another
+    strategy for all other errors.
+    """
+
+    def __init__(
+        self, fallback: Callable[[RetryCallState], float], max_wait: float = 120
+    ) -> None:
+        self._fallback = fallback
+        self._max_wait = max_wait
+
+    def __call__(self, retry_state: RetryCallState) -> float:
+        outcome = retry_state.outcome
+        exception = outcome.exception() if outcome is not None else None
+        delay = HttpUtils.get_retry_after(exception) if exception else None
+        if delay is not None:
+            return min(delay, self._max_wait)
+        return float(self._fallback(retry_state))
 
 
 class HttpUtils:
+    """
+    HTTP helpers sharing a single connection-pooled session.
+
+    All requests go through one requests.Session so that connections are kept
+    alive and reused between requests to the same host. Sending requests from
+    multiple threads is safe; each host gets its own pool of connections,
+    which can be resized with set_pool_size when more parallelism is needed.
+    """
+
+    AUTH_ERROR_STATUSES: tuple[int, ...] = (401, 403)
+    CIRCUIT_COOLDOWN: float = 60
+    CIRCUIT_THRESHOLD: int = 5
+    POOL_CONNECTIONS: int = 10
+    POOL_MAXSIZE: int = 10
+    RETRY_AFTER_STATUSES: tuple[int, ...] = (429, 503)
+    RETRYABLE_STATUSES: tuple[int, ...] = (408, 425, 429, 500, 502, 503, 504)
+
+    API_POLICY: RetryPolicy = RetryPolicy(
+        attempts=5, initial_wait=3, max_wait=30, jitter=2, timeout=30
+    )
+    CDN_POLICY: RetryPolicy = RetryPolicy(
+        attempts=4, initial_wait=1, max_wait=10, jitter=1, timeout=30
+    )
+    HEALTH_POLICY: RetryPolicy = RetryPolicy(
+        attempts=2, initial_wait=1, max_wait=1, jitter=0, timeout=5
+    )
+    SLACK_POLICY: RetryPolicy = RetryPolicy(
+        attempts=5, initial_wait=2, max_wait=60, jitter=1, timeout=15
+    )
+
+    _breakers: dict[str, CircuitBreaker] = {}
+    _deadline: Optional[float] = None
+    _pool_sizes: dict[str, int] = {}
+    _session: Optional[requests.Session] = None
+    _session_lock: threading.Lock = threading.Lock()
+
     @staticmethod
-    def _create_retry_decorator() -> Callable[[WrappedFn], WrappedFn]:
-        return retry(
-            reraise=True,
-            wait=wait_exponential_jitter(initial=3, jitter=2),
-            stop=stop_after_attempt(5),
+    def _create_session() -> requests.Session:
+        import requests
+        from requests.adapters import HTTPAdapter
+
+        session = requests.Session()
+        adapter = HTTPAdapter(
+            pool_connections=HttpUtils.POOL_CONNECTIONS,
+            pool_maxsize=HttpUtils.POOL_MAXSIZE,
         )
+        session.mount("http://", adapter)
+        session.mount("https://", adapter)
+        return session
 
     @staticmethod
-    def _send_http_request(method: str, url: str, **kwargs: Any) -> requests.Response:
-        response = requests.request(method, url, **kwargs)
-        response.raise_for_status()
+    def _get_circuit_breaker(host: str) -> CircuitBreaker:
+        with HttpUtils._session_lock:
+            breaker = HttpUtils._breakers.get(host)
+            if breaker is None:
+                breaker = CircuitBreaker(
+                    HttpUtils.CIRCUIT_THRESHOLD, HttpUtils.CIRCUIT_COOLDOWN
+                )
+                HttpUtils._breakers[host] = breaker
+            return breaker
+
+    @staticmethod
+    def _get_session() -> requests.Session:
+        if HttpUtils._session is None:
+            with HttpUtils._session_lock:
+                if HttpUtils._session is None:
+                    HttpUtils._session = HttpUtils._create_session()
+        return HttpUtils._session
+
+    @staticmethod
+    def _send_http_request(
+        method: str,
+        url: str,
+        timeout: float,
+        deadline: Optional[float] = None,
+        **kwargs: Any,
+    ) -> requests.Response:
+        import requests
+
+        remaining = HttpUtils.get_remaining_time(deadline)
+        if remaining is not None:
+            if remaining <= 0:
+                raise OikotoolDeadlineError(f"Deadline exceeded before {url}.")
+            timeout = min(timeout, remaining)
+
+        host = urlsplit(url).netloc
+        breaker = HttpUtils._get_circuit_breaker(host)
+        breaker.before_request(host)
+
+        metrics.count("http_requests")
+        try:
+            response = HttpUtils._get_session().request(
+                method, url, timeout=timeout, **kwargs
+            )
+            response.raise_for_status()
+        except requests.RequestException as e:
+            metrics.count("http_errors")
+            # Client errors, rate limiting included, show that the host is up,
+            # only server side failures count towards opening the circuit.
+            # Either outcome ends a trial request of a half-open circuit
+            if HttpUtils.is_upstream_error(e):
+                breaker.record_failure()
+            else:
+                breaker.record_success()
+            raise
+        except BaseException:
+            # Other errors, such as interrupts, say nothing about the host
+            breaker.release_trial()
+            raise
+
+        breaker.record_success()
         return response
 
     @staticmethod
-    @_create_retry_decorator()
+    def _send_with_retry(
+        method: str,
+        url: str,
+        policy: RetryPolicy,
+        timeout: Optional[float] = None,
+        deadline: Optional[float] = None,
+        **kwargs: Any,
+    ) -> requests.Response:
+        from tenacity import Retrying, retry_if_exception, wait_exponential_jitter
+
+        stop = StopBeforeDeadline(policy.attempts, deadline)
+        retrying = Retrying(
+            reraise=True,
+            retry=retry_if_exception(HttpUtils.is_retryable),
+            wait=WaitRetryAfter(
+                wait_exponential_jitter(
+                    initial=policy.initial_wait,
+                    max=policy.max_wait,
+                    jitter=policy.jitter,
+                )
+            ),
+            stop=stop,
+            before_sleep=lambda retry_state: metrics.count("http_retries"),
+        )
+        try:
+            return retrying(
+                HttpUtils._send_http_request,
+                method,
+                url,
+                timeout=timeout if timeout is not None else policy.timeout,
+                deadline=deadline,
+                **kwargs,
+            )
+        except Exception as e:
+            # A request given its own deadline reports running out of time
+            # apart from other failures, the caller may try again later
+            if stop.deadline_reached:
+                raise OikotoolDeadlineError(f"Deadline exceeded for {url}.") from e
+            raise
+
+    @staticmethod
+    def connection_stats() -> dict[str, int]:
+        """
+        Return the number of requests sent and connections opened by the
+        currently pooled hosts, and how many requests reused a connection.
+        """
+        from requests.adapters import HTTPAdapter
+
+        session = HttpUtils._get_session()
+        requests_sent = 0
+        connections = 0
+
+        adapters = {id(a): a for a in session.adapters.values()}.values()
+        for adapter in adapters:
+            if not isinstance(adapter, HTTPAdapter):
+                continue
+            pools = adapter.poolmanager.pools
+            for key in pools.keys():
+                pool = pools.get(key)
+                if pool is not None:
+                    requests_sent += pool.num_requests
+                    connections += pool.num_connections
+
+        return {
+            "requests": requests_sent,
+            "connections": connections,
+            "reused": max(requests_sent - connections, 0),
+        }
+
+    @staticmethod
+    def get_remaining_time(deadline: Optional[float] = None) -> Optional[float]:
+        deadlines = [d for d in (HttpUtils._deadline, deadline) if d is not None]
+        if not deadlines:
+            return None
+        return min(deadlines) - time.monotonic()
+
+    @staticmethod
+    def get_retry_after(exception: BaseException) -> Optional[float]:
+        if HttpUtils.get_status_code(exception) not in HttpUtils.RETRY_AFTER_STATUSES:
+            return None
+
+        response = getattr(exception, "response")
+        value = response.headers.get("Retry-After", "").strip()
+        if value.isdigit():
+            return float(value)
+        try:
+            return max(parsedate_to_datetime(value).timestamp() - time.time(), 0)
+        except (TypeError, ValueError):
+            return None
+
+    @staticmethod
+    def get_status_code(exception: BaseException) -> Optional[int]:
+        import requests
+
+        if isinstance(exception, requests.HTTPError) and exception.response is not None:
+            return exception.response.status_code
+        return None
+
+    @staticmethod
     def get_with_retry(
         url: str,
         headers: Optional[dict[str, str]] = None,
-        timeout: int = 30,
+        timeout: Optional[float] = None,
         stream: bool = False,
+        policy: RetryPolicy = API_POLICY,
+        deadline: Optional[float] = None,
         **kwargs: Any,
     ) -> requests.Response:
-        return HttpUtils._send_http_request(
-            "GET", url, headers=headers, timeout=timeout, stream=stream, **kwargs
+        return HttpUtils._send_with_retry(
+            "GET",
+            url,
+            policy,
+            headers=headers,
+            timeout=timeout,
+            deadline=deadline,
+            stream=stream,
+            **kwargs,
         )
 
     @staticmethod
-    @_create_retry_decorator()
+    def is_auth_error(exception: BaseException) -> bool:
+        return HttpUtils.get_status_code(exception) in HttpUtils.AUTH_ERROR_STATUSES
+
+    @staticmethod
+    def is_retryable(exception: BaseException) -> bool:
+        import requests
+
+        if isinstance(
+            exception,
+            (
+                requests.ConnectionError,
+                requests.Timeout,
+                requests.exceptions.ChunkedEncodingError,
+            ),
+        ):
+            return True
+        return HttpUtils.get_status_code(exception) in HttpUtils.RETRYABLE_STATUSES
+
+    @staticmethod
+    def is_upstream_error(exception: BaseException) -> bool:
+        import requests
+
+        if isinstance(exception, (requests.ConnectionError, requests.Timeout)):
+            return True
+        status_code = HttpUtils.get_status_code(exception)
+        return status_code is not None and status_code >= 500
+
+    @staticmethod
     def post_with_retry(
         url: str,
         data: Any,
         headers: Optional[dict[str, str]] = None,
-        timeout: int = 30,
+        timeout: Optional[float] = None,
+        policy: RetryPolicy = API_POLICY,
+        deadline: Optional[float] = None,
         **kwargs: Any,
     ) -> requests.Response:
-        return HttpUtils._send_http_request(
-            "POST", url, data=data, headers=headers, timeout=timeout, **kwargs
+        return HttpUtils._send_with_retry(
+            "POST",
+            url,
+            policy,
+            data=data,
+            headers=headers,
+            timeout=timeout,
+            deadline=deadline,
+            **kwargs,
+        )
+
+    @staticmethod
+    def set_deadline(seconds: Optional[float]) -> None:
+        """
+        Set a deadline for all requests of the current run, after which no
+        more requests are sent and no retries are attempted.
+        """
+        HttpUtils._deadline = (
+            time.monotonic() + seconds if seconds is not None else None
         )
+
+    @staticmethod
+    def set_pool_size(url_prefix: str, maxsize: int) -> None:
+        """
+        Use a dedicated connection pool of the given size for URLs starting
+        with the given prefix, such as "https://cdn.example.com/".
+        """
+        session = HttpUtils._get_session()
+        with HttpUtils._session_lock:
+            if HttpUtils._pool_sizes.get(url_prefix, 0) >= maxsize:
+                return
+            from requests.adapters import HTTPAdapter
+
+            adapter = HTTPAdapter(pool_connections=1, pool_maxsize=maxsize)
+            session.mount(url_prefix, adapter)
+            HttpUtils._pool_sizes[url_prefix] = maxsize
@@ -0,0 +1,95 @@
+# SPDX-License-Identifier: MIT
+
+import heapq
+import random
+import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+from typing import Optional
+
+from oikotool.config import QueryConfig
+from oikotool.core import Oikotool
+
+
+class Watcher:
+    """
+    A scheduler that runs the checks of many queries from a single process.
+
+    Each query is checked on its own interval by a pool of worker threads
+    sharing one Oikotool instance, so the HTTP connections and session tokens
+    stay alive between runs. The start times are randomly spread over a
+    fraction of each interval so that queries with equal intervals do not all
+    run at once, and a query is never run again while its previous check is
+    still in progress.
+    """
+
+    JITTER_RATIO: float = 0.1
+    WORKERS: int = 4
+
+    def __init__(
+        self,
+        oikotool: Oikotool,
+        queries: list[QueryConfig],
+        cache_dir: Path,
+        workers: int = WORKERS,
+        quiet: bool = False,
+    ) -> None:
+        self._oikotool = oikotool
+        self._queries = queries
+        self._cache_dir = cache_dir
+        self._workers = workers
+        self._quiet = quiet
+        self._running: set[str] = set()
+        self._running_lock = threading.Lock()
+        self._stop = threading.Event()
+
+    def _jitter(self, interval: float) -> float:
+        spread = interval * self.JITTER_RATIO
+        return random.uniform(-spread, spread)
+
+    def _run_query(self, query: QueryConfig) -> None:
+        try:
+            self._oikotool.check_query(query, self._cache_dir, self._quiet)
+        except Exception as e:
+            print(f"Check '{query.name}' failed: {e}", file=sys.stderr)
+        finally:
+            with self._running_lock:
+                self._running.discard(query.name)
+
+    def run(self, duration: Optional[float] = None) -> None:
+        start = time.monotonic()
+        schedule = [
+            (start + random.uniform(0, query.interval * self.JITTER_RATIO), i)
+            for i, query in enumerate(self._queries)
+        ]
+        heapq.heapify(schedule)
+
+        with ThreadPoolExecutor(max_workers=self._workers) as executor:
+            while not self._stop.is_set():
+                now = time.monotonic()
+                if duration is not None and now - start >= duration:
+                    break
+
+                due, index = schedule[0]
+                if due > now:
+                    timeout = due - now
+                    if duration is not None:
+                        timeout = min(timeout, start + duration - now)
+                    self._stop.wait(timeout)
+                    continue
+
+                query = self._queries[index]
+                with self._running_lock:
+                    submit = query.name not in self._running
+                    if submit:
+                        self._running.add(query.name)
+                if submit:
+                    executor.submit(self._run_query, query)
+
+                due = max(due + query.interval + self._jitter(query.interval), now)
+                heapq.heapreplace(schedule, (due, index))
+
+    def stop(self) -> None:
+        self._stop.set()
@@ -4,6 +4,49 @@ from typing import Any
 
 
 class MockHtmlProvider:
+    @property
+    def large_listing_images_page(self) -> str:
+        images = "".join(
+            '<div class="gallery__item">'
+            f'<a href="https://cdn.asunnot.oikotie.fi/b2lrb3RpZS5maQo=/{i}">'
+            f'<img src="https://cdn.asunnot.oikotie.fi/thumb/{i}" alt="{i}" />'
+            "</a>"
+            "</div>"
+            for i in range(200)
+        )
+        filler = "".join(
+            f'<div class="listing-info"><span>Row {i}</span><p>Text {i}</p></div>'
+            for i in range(5000)
+        )
+        return self.listing_images_page.replace("</main>", f"{images}{filler}</main>")
+
+    @property
+    def large_website_with_session_headers(self) -> str:
+        body = "".join(
+            f'<div class="card"><a href="/myytavat-asunnot/helsinki/{i}">{i}</a></div>'
+            for i in range(10000000, 10010000)
+        )
+        return self.website_with_session_headers.replace("<body>", f"<body>{body}")
+
+    @property
+    def listing_images_page(self) -> str:
+        return (
+            "<!DOCTYPE html>"
+            "<html>"
+            "<head>"
+            '  <meta charset="utf-8" />'
+            "</head>"
+            "<body>"
+            "<main>"
+            '<h1 class="heading--no-styling">'
+            '<span class="listing-header__text">Oikotie 1, Kaivopuisto, Helsinki</span>'
+            "</h1>"
+            '<a href="https://cdn.asunnot.oikotie.fi/b2lrb3RpZS5maQo=/12345678">1</a>'
+            "</main>"
+            "</body>"
+            "</html>"
+        )
+
     @property
     def website_with_session_headers(self) -> str:
         return (
@@ -35,6 +78,19 @@ class MockHtmlProvider:
 
 
 class MockListingProvider:
+    @property
+    def large_card_set(self) -> list[dict[str, Any]]:
+        cards = []
+        for i in range(10000):
+            card = self.complete_listing
+            card["cardId"] = 20000000 + i
+            card["url"] = f"https://asunnot.oikotie.fi/myytavat-asunnot/helsinki/{i}"
+            card["data"]["price"] = f"{100 + i % 900}\u00a0000\u00a0\u20ac"
+            card["data"]["size"] = f"{20 + i % 180},5 m\u00b2"
+            card["location"]["address"] = f"oikotie {i % 100}"
+            cards.append(card)
+        return cards
+
     @property
     def complete_listing(self) -> dict[str, Any]:
         return {
@@ -0,0 +1,48 @@
+# SPDX-License-Identifier: MIT
+
+from pathlib import Path
+from typing import Any, Optional
+
+import pytest
+
+from oikotool.config import QueryConfig
+from oikotool.core import Oikotool
+
+
+class TestCheckAll:
+    def test_failures_are_isolated(
+        self,
+        tmp_path: Path,
+        monkeypatch: pytest.MonkeyPatch,
+        capsys: pytest.CaptureFixture[str],
+    ) -> None:
+        queries = [
+            QueryConfig(
+                name=f"query{i}",
+                url=f"https://asunnot.oikotie.fi/myytavat-asunnot?cardType={i}",
+                healthchecks_url=f"https://hc-ping.com/{i}",
+            )
+            for i in range(5)
+        ]
+        queries[2] = queries[2]._replace(url="https://example.com/?cardType=2")
+        pings = []
+
+        def ping(
+            healthchecks_url: Optional[str], uptime_url: Optional[str], **kwargs: Any
+        ) -> None:
+            pings.append((healthchecks_url, kwargs.get("failure", False)))
+
+        oikotool = Oikotool()
+        monkeypatch.setattr(oikotool, "_get_unseen_listings", lambda *args: ([], []))
+        monkeypatch.setattr(oikotool, "_ping_health_services", ping)
+        failed = oikotool.check_all(queries, tmp_path, jobs=3, quiet=True)
+
+        assert failed == ["query2"]
+        assert sorted(pings) == [
+            ("https://hc-ping.com/0", False),
+            ("https://hc-ping.com/1", False),
+            ("https://hc-ping.com/2", True),
+            ("https://hc-ping.com/3", False),
+            ("https://hc-ping.com/4", False),
+        ]
+        assert "query2" in capsys.readouterr().err
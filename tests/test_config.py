@@ -0,0 +1,96 @@
+# SPDX-License-Identifier: MIT
+
+import json
+from pathlib import Path
+from typing import Any
+
+import pytest
+
+from oikotool.config import QueryConfig, load_queries
+from oikotool.exceptions import OikotoolConfigError
+from oikotool.templates import SlackTemplate
+
+
+def write_config(tmp_path: Path, data: Any) -> Path:
+    path = tmp_path / "config.json"
+    path.write_text(json.dumps(data))
+    return path
+
+
+class TestLoadQueries:
+    def test_complete_query(self, tmp_path: Path) -> None:
+        template = tmp_path / "template.json"
+        template.write_text(json.dumps(SlackTemplate.DEFAULT))
+        query = {
+            "name": "helsinki",
+            "url": "https://asunnot.oikotie.fi/myytavat-asunnot?cardType=100",
+            "interval": 60,
+            "limit": 20,
+            "pages": 3,
+            "prefetch": True,
+            "slack": "https://hooks.slack.com/services/T/B/X",
+            "slack_batch": 5,
+            "slack_budget": 10,
+            "slack_template": str(template),
+            "healthchecks": "https://hc-ping.com/uuid",
+            "uptime": "https://uptime.example.com/api/push/x",
+            "archive": "/tmp/archive",
+        }
+        result = load_queries(write_config(tmp_path, {"queries": [query]}))
+        expected = QueryConfig(
+            name="helsinki",
+            url="https://asunnot.oikotie.fi/myytavat-asunnot?cardType=100",
+            interval=60,
+            limit=20,
+            slack_url="https://hooks.slack.com/services/T/B/X",
+            healthchecks_url="https://hc-ping.com/uuid",
+            uptime_url="https://uptime.example.com/api/push/x",
+            archive_dir=Path("/tmp/archive"),
+            pages=3,
+            prefetch=True,
+            slack_batch=5,
+            slack_budget=10,
+        )
+        assert isinstance(result[0].slack_template, SlackTemplate)
+        assert [result[0]._replace(slack_template=None)] == [expected]
+
+    def test_defaults(self, tmp_path: Path) -> None:
+        query = {"name": "a", "url": "https://asunnot.oikotie.fi/?cardType=100"}
+        result = load_queries(write_config(tmp_path, {"queries": [query]}))
+        assert result[0].interval == 300
+        assert result[0].limit == 10
+        assert result[0].slack_url is None
+
+    @pytest.mark.parametrize(
+        "data",
+        [
+            [],
+            {"queries": []},
+            {"queries": [{"url": "https://asunnot.oikotie.fi/?a=1"}]},
+            {"queries": [{"name": "a"}]},
+            {"queries": [{"name": "a", "url": "x", "interval": 0}]},
+            {"queries": [{"name": "a", "url": "x", "limit": "10"}]},
+            {"queries": [{"name": "a", "url": "x", "interval": True}]},
+            {"queries": [{"name": "a", "url": "x", "limit": True}]},
+            {"queries": [{"name": "a", "url": "x", "pages": True}]},
+            {"queries": [{"name": "a", "url": "x", "prefetch": 1}]},
+            {"queries": [{"name": "a", "url": "x", "slack_batch": True}]},
+            {"queries": [{"name": "a", "url": "x", "slack_budget": False}]},
+            {"queries": [{"name": "a", "url": "x", "unknown": 1}]},
+            {"queries": [{"name": "a", "url": "x"}, {"name": "a", "url": "y"}]},
+        ],
+    )
+    def test_invalid_config(self, tmp_path: Path, data: Any) -> None:
+        with pytest.raises(OikotoolConfigError):
+            load_queries(write_config(tmp_path, data))
+
+    def test_invalid_slack_template(self, tmp_path: Path) -> None:
+        template = tmp_path / "template.json"
+        template.write_text(json.dumps({"text": "{{unknown}}", "blocks": [{}]}))
+        query = {"name": "a", "url": "x", "slack_template": str(template)}
+        with pytest.raises(OikotoolConfigError, match="'a' has an invalid"):
+            load_queries(write_config(tmp_path, {"queries": [query]}))
+
+    def test_missing_file(self, tmp_path: Path) -> None:
+        with pytest.raises(OikotoolConfigError):
+            load_queries(tmp_path / "missing.json")
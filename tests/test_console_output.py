@@ -3,54 +3,69 @@
 from mocks import MockListingProvider
 
 from oikotool.core import Oikotool
+from oikotool.formatters import ListingBatchFormatter
 
 
 class TestConsoleOutput:
     def test_complete_listing(self) -> None:
         oikotool = Oikotool()
         listing = MockListingProvider()
-        result = oikotool._create_console_message(listing.complete_listing)
+        result = oikotool._create_console_message(
+            ListingBatchFormatter().format([listing.complete_listing])[0]
+        )
         expected = "Oikotie 1, Kaivopuisto, Helsinki, 75 m², 650 000 €, https://asunnot.oikotie.fi/myytavat-asunnot/helsinki/12345678"
         assert result == expected
 
     def test_float_size(self) -> None:
         oikotool = Oikotool()
         listing = MockListingProvider()
-        result = oikotool._create_console_message(listing.float_size)
+        result = oikotool._create_console_message(
+            ListingBatchFormatter().format([listing.float_size])[0]
+        )
         expected = "Oikotie 1, Kaivopuisto, Helsinki, 74.5 m², 650 000 €, https://asunnot.oikotie.fi/myytavat-asunnot/helsinki/12345678"
         assert result == expected
 
     def test_undefined_district(self) -> None:
         oikotool = Oikotool()
         listing = MockListingProvider()
-        result = oikotool._create_console_message(listing.undefined_district)
+        result = oikotool._create_console_message(
+            ListingBatchFormatter().format([listing.undefined_district])[0]
+        )
         expected = "Oikotie 1, Helsinki, 75 m², 650 000 €, https://asunnot.oikotie.fi/myytavat-asunnot/helsinki/12345678"
         assert result == expected
 
     def test_undefined_price(self) -> None:
         oikotool = Oikotool()
         listing = MockListingProvider()
-        result = oikotool._create_console_message(listing.undefined_price)
+        result = oikotool._create_console_message(
+            ListingBatchFormatter().format([listing.undefined_price])[0]
+        )
         expected = "Oikotie 1, Kaivopuisto, Helsinki, 75 m², https://asunnot.oikotie.fi/myytavat-asunnot/helsinki/12345678"
         assert result == expected
 
     def test_undefined_size(self) -> None:
         oikotool = Oikotool()
         listing = MockListingProvider()
-        result = oikotool._create_console_message(listing.undefined_size)
+        result = oikotool._create_console_message(
+            ListingBatchFormatter().format([listing.undefined_size])[0]
+        )
         expected = "Oikotie 1, Kaivopuisto, Helsinki, 650 000 €, https://asunnot.oikotie.fi/myytavat-asunnot/helsinki/12345678"
         assert result == expected
 
     def test_zero_price(self) -> None:
         oikotool = Oikotool()
         listing = MockListingProvider()
-        result = oikotool._create_console_message(listing.zero_price)
+        result = oikotool._create_console_message(
+            ListingBatchFormatter().format([listing.zero_price])[0]
+        )
         expected = "Oikotie 1, Kaivopuisto, Helsinki, 75 m², https://asunnot.oikotie.fi/myytavat-asunnot/helsinki/12345678"
         assert result == expected
 
     def test_zero_size(self) -> None:
         oikotool = Oikotool()
         listing = MockListingProvider()
-        result = oikotool._create_console_message(listing.zero_size)
+        result = oikotool._create_console_message(
+            ListingBatchFormatter().format([listing.zero_size])[0]
+        )
         expected = "Oikotie 1, Kaivopuisto, Helsinki, 650 000 €, https://asunnot.oikotie.fi/myytavat-asunnot/helsinki/12345678"
         assert result == expected
@@ -0,0 +1,69 @@
+# SPDX-License-Identifier: MIT
+
+from collections.abc import Iterator
+from pathlib import Path
+
+import pytest
+
+from oikotool.core import Oikotool
+from oikotool.fakeserver import FakeOikotieServer, FakeServerConfig
+
+
+@pytest.fixture
+def server() -> Iterator[FakeOikotieServer]:
+    config = FakeServerConfig(listings=25, images=2, image_size=1024)
+    with FakeOikotieServer(config=config) as server:
+        yield server
+
+
+class TestFakeServer:
+    def test_check_end_to_end(self, server: FakeOikotieServer, tmp_path: Path) -> None:
+        oikotool = Oikotool(
+            cache_dir=tmp_path / "cache", api_cache=True, base_url=server.url
+        )
+
+        def check() -> None:
+            oikotool.check(
+                url=f"{server.url}myytavat-asunnot?cardType=100",
+                name="fake",
+                limit=10,
+                cache_dir=tmp_path / "cache",
+                slack_url=f"{server.url}slack/hook",
+                healthchecks_url=f"{server.url}health/hc",
+                uptime_url=f"{server.url}health/uptime",
+                archive_dir=tmp_path / "archive",
+                slack_batch=5,
+                quiet=True,
+            )
+
+        check()
+        assert len(server.slack_messages) == 2
+        assert len(server.health_pings) == 2
+        images = sorted((tmp_path / "archive").glob("*/Kuvat/*.jpeg"))
+        assert len(images) == 20
+        assert images[0].stat().st_size == 1024
+
+        check()
+        assert len(server.slack_messages) == 2
+        assert server.stats()["api.requests"] == 1
+
+    def test_rate_limited_requests_are_retried(self, tmp_path: Path) -> None:
+        config = FakeServerConfig(
+            listings=5, images=1, rate_limit_rate=0.3, retry_after=0, seed=1
+        )
+        with FakeOikotieServer(config=config) as server:
+            oikotool = Oikotool(base_url=server.url)
+            oikotool.save_many(
+                [
+                    f"{server.url}myytavat-asunnot/helsinki/{20000000 + i}"
+                    for i in range(5)
+                ],
+                tmp_path,
+                quiet=True,
+            )
+            stats = server.stats()
+
+        assert len(list(tmp_path.glob("*/Kuvat/*.jpeg"))) == 5
+        assert (
+            stats.get("images.rate_limited", 0) + stats.get("cdn.rate_limited", 0) > 0
+        )
@@ -0,0 +1,94 @@
+# SPDX-License-Identifier: MIT
+
+import json
+import threading
+import time
+from typing import Any, Optional
+
+import pytest
+import requests
+
+from oikotool.core import Oikotool
+from oikotool.utils import HttpUtils
+
+
+class TestHealthPings:
+    def test_run_data_is_sent(self, monkeypatch: pytest.MonkeyPatch) -> None:
+        pings: list[tuple[str, Optional[str]]] = []
+
+        def ping(url: str, data: Optional[str] = None, **kwargs: Any) -> None:
+            pings.append((url, data))
+
+        monkeypatch.setattr(HttpUtils, "get_with_retry", ping)
+        monkeypatch.setattr(HttpUtils, "post_with_retry", ping)
+        Oikotool()._ping_health_services(
+            "https://hc-ping.com/uuid",
+            "https://uptime.example.com/api/push/x?status=up",
+            duration=1.2345,
+            new_listings=3,
+        )
+
+        assert sorted(pings) == [
+            ("https://hc-ping.com/uuid", '{"duration": 1.234, "new_listings": 3}'),
+            (
+                "https://uptime.example.com/api/push/x"
+                "?status=up&msg=3+new+listings&ping=1234",
+                None,
+            ),
+        ]
+
+    def test_failure_is_reported(self, monkeypatch: pytest.MonkeyPatch) -> None:
+        pings: list[tuple[str, Optional[str]]] = []
+
+        def ping(url: str, data: Optional[str] = None, **kwargs: Any) -> None:
+            pings.append((url, data))
+
+        monkeypatch.setattr(HttpUtils, "get_with_retry", ping)
+        monkeypatch.setattr(HttpUtils, "post_with_retry", ping)
+        Oikotool()._ping_health_services(
+            "https://hc-ping.com/uuid",
+            "https://uptime.example.com/api/push/x",
+            failure=True,
+            error=RuntimeError("API down"),
+        )
+
+        data = dict(pings)
+        payload = data["https://hc-ping.com/uuid/fail"]
+        assert payload is not None
+        assert json.loads(payload) == {"error": "API down"}
+        assert "https://uptime.example.com/api/push/x?status=down&msg=API+down" in data
+
+    def test_pings_do_not_block_past_deadline(
+        self, monkeypatch: pytest.MonkeyPatch
+    ) -> None:
+        release = threading.Event()
+        monkeypatch.setattr(
+            HttpUtils, "get_with_retry", lambda *args, **kwargs: release.wait(5)
+        )
+        monkeypatch.setattr(
+            HttpUtils, "post_with_retry", lambda *args, **kwargs: release.wait(5)
+        )
+        oikotool = Oikotool()
+        oikotool.HEALTH_PING_DEADLINE = 0.2
+
+        start = time.monotonic()
+        oikotool._ping_health_services("https://hc-ping.com/a", "https://uptime/b")
+        release.set()
+        assert time.monotonic() - start < 1
+
+    def test_pings_retry_briefly(self, monkeypatch: pytest.MonkeyPatch) -> None:
+        calls = []
+
+        def send(method: str, url: str, **kwargs: Any) -> requests.Response:
+            calls.append((method, kwargs["timeout"]))
+            raise requests.ConnectionError()
+
+        monkeypatch.setattr(HttpUtils, "_send_http_request", send)
+        monkeypatch.setattr(
+            HttpUtils, "HEALTH_POLICY", HttpUtils.HEALTH_POLICY._replace(initial_wait=0)
+        )
+        with pytest.raises(requests.ConnectionError):
+            Oikotool()._ping_healthchecks_io("https://hc-ping.com/uuid")
+
+        policy = HttpUtils.HEALTH_POLICY
+        assert calls == [("POST", policy.timeout)] * policy.attempts
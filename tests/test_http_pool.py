@@ -0,0 +1,54 @@
+# SPDX-License-Identifier: MIT
+
+import threading
+from collections.abc import Iterator
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+
+from oikotool.utils import HttpUtils
+
+
+class KeepAliveHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+
+    def do_GET(self) -> None:
+        body = b"ok"
+        self.send_response(200)
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format: str, *args: object) -> None:
+        pass
+
+
+@pytest.fixture
+def server_url() -> Iterator[str]:
+    server = ThreadingHTTPServer(("127.0.0.1", 0), KeepAliveHandler)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    yield f"http://127.0.0.1:{server.server_address[1]}/"
+    server.shutdown()
+    server.server_close()
+
+
+class TestHttpPool:
+    def test_session_is_shared(self) -> None:
+        assert HttpUtils._get_session() is HttpUtils._get_session()
+
+    def test_connections_are_reused(self, server_url: str) -> None:
+        before = HttpUtils.connection_stats()
+        for _ in range(5):
+            HttpUtils.get_with_retry(server_url)
+        after = HttpUtils.connection_stats()
+
+        assert after["requests"] - before["requests"] == 5
+        assert after["connections"] - before["connections"] == 1
+        assert after["reused"] - before["reused"] == 4
+
+    def test_set_pool_size(self, server_url: str) -> None:
+        HttpUtils.set_pool_size(server_url, 4)
+        adapter = HttpUtils._get_session().get_adapter(server_url)
+        assert adapter is not HttpUtils._get_session().get_adapter("https://x/")
+        assert HttpUtils.get_with_retry(server_url).text == "ok"
@@ -0,0 +1,58 @@
+# SPDX-License-Identifier: MIT
+
+import pytest
+import requests
+from mocks import MockHtmlProvider, MockListingProvider
+
+from oikotool.core import Oikotool
+from oikotool.models import Listing
+from oikotool.utils import HttpUtils
+
+
+class TestListingDetailsFromCard:
+    def test_complete_listing(self) -> None:
+        oikotool = Oikotool()
+        listing = MockListingProvider()
+        result = oikotool._get_listing_details_from_card(
+            Listing.from_card(listing.complete_listing)
+        )
+        expected = (
+            "Oikotie 1, Kaivopuisto, Helsinki",
+            ["https://cdn.asunnot.oikotie.fi/b2lrb3RpZS5maQo=/12345678"],
+        )
+        assert result == expected
+
+    def test_undefined_image(self) -> None:
+        oikotool = Oikotool()
+        listing = MockListingProvider()
+        result = oikotool._get_listing_details_from_card(
+            Listing.from_card(listing.undefined_image)
+        )
+        assert result is None
+
+    def test_missing_location(self) -> None:
+        oikotool = Oikotool()
+        listing = MockListingProvider().complete_listing
+        del listing["location"]
+        result = oikotool._get_listing_details_from_card(Listing.from_card(listing))
+        expected = (None, ["https://cdn.asunnot.oikotie.fi/b2lrb3RpZS5maQo=/12345678"])
+        assert result == expected
+
+    def test_address_matches_listing_page(
+        self, monkeypatch: pytest.MonkeyPatch
+    ) -> None:
+        oikotool = Oikotool()
+        listing = MockListingProvider().complete_listing
+        listing["location"]["address"] = "Mäkelänkatu 2a"
+        page = MockHtmlProvider().listing_images_page.replace(
+            "Oikotie 1", "Mäkelänkatu 2a"
+        )
+        response = requests.Response()
+        response._content = page.encode()
+        response.encoding = "utf-8"
+        monkeypatch.setattr(HttpUtils, "get_with_retry", lambda *a, **k: response)
+
+        result = oikotool._get_listing_details_from_card(Listing.from_card(listing))
+        assert result is not None
+        assert result[0] == "Mäkelänkatu 2a, Kaivopuisto, Helsinki"
+        assert result[0] == oikotool._get_listing_details(listing["url"])[0]
@@ -2,7 +2,25 @@
 
 from mocks import MockListingProvider
 
-from oikotool.formatters import ListingBaseFormatter
+from oikotool.formatters import (
+    ListingBaseFormatter,
+    ListingBatchFormatter,
+    ListingSlackFormatter,
+)
+from oikotool.translations import Language, Translations
+
+MOCK_LISTINGS = [
+    "complete_listing",
+    "float_size",
+    "lowercase_address",
+    "undefined_district",
+    "undefined_image",
+    "undefined_price",
+    "undefined_size",
+    "uppercase_address",
+    "zero_price",
+    "zero_size",
+]
 
 
 class TestListingBaseFormatter:
@@ -75,3 +93,24 @@ class TestListingBaseFormatter:
         result = formatter.size
         expected = ""
         assert result == expected
+
+
+class TestListingBatchFormatter:
+    def test_same_output_as_listing_formatters(self) -> None:
+        mock = MockListingProvider()
+        cards = [getattr(mock, name) for name in MOCK_LISTINGS] + mock.large_card_set
+        translations = Translations(Language.FINNISH)
+        result = ListingBatchFormatter().format(cards)
+
+        assert len(result) == len(cards)
+        for card, formatted in zip(cards, result):
+            base = ListingBaseFormatter(card)
+            slack = ListingSlackFormatter(card, translations)
+            assert formatted.id == str(card["cardId"])
+            assert formatted.url == card["url"]
+            assert formatted.address == base.address
+            assert formatted.price == base.price
+            assert formatted.size == base.size
+            assert formatted.image == base.image
+            assert (formatted.price or translations.empty_field) == slack.price
+            assert (formatted.size or translations.empty_field) == slack.size
@@ -0,0 +1,50 @@
+# SPDX-License-Identifier: MIT
+
+from mocks import MockListingProvider
+
+from oikotool.formatters import ListingBaseFormatter
+from oikotool.models import Listing
+
+
+class TestListing:
+    def test_from_card(self) -> None:
+        card = MockListingProvider().complete_listing
+        card["meta"] = {"published": "2024-05-01T12:00:00"}
+        listing = Listing.from_card(card)
+        assert listing == Listing(
+            id="12345678",
+            url="https://asunnot.oikotie.fi/myytavat-asunnot/helsinki/12345678",
+            address="Oikotie 1",
+            district="Kaivopuisto",
+            city="Helsinki",
+            price="650 000 €",
+            size="75 m²",
+            images=("https://cdn.asunnot.oikotie.fi/b2lrb3RpZS5maQo=/12345678",),
+            published="2024-05-01T12:00:00",
+        )
+        assert listing.image == listing.images[0]
+        assert not hasattr(listing, "__dict__")
+
+    def test_malformed_card(self) -> None:
+        card = {
+            "cardId": 1,
+            "location": None,
+            "data": {"price": 0, "size": ["75"]},
+            "medias": [None, {"imageLargeJPEG": None}, {"imageLargeJPEG": "a.jpg"}],
+        }
+        listing = Listing.from_card(card)
+        assert listing.id == "1"
+        assert listing.url == ""
+        assert listing.address is None
+        assert listing.price == "0"
+        assert listing.size is None
+        assert listing.images == ("a.jpg",)
+        assert Listing.from_card(None).id is None
+
+    def test_formatter_accepts_cards(self) -> None:
+        card = MockListingProvider().complete_listing
+        listing = Listing.from_card(card)
+        for value in (card, listing):
+            formatter = ListingBaseFormatter(value)
+            assert formatter.address == "Oikotie 1, Kaivopuisto, Helsinki"
+            assert formatter.price == "650 000 €"
@@ -0,0 +1,84 @@
+# SPDX-License-Identifier: MIT
+
+import json
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+
+import pytest
+
+from oikotool import metrics
+from oikotool.core import Oikotool
+from oikotool.fakeserver import FakeOikotieServer, FakeServerConfig
+from oikotool.metrics import RunMetrics
+
+
+class TestRunMetrics:
+    def test_without_run_nothing_is_recorded(self) -> None:
+        metrics.count("requests")
+        with metrics.timed("api"):
+            pass
+        assert metrics.current() is None
+
+    def test_wrapped_work_records_into_run(self) -> None:
+        run = RunMetrics("save")
+        with metrics.activate(run):
+            with ThreadPoolExecutor(max_workers=2) as executor:
+                list(
+                    executor.map(metrics.wrap(lambda n: metrics.count("n", n)), [1, 2])
+                )
+            # Unwrapped work in other threads belongs to no run
+            executor = ThreadPoolExecutor(max_workers=1)
+            executor.submit(metrics.count, "n", 10).result()
+            executor.shutdown()
+        assert run.counters == {"n": 3}
+
+    def test_prometheus_format(self) -> None:
+        run = RunMetrics("check", 'a"b')
+        run.add("new_listings", 2)
+        run.add_time("api", 0.5)
+        run.finish(RuntimeError("failed"))
+        text = run.to_prometheus()
+
+        assert 'oikotool_run_success{command="check",name="a\\"b"} 0' in text
+        assert (
+            'oikotool_phase_duration_seconds{command="check",name="a\\"b",phase="api"} 0.5'
+            in text
+        )
+        assert "# TYPE oikotool_new_listings gauge" in text
+        assert json.loads(run.to_json())["error"] == "failed"
+
+
+class TestCheckMetrics:
+    def test_check_writes_metrics(self, tmp_path: Path) -> None:
+        config = FakeServerConfig(listings=5, images=1, image_size=16)
+        with FakeOikotieServer(config=config) as server:
+            oikotool = Oikotool(base_url=server.url, metrics_dir=tmp_path / "metrics")
+            oikotool.check(
+                url=f"{server.url}myytavat-asunnot?cardType=100",
+                name="fake",
+                limit=10,
+                cache_dir=tmp_path,
+                slack_url=f"{server.url}slack/hook",
+                healthchecks_url=f"{server.url}health/hc",
+                quiet=True,
+            )
+            with pytest.raises(Exception):
+                oikotool.check(
+                    url="https://example.com/?cardType=100",
+                    name="fake",
+                    limit=10,
+                    cache_dir=tmp_path,
+                )
+
+        lines = (tmp_path / "metrics" / Oikotool.METRICS_FILE).read_text().splitlines()
+        first, second = [json.loads(line) for line in lines]
+        assert first["success"] and not second["success"]
+        assert {"session", "api", "filter", "seen_file", "slack", "health"} <= set(
+            first["phases"]
+        )
+        assert first["counters"]["new_listings"] == 5
+        assert first["counters"]["slack_messages"] == 5
+        assert first["counters"]["http_requests"] == 8
+
+        prom = (tmp_path / "metrics" / "check-fake.prom").read_text()
+        assert 'oikotool_run_success{command="check",name="fake"} 0' in prom
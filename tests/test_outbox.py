@@ -0,0 +1,171 @@
+# SPDX-License-Identifier: MIT
+
+import time
+from pathlib import Path
+from typing import Any, Optional
+
+import pytest
+import requests
+from mocks import MockListingProvider
+
+from oikotool.core import Oikotool
+from oikotool.exceptions import OikotoolDeadlineError
+from oikotool.models import Listing
+from oikotool.outbox import SlackOutbox
+
+
+def mock_listings(*card_ids: int) -> list[Listing]:
+    listings = []
+    for card_id in card_ids:
+        listing = MockListingProvider().complete_listing
+        listing["cardId"] = card_id
+        listings.append(Listing.from_card(listing))
+    return listings
+
+
+class TestSlackOutbox:
+    def test_drain_keeps_order_and_stops_on_failure(self, tmp_path: Path) -> None:
+        outbox = SlackOutbox(tmp_path)
+        outbox.enqueue("https://slack", [(["1"], "a"), (["2"], "b")])
+        outbox.enqueue("https://slack", [(["3"], "c")])
+        posted = []
+
+        def post(url: str, payload: str, deadline: Optional[float]) -> None:
+            if payload == "b" and "failed" not in posted:
+                posted.append("failed")
+                raise RuntimeError("Slack is down")
+            posted.append(payload)
+
+        with pytest.raises(RuntimeError):
+            outbox.drain(post)
+        assert posted == ["a", "failed"]
+        assert outbox.pending() == 2
+
+        assert outbox.drain(post) == 2
+        assert posted == ["a", "failed", "b", "c"]
+        assert outbox.pending() == 0
+        assert set(outbox.read_known_ids()) == {"1", "2", "3"}
+
+    def test_rejected_message_is_moved_aside(
+        self, tmp_path: Path, capsys: pytest.CaptureFixture[str]
+    ) -> None:
+        outbox = SlackOutbox(tmp_path)
+        outbox.enqueue("https://slack", [(["1"], "a"), (["2"], "b")])
+        posted = []
+
+        def post(url: str, payload: str, deadline: Optional[float]) -> None:
+            response = requests.Response()
+            response.status_code = 400 if payload == "a" else 503
+            if payload == "a" or "b" in posted:
+                raise requests.HTTPError("Slack error", response=response)
+            posted.append(payload)
+
+        assert outbox.drain(post) == 1
+        assert posted == ["b"]
+        assert outbox.pending() == 0
+        assert len(list((tmp_path / SlackOutbox.FAILED_DIR).glob("*.json"))) == 1
+        assert "Slack rejected a message" in capsys.readouterr().err
+
+        outbox.enqueue("https://slack", [(["3"], "c")])
+        with pytest.raises(requests.HTTPError):
+            outbox.drain(post)
+        assert outbox.pending() == 1
+
+    def test_drain_budget(self, tmp_path: Path) -> None:
+        outbox = SlackOutbox(tmp_path)
+        outbox.enqueue("https://slack", [(["1"], "a")])
+        assert outbox.drain(lambda url, payload, deadline: None, budget=0) == 0
+        assert outbox.pending() == 1
+
+    def test_drain_budget_runs_out_during_post(self, tmp_path: Path) -> None:
+        outbox = SlackOutbox(tmp_path)
+        outbox.enqueue("https://slack", [(["1"], "a"), (["2"], "b")])
+        deadlines = []
+
+        def post(url: str, payload: str, deadline: Optional[float]) -> None:
+            deadlines.append(deadline)
+            if payload == "b":
+                raise OikotoolDeadlineError("Deadline exceeded for https://slack.")
+
+        start = time.monotonic()
+        assert outbox.drain(post, budget=10) == 1
+        assert outbox.pending() == 1
+        assert all(d is not None and start + 10 <= d for d in deadlines)
+
+        with pytest.raises(OikotoolDeadlineError):
+            outbox.drain(post)
+        assert outbox.pending() == 1
+
+
+class TestCheckOutbox:
+    def test_failed_delivery_is_retried_without_duplicates(
+        self, tmp_path: Path, monkeypatch: pytest.MonkeyPatch
+    ) -> None:
+        oikotool = Oikotool()
+        listings = mock_listings(1, 2)
+        posted: list[str] = []
+        failing = True
+
+        def get_unseen_listings(*args: Any) -> tuple[list[str], list[Listing]]:
+            return [str(s.id) for s in listings], listings
+
+        def post(url: str, payload: str, deadline: Optional[float]) -> None:
+            if failing:
+                raise RuntimeError("Slack is down")
+            posted.append(payload)
+
+        monkeypatch.setattr(oikotool, "_get_unseen_listings", get_unseen_listings)
+        monkeypatch.setattr(oikotool, "_post_slack_message", post)
+        monkeypatch.setattr(oikotool, "_ping_health_services", lambda *a, **k: None)
+
+        def check() -> None:
+            oikotool.check(
+                url="https://asunnot.oikotie.fi/myytavat-asunnot?cardType=100",
+                name="test",
+                limit=10,
+                cache_dir=tmp_path,
+                slack_url="https://slack",
+                quiet=True,
+            )
+
+        with pytest.raises(RuntimeError):
+            check()
+        assert (tmp_path / "test" / Oikotool.LISTINGS_FILE).read_text() == "1\n2\n"
+
+        # A crashed run that did not record the listings returns them again
+        failing = False
+        check()
+        assert len(posted) == 2
+        assert oikotool.drain(tmp_path, quiet=True) == 0
+        assert len(posted) == 2
+
+    def test_budget_running_out_leaves_message_queued(
+        self,
+        tmp_path: Path,
+        monkeypatch: pytest.MonkeyPatch,
+        capsys: pytest.CaptureFixture[str],
+    ) -> None:
+        oikotool = Oikotool()
+        listings = mock_listings(1)
+
+        def get_unseen_listings(*args: Any) -> tuple[list[str], list[Listing]]:
+            return [str(s.id) for s in listings], listings
+
+        def post(url: str, payload: str, deadline: Optional[float]) -> None:
+            raise OikotoolDeadlineError("Deadline exceeded for https://slack.")
+
+        monkeypatch.setattr(oikotool, "_get_unseen_listings", get_unseen_listings)
+        monkeypatch.setattr(oikotool, "_post_slack_message", post)
+        monkeypatch.setattr(oikotool, "_ping_health_services", lambda *a, **k: None)
+        oikotool.check(
+            url="https://asunnot.oikotie.fi/myytavat-asunnot?cardType=100",
+            name="test",
+            limit=10,
+            cache_dir=tmp_path,
+            slack_url="https://slack",
+            slack_budget=5,
+            quiet=True,
+        )
+
+        assert SlackOutbox(tmp_path / "test" / Oikotool.OUTBOX_DIR).pending() == 1
+        assert "1 message(s) of 'test' left queued" in capsys.readouterr().err
@@ -0,0 +1,104 @@
+# SPDX-License-Identifier: MIT
+
+from typing import Any
+from urllib.parse import parse_qsl, urlsplit
+
+import pytest
+
+from oikotool.core import Oikotool
+from oikotool.seen import SeenListings
+
+QUERY_URL = "https://asunnot.oikotie.fi/myytavat-asunnot?cardType=100"
+
+
+def mock_api(
+    oikotool: Oikotool, monkeypatch: pytest.MonkeyPatch, total: int
+) -> list[int]:
+    requested_pages = []
+
+    def fetch(url: str) -> Any:
+        params = dict(parse_qsl(urlsplit(url).query))
+        page, limit = int(params["pagination"]), int(params["limit"])
+        requested_pages.append(page)
+        # Card IDs count down from the newest listing
+        ids = range(total - (page - 1) * limit, max(total - page * limit, 0), -1)
+        return {"cards": [{"cardId": i} for i in ids]}
+
+    monkeypatch.setattr(oikotool, "_fetch_api_data", fetch)
+    return requested_pages
+
+
+class TestPagination:
+    def test_page_url(self) -> None:
+        oikotool = Oikotool()
+        url = oikotool._prepare_api_url(QUERY_URL, limit=5)
+        result = oikotool._prepare_api_page_url(url, 3)
+        expected = "https://asunnot.oikotie.fi/api/search?cardType=100&sortBy=published_sort_desc&limit=5&pagination=3"
+        assert result == expected
+
+    def test_stops_at_seen_listing(self, monkeypatch: pytest.MonkeyPatch) -> None:
+        oikotool = Oikotool()
+        requested_pages = mock_api(oikotool, monkeypatch, total=100)
+        url = oikotool._prepare_api_url(QUERY_URL, limit=5)
+        seen = SeenListings(str(i) for i in range(1, 89))
+
+        listings = oikotool._fetch_listings(url, seen, pages=10)
+        new_ids, _ = oikotool._filter_unseen_listings(listings, seen)
+
+        assert requested_pages == [1, 2, 3]
+        assert new_ids == [str(i) for i in range(89, 101)]
+
+    def test_overlapping_pages_are_deduplicated(
+        self, monkeypatch: pytest.MonkeyPatch
+    ) -> None:
+        oikotool = Oikotool()
+        pages = [[10, 9], [9, 8], [7, 6]]
+
+        def fetch(url: str) -> Any:
+            page = int(dict(parse_qsl(urlsplit(url).query))["pagination"])
+            return {"cards": [{"cardId": i} for i in pages[page - 1]]}
+
+        monkeypatch.setattr(oikotool, "_fetch_api_data", fetch)
+        url = oikotool._prepare_api_url(QUERY_URL, limit=2)
+        seen = SeenListings(["6"])
+
+        listings = oikotool._fetch_listings(url, seen, pages=3)
+        new_ids, _ = oikotool._filter_unseen_listings(listings, seen)
+
+        assert new_ids == ["7", "8", "9", "10"]
+
+    def test_stops_at_page_limit(self, monkeypatch: pytest.MonkeyPatch) -> None:
+        oikotool = Oikotool()
+        requested_pages = mock_api(oikotool, monkeypatch, total=100)
+        url = oikotool._prepare_api_url(QUERY_URL, limit=5)
+
+        listings = oikotool._fetch_listings(url, SeenListings(["1"]), pages=4)
+        assert requested_pages == [1, 2, 3, 4]
+        assert len(listings) == 20
+
+    def test_stops_at_last_page(self, monkeypatch: pytest.MonkeyPatch) -> None:
+        oikotool = Oikotool()
+        requested_pages = mock_api(oikotool, monkeypatch, total=12)
+        url = oikotool._prepare_api_url(QUERY_URL, limit=5)
+
+        listings = oikotool._fetch_listings(url, SeenListings(["100"]), pages=10)
+        assert requested_pages == [1, 2, 3]
+        assert len(listings) == 12
+
+    def test_first_run_fetches_one_page(self, monkeypatch: pytest.MonkeyPatch) -> None:
+        oikotool = Oikotool()
+        requested_pages = mock_api(oikotool, monkeypatch, total=100)
+        url = oikotool._prepare_api_url(QUERY_URL, limit=5)
+
+        oikotool._fetch_listings(url, SeenListings(), pages=10)
+        assert requested_pages == [1]
+
+    def test_prefetch(self, monkeypatch: pytest.MonkeyPatch) -> None:
+        oikotool = Oikotool()
+        requested_pages = mock_api(oikotool, monkeypatch, total=100)
+        url = oikotool._prepare_api_url(QUERY_URL, limit=5)
+        seen = SeenListings(str(i) for i in range(1, 89))
+
+        listings = oikotool._fetch_listings(url, seen, pages=10, prefetch=True)
+        assert requested_pages == [1, 2, 3, 4]
+        assert len(listings) == 15
@@ -0,0 +1,40 @@
+# SPDX-License-Identifier: MIT
+
+import threading
+from pathlib import Path
+
+from oikotool.profiling import Profiler
+
+
+def build_strings(n: int) -> list[str]:
+    return [str(i) * 10 for i in range(n)]
+
+
+class TestProfiler:
+    def test_reports_include_threads(self, tmp_path: Path) -> None:
+        profiler = Profiler(tmp_path / "profiles", "check", memory=True)
+        profiler.start()
+        thread = threading.Thread(target=build_strings, args=(1000,))
+        thread.start()
+        thread.join()
+        kept = build_strings(10000)
+        paths = profiler.stop()
+
+        assert [p.name[16:] for p in paths] == [
+            "check.prof",
+            "check.txt",
+            "check-memory.txt",
+        ]
+        assert all(p.parent == tmp_path / "profiles" for p in paths)
+        report = paths[1].read_text()
+        assert "build_strings" in report
+        assert "test_profiling.py" in paths[2].read_text()
+        assert len(kept) == 10000
+
+    def test_memory_is_optional(self, tmp_path: Path) -> None:
+        profiler = Profiler(tmp_path, "save")
+        profiler.start()
+        build_strings(10)
+        paths = profiler.stop()
+        assert [p.suffix for p in paths] == [".prof", ".txt"]
+        assert all(p.exists() for p in paths)
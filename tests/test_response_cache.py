@@ -0,0 +1,99 @@
+# SPDX-License-Identifier: MIT
+
+import threading
+import time
+from pathlib import Path
+from typing import Any
+
+import pytest
+import requests
+
+from oikotool.cache import ResponseCache
+from oikotool.core import Oikotool
+
+
+class TestResponseCache:
+    def test_canonicalize(self) -> None:
+        url = "https://Asunnot.oikotie.fi/api/search?limit=10&cardType=100&b=&a=1"
+        result = ResponseCache.canonicalize(url)
+        expected = "https://asunnot.oikotie.fi/api/search?a=1&b=&cardType=100&limit=10"
+        assert result == expected
+
+    def test_response_is_shared(self, tmp_path: Path) -> None:
+        fetches = []
+
+        def fetch() -> Any:
+            fetches.append(1)
+            return {"cards": [{"cardId": 1}]}
+
+        url = "https://asunnot.oikotie.fi/api/search?a=1&b=2"
+        first = ResponseCache(tmp_path, ttl=60).get_or_fetch(url, fetch)
+        url = "https://asunnot.oikotie.fi/api/search?b=2&a=1"
+        second = ResponseCache(tmp_path, ttl=60).get_or_fetch(url, fetch)
+
+        assert first == second == {"cards": [{"cardId": 1}]}
+        assert len(fetches) == 1
+
+    def test_expired_response_is_fetched(self, tmp_path: Path) -> None:
+        fetches = []
+
+        def fetch() -> Any:
+            fetches.append(1)
+            return len(fetches)
+
+        cache = ResponseCache(tmp_path, ttl=0.05)
+        assert cache.get_or_fetch("https://x/?a=1", fetch) == 1
+        time.sleep(0.1)
+        assert cache.get_or_fetch("https://x/?a=1", fetch) == 2
+
+    def test_disabled_cache(self, tmp_path: Path) -> None:
+        cache = ResponseCache(tmp_path, ttl=0)
+        assert cache.get_or_fetch("https://x/?a=1", lambda: 1) == 1
+        assert cache.get_or_fetch("https://x/?a=1", lambda: 2) == 2
+        assert not list(tmp_path.iterdir())
+
+    def test_concurrent_misses_fetch_once(self, tmp_path: Path) -> None:
+        fetches = []
+        results = []
+
+        def fetch() -> Any:
+            fetches.append(1)
+            time.sleep(0.1)
+            return "data"
+
+        def get() -> None:
+            cache = ResponseCache(tmp_path, ttl=60)
+            results.append(cache.get_or_fetch("https://x/?a=1", fetch))
+
+        threads = [threading.Thread(target=get) for _ in range(5)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        assert results == ["data"] * 5
+        assert len(fetches) == 1
+
+    def test_cache_is_only_used_when_enabled(
+        self, tmp_path: Path, monkeypatch: pytest.MonkeyPatch
+    ) -> None:
+        fetches = []
+
+        def fetch(url: str) -> Any:
+            fetches.append(url)
+            response = requests.Response()
+            response._content = b"[]"
+            return response
+
+        oikotool = Oikotool(cache_dir=tmp_path)
+        monkeypatch.setattr(oikotool, "_fetch_api_response", fetch)
+        oikotool._fetch_api_data("https://x/?a=1")
+        oikotool._fetch_api_data("https://x/?a=1")
+        assert len(fetches) == 2
+        assert not (tmp_path / Oikotool.API_CACHE_DIR).exists()
+
+        oikotool = Oikotool(cache_dir=tmp_path, api_cache=True)
+        monkeypatch.setattr(oikotool, "_fetch_api_response", fetch)
+        oikotool._fetch_api_data("https://x/?a=1")
+        oikotool._fetch_api_data("https://x/?a=1")
+        assert len(fetches) == 3
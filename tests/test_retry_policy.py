@@ -0,0 +1,162 @@
+# SPDX-License-Identifier: MIT
+
+import threading
+import time
+from collections.abc import Iterator
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Any
+
+import pytest
+import requests
+
+from oikotool.exceptions import OikotoolCircuitOpenError, OikotoolDeadlineError
+from oikotool.utils import CircuitBreaker, HttpUtils, RetryPolicy
+
+FAST_POLICY = RetryPolicy(attempts=3, initial_wait=0, max_wait=0, jitter=0, timeout=5)
+
+
+class StatusHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+    requests: list[str] = []
+
+    def do_GET(self) -> None:
+        self.requests.append(self.path)
+        # Paths look like /503/503/200, one status per attempt
+        statuses = self.path.strip("/").split("/")
+        status = int(statuses[min(self.requests.count(self.path), len(statuses)) - 1])
+        body = b"ok"
+        self.send_response(status)
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format: str, *args: object) -> None:
+        pass
+
+
+@pytest.fixture
+def server_url() -> Iterator[str]:
+    StatusHandler.requests = []
+    server = ThreadingHTTPServer(("127.0.0.1", 0), StatusHandler)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    yield f"http://127.0.0.1:{server.server_address[1]}"
+    server.shutdown()
+    server.server_close()
+
+
+class TestRetryPolicy:
+    def test_retryable_status_is_retried(self, server_url: str) -> None:
+        url = f"{server_url}/503/502/200"
+        response = HttpUtils.get_with_retry(url, policy=FAST_POLICY)
+        assert response.status_code == 200
+        assert len(StatusHandler.requests) == 3
+
+    def test_client_error_is_not_retried(self, server_url: str) -> None:
+        with pytest.raises(requests.HTTPError):
+            HttpUtils.get_with_retry(f"{server_url}/404", policy=FAST_POLICY)
+        assert len(StatusHandler.requests) == 1
+
+    def test_retries_respect_deadline(
+        self, server_url: str, monkeypatch: pytest.MonkeyPatch
+    ) -> None:
+        monkeypatch.setattr(HttpUtils, "_deadline", None)
+        policy = FAST_POLICY._replace(initial_wait=10, max_wait=10)
+        HttpUtils.set_deadline(1)
+
+        start = time.monotonic()
+        with pytest.raises(requests.HTTPError):
+            HttpUtils.get_with_retry(f"{server_url}/500/200", policy=policy)
+        assert time.monotonic() - start < 1
+        assert len(StatusHandler.requests) == 1
+
+        HttpUtils.set_deadline(0)
+        with pytest.raises(OikotoolDeadlineError):
+            HttpUtils.get_with_retry(f"{server_url}/200", policy=policy)
+
+    def test_request_deadline_limits_timeout_and_retries(
+        self, server_url: str, monkeypatch: pytest.MonkeyPatch
+    ) -> None:
+        monkeypatch.setattr(HttpUtils, "_deadline", None)
+        policy = FAST_POLICY._replace(initial_wait=10, max_wait=10, timeout=60)
+        session = HttpUtils._get_session()
+        request = session.request
+        timeouts = []
+
+        def request_timed(method: str, url: str, **kwargs: Any) -> Any:
+            timeouts.append(kwargs["timeout"])
+            return request(method, url, **kwargs)
+
+        monkeypatch.setattr(session, "request", request_timed)
+        start = time.monotonic()
+        with pytest.raises(OikotoolDeadlineError) as e:
+            HttpUtils.get_with_retry(
+                f"{server_url}/503/200", policy=policy, deadline=start + 1
+            )
+        assert isinstance(e.value.__cause__, requests.HTTPError)
+        assert time.monotonic() - start < 1
+        assert len(StatusHandler.requests) == 1
+        assert timeouts[0] <= 1
+
+        with pytest.raises(OikotoolDeadlineError):
+            HttpUtils.get_with_retry(
+                f"{server_url}/200", policy=policy, deadline=time.monotonic()
+            )
+        assert len(StatusHandler.requests) == 1
+
+    def test_circuit_opens_after_upstream_errors(
+        self, server_url: str, monkeypatch: pytest.MonkeyPatch
+    ) -> None:
+        monkeypatch.setattr(HttpUtils, "CIRCUIT_THRESHOLD", 2)
+        with pytest.raises(OikotoolCircuitOpenError):
+            HttpUtils.get_with_retry(f"{server_url}/500", policy=FAST_POLICY)
+        with pytest.raises(OikotoolCircuitOpenError):
+            HttpUtils.get_with_retry(f"{server_url}/200", policy=FAST_POLICY)
+        assert len(StatusHandler.requests) == 2
+
+    def test_rate_limited_trial_closes_circuit(
+        self, server_url: str, monkeypatch: pytest.MonkeyPatch
+    ) -> None:
+        monkeypatch.setattr(HttpUtils, "CIRCUIT_THRESHOLD", 1)
+        monkeypatch.setattr(HttpUtils, "CIRCUIT_COOLDOWN", 0.05)
+        with pytest.raises(requests.HTTPError):
+            HttpUtils.get_with_retry(
+                f"{server_url}/500", policy=FAST_POLICY._replace(attempts=1)
+            )
+        with pytest.raises(OikotoolCircuitOpenError):
+            HttpUtils.get_with_retry(f"{server_url}/200", policy=FAST_POLICY)
+
+        time.sleep(0.06)
+        response = HttpUtils.get_with_retry(f"{server_url}/429/200", policy=FAST_POLICY)
+        assert response.status_code == 200
+        assert len(StatusHandler.requests) == 3
+
+
+class TestCircuitBreaker:
+    def test_trial_request_after_cooldown(self) -> None:
+        breaker = CircuitBreaker(threshold=2, cooldown=0.05)
+        breaker.record_failure()
+        breaker.before_request("host")
+        breaker.record_failure()
+        with pytest.raises(OikotoolCircuitOpenError):
+            breaker.before_request("host")
+
+        time.sleep(0.06)
+        breaker.before_request("host")
+        with pytest.raises(OikotoolCircuitOpenError):
+            breaker.before_request("host")
+
+        breaker.record_success()
+        breaker.before_request("host")
+
+    def test_every_trial_outcome_ends_trial(self) -> None:
+        breaker = CircuitBreaker(threshold=1, cooldown=0)
+        breaker.record_failure()
+        breaker.before_request("host")
+        breaker.release_trial()
+        breaker.before_request("host")
+        breaker.record_failure()
+        breaker.before_request("host")
+        breaker.record_success()
+        breaker.before_request("host")
+        breaker.before_request("host")
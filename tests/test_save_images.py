@@ -0,0 +1,249 @@
+# SPDX-License-Identifier: MIT
+
+import hashlib
+import io
+import json
+import random
+import time
+from pathlib import Path
+from typing import Any, Optional
+
+import pytest
+import requests
+from mocks import MockListingProvider
+
+from oikotool.core import Oikotool
+from oikotool.models import Listing
+from oikotool.utils import HttpUtils
+
+CDN_URL = Oikotool.OIKOTIE_ASUNNOT_CDN_URL
+
+
+class MockImageResponse(requests.Response):
+    def __init__(
+        self, content: bytes, status_code: int = 200, etag: Optional[str] = None
+    ) -> None:
+        super().__init__()
+        self.status_code = status_code
+        self.headers["Content-Type"] = "image/jpeg"
+        if etag:
+            self.headers["ETag"] = etag
+        self.raw = io.BytesIO(content)
+
+
+def mock_images(count: int) -> list[str]:
+    return [f"{CDN_URL}b2lrb3RpZS5maQo=/{i}" for i in range(count)]
+
+
+class TestSaveImages:
+    def test_images_saved_in_order(
+        self,
+        tmp_path: Path,
+        monkeypatch: pytest.MonkeyPatch,
+        capsys: pytest.CaptureFixture[str],
+    ) -> None:
+        images = mock_images(20)
+
+        def get(url: str, headers: Optional[Any] = None, **kwargs: Any) -> Any:
+            time.sleep(random.uniform(0, 0.01))
+            return MockImageResponse(url.encode())
+
+        oikotool = Oikotool()
+        monkeypatch.setattr(oikotool, "_get_listing_details", lambda _: (None, images))
+        monkeypatch.setattr(HttpUtils, "get_with_retry", get)
+        oikotool.save("https://asunnot.oikotie.fi/x/12345678", tmp_path, jobs=8)
+
+        expected = [tmp_path / f"{i}.jpeg" for i in range(20)]
+        lines = capsys.readouterr().out.splitlines()
+        assert lines == [f"Saved file: {path}" for path in expected]
+        for url, path in zip(images, expected):
+            assert path.read_bytes() == url.encode()
+        assert not list(tmp_path.glob("*.part"))
+
+    def test_failed_download_leaves_no_file(
+        self, tmp_path: Path, monkeypatch: pytest.MonkeyPatch
+    ) -> None:
+        def get(url: str, headers: Optional[Any] = None, **kwargs: Any) -> Any:
+            response = MockImageResponse(b"")
+            response.raw = None
+            return response
+
+        oikotool = Oikotool()
+        monkeypatch.setattr(
+            oikotool, "_get_listing_details", lambda _: (None, mock_images(1))
+        )
+        monkeypatch.setattr(HttpUtils, "get_with_retry", get)
+        with pytest.raises(AttributeError):
+            oikotool.save("https://asunnot.oikotie.fi/x/12345678", tmp_path, quiet=True)
+
+        assert not list(tmp_path.glob("0.*"))
+
+    def test_unchanged_images_are_skipped(
+        self,
+        tmp_path: Path,
+        monkeypatch: pytest.MonkeyPatch,
+        capsys: pytest.CaptureFixture[str],
+    ) -> None:
+        images = mock_images(2)
+        requests_headers = []
+
+        def get(url: str, headers: Optional[Any] = None, **kwargs: Any) -> Any:
+            requests_headers.append(headers)
+            if headers and headers.get("If-None-Match") == '"v1"':
+                return MockImageResponse(b"", status_code=304)
+            return MockImageResponse(b"image", etag='"v1"')
+
+        oikotool = Oikotool()
+        monkeypatch.setattr(oikotool, "_get_listing_details", lambda _: (None, images))
+        monkeypatch.setattr(HttpUtils, "get_with_retry", get)
+        oikotool.save("https://asunnot.oikotie.fi/x/12345678", tmp_path)
+        oikotool.save("https://asunnot.oikotie.fi/x/12345678", tmp_path)
+
+        assert requests_headers[2:] == [{"If-None-Match": '"v1"'}] * 2
+        lines = capsys.readouterr().out.splitlines()
+        assert lines[2:] == [
+            f"Unchanged file: {tmp_path / f'{i}.jpeg'}" for i in range(2)
+        ]
+
+        manifest = json.loads((tmp_path / Oikotool.MANIFEST_FILE).read_text())
+        assert manifest["images"][images[0]] == {
+            "file": "0.jpeg",
+            "size": 5,
+            "etag": '"v1"',
+            "last_modified": None,
+            "sha256": hashlib.sha256(b"image").hexdigest(),
+        }
+
+    def test_partial_image_is_resumed(
+        self, tmp_path: Path, monkeypatch: pytest.MonkeyPatch
+    ) -> None:
+        images = mock_images(1)
+        manifest = {
+            images[0]: {
+                "file": "0.jpeg",
+                "size": None,
+                "etag": '"v1"',
+                "last_modified": None,
+                "sha256": None,
+            }
+        }
+        (tmp_path / Oikotool.MANIFEST_FILE).write_text(json.dumps({"images": manifest}))
+        (tmp_path / "0.jpeg.part").write_bytes(b"ima")
+
+        def get(url: str, headers: Optional[Any] = None, **kwargs: Any) -> Any:
+            assert headers == {"Range": "bytes=3-", "If-Range": '"v1"'}
+            return MockImageResponse(b"ge", status_code=206, etag='"v1"')
+
+        oikotool = Oikotool()
+        monkeypatch.setattr(oikotool, "_get_listing_details", lambda _: (None, images))
+        monkeypatch.setattr(HttpUtils, "get_with_retry", get)
+        oikotool.save("https://asunnot.oikotie.fi/x/12345678", tmp_path, quiet=True)
+
+        assert (tmp_path / "0.jpeg").read_bytes() == b"image"
+        manifest = json.loads((tmp_path / Oikotool.MANIFEST_FILE).read_text())
+        assert manifest["images"][images[0]]["sha256"] == (
+            hashlib.sha256(b"image").hexdigest()
+        )
+
+    def test_mismatched_partial_response_restarts_download(
+        self, tmp_path: Path, monkeypatch: pytest.MonkeyPatch
+    ) -> None:
+        images = mock_images(1)
+        manifest = {
+            images[0]: {
+                "file": "0.png",
+                "size": None,
+                "etag": '"v1"',
+                "last_modified": None,
+                "sha256": None,
+            }
+        }
+        (tmp_path / Oikotool.MANIFEST_FILE).write_text(json.dumps({"images": manifest}))
+        (tmp_path / "0.png.part").write_bytes(b"ima")
+        requests_headers = []
+
+        def get(url: str, headers: Optional[Any] = None, **kwargs: Any) -> Any:
+            requests_headers.append(headers)
+            if headers:
+                return MockImageResponse(b"ge", status_code=206, etag='"v1"')
+            return MockImageResponse(b"image", etag='"v1"')
+
+        oikotool = Oikotool()
+        monkeypatch.setattr(oikotool, "_get_listing_details", lambda _: (None, images))
+        monkeypatch.setattr(HttpUtils, "get_with_retry", get)
+        oikotool.save("https://asunnot.oikotie.fi/x/12345678", tmp_path, quiet=True)
+
+        assert requests_headers == [{"Range": "bytes=3-", "If-Range": '"v1"'}, {}]
+        assert (tmp_path / "0.jpeg").read_bytes() == b"image"
+        assert not list(tmp_path.glob("*.part"))
+
+    def test_save_many_listings(
+        self,
+        tmp_path: Path,
+        monkeypatch: pytest.MonkeyPatch,
+        capsys: pytest.CaptureFixture[str],
+    ) -> None:
+        listings = {
+            "https://asunnot.oikotie.fi/x/11111111": ("Oikotie 1", mock_images(3)),
+            "https://asunnot.oikotie.fi/x/22222222": (None, mock_images(1)),
+            "https://asunnot.oikotie.fi/x/33333333": ("Oikotie 3", mock_images(2)),
+        }
+
+        def get(url: str, headers: Optional[Any] = None, **kwargs: Any) -> Any:
+            return MockImageResponse(url.encode())
+
+        oikotool = Oikotool()
+        monkeypatch.setattr(oikotool, "_get_listing_details", listings.get)
+        monkeypatch.setattr(HttpUtils, "get_with_retry", get)
+        results = oikotool.save_many(list(listings), tmp_path, quiet=True, jobs=2)
+
+        assert [result.url for result in results] == list(listings)
+        assert [result.images for result in results] == [3, 0, 2]
+        assert results[1].error is not None
+        assert len(list((tmp_path / "Oikotie 1" / "Kuvat").glob("*.jpeg"))) == 3
+        assert len(list((tmp_path / "Oikotie 3" / "Kuvat").glob("*.jpeg"))) == 2
+
+        captured = capsys.readouterr()
+        assert captured.out == ""
+        assert "22222222" in captured.err
+
+
+class TestArchiveListings:
+    def test_failed_archive_does_not_fail_check(
+        self,
+        tmp_path: Path,
+        monkeypatch: pytest.MonkeyPatch,
+        capsys: pytest.CaptureFixture[str],
+    ) -> None:
+        listings = []
+        for card_id in (1, 2):
+            card = MockListingProvider().complete_listing
+            card["cardId"] = card_id
+            listings.append(Listing.from_card(card))
+        archived = []
+
+        def get_unseen_listings(*args: Any) -> tuple[list[str], list[Listing]]:
+            return [str(listing.id) for listing in listings], listings
+
+        def save_listing(url: str, *args: Any, **kwargs: Any) -> int:
+            if kwargs["listing"].id == "1":
+                raise requests.HTTPError("404 Client Error: Not Found")
+            archived.append(kwargs["listing"].id)
+            return 1
+
+        oikotool = Oikotool()
+        monkeypatch.setattr(oikotool, "_get_unseen_listings", get_unseen_listings)
+        monkeypatch.setattr(oikotool, "_save_listing", save_listing)
+        monkeypatch.setattr(oikotool, "_ping_health_services", lambda *a, **k: None)
+        oikotool.check(
+            url="https://asunnot.oikotie.fi/myytavat-asunnot?cardType=100",
+            name="test",
+            limit=10,
+            cache_dir=tmp_path,
+            archive_dir=tmp_path / "archive",
+            quiet=True,
+        )
+
+        assert archived == ["2"]
+        assert (tmp_path / "test" / Oikotool.LISTINGS_FILE).read_text() == "1\n2\n"
+        assert "404 Client Error" in capsys.readouterr().err
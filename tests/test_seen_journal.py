@@ -0,0 +1,59 @@
+# SPDX-License-Identifier: MIT
+
+from pathlib import Path
+
+import pytest
+
+from oikotool.seen import SeenListingsJournal
+
+
+class TestSeenListingsJournal:
+    def test_append_and_read(self, tmp_path: Path) -> None:
+        path = tmp_path / "seen.log"
+        journal = SeenListingsJournal(path)
+        journal.append(["1", "2"], limit=10)
+        journal.append(["2", "3"], limit=10)
+
+        assert path.read_text() == "1\n2\n3\n"
+        assert list(SeenListingsJournal(path).read()) == ["1", "2", "3"]
+
+    def test_no_write_without_new_ids(self, tmp_path: Path) -> None:
+        path = tmp_path / "seen.log"
+        SeenListingsJournal(path).append(["1", "2"], limit=10)
+        mtime = path.stat().st_mtime_ns
+
+        SeenListingsJournal(path).append([], limit=10)
+        SeenListingsJournal(path).append(["2"], limit=10)
+        assert path.stat().st_mtime_ns == mtime
+
+    def test_interrupted_append_is_recovered(self, tmp_path: Path) -> None:
+        path = tmp_path / "seen.log"
+        path.write_text("1\n2\n12")
+
+        journal = SeenListingsJournal(path)
+        assert list(journal.read()) == ["1", "2"]
+
+        journal.append(["123"], limit=10)
+        assert path.read_text() == "1\n2\n123\n"
+
+    def test_compaction(self, tmp_path: Path, monkeypatch: pytest.MonkeyPatch) -> None:
+        monkeypatch.setattr(SeenListingsJournal, "COMPACTION_MIN_SLACK", 0)
+        path = tmp_path / "seen.log"
+        journal = SeenListingsJournal(path)
+
+        journal.append(["1", "2", "3", "4", "5", "6"], limit=3)
+        assert path.read_text() == "1\n2\n3\n4\n5\n6\n"
+        journal.append(["7"], limit=3)
+        assert path.read_text() == "5\n6\n7\n"
+        journal.append(["8"], limit=3)
+        assert path.read_text() == "5\n6\n7\n8\n"
+
+    def test_legacy_file_migration(self, tmp_path: Path) -> None:
+        path = tmp_path / "seen.log"
+        legacy_path = tmp_path / "seen.txt"
+        legacy_path.write_text("1\n2\n3")
+
+        journal = SeenListingsJournal(path, legacy_path)
+        assert list(journal.read()) == ["1", "2", "3"]
+        assert path.read_text() == "1\n2\n3\n"
+        assert not legacy_path.exists()
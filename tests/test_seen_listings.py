@@ -1,15 +1,17 @@
 # SPDX-License-Identifier: MIT
 
 from oikotool.core import Oikotool
+from oikotool.models import Listing
+from oikotool.seen import SeenListings
 
 
 class TestSeenListings:
     def test_filter_unseen_listings(self) -> None:
         oikotool = Oikotool()
         mock = [
-            {"cardId": "3"},
-            {"cardId": "2"},
-            {"cardId": "1"},
+            Listing.from_card({"cardId": "3"}),
+            Listing.from_card({"cardId": "2"}),
+            Listing.from_card({"cardId": "1"}),
         ]
         seen: list[str] = []
 
@@ -22,13 +24,13 @@ class TestSeenListings:
         ], "Expected all listings to be identified as new"
 
         # Test case 2: Handle object without proper identifier
-        mock.insert(0, {"pid": "4"})
+        mock.insert(0, Listing.from_card({"pid": "4"}))
         new_ids, _ = oikotool._filter_unseen_listings(mock, seen)
         assert new_ids == ["1", "2", "3"], "Expected to ignore object without 'cardId'"
         mock.pop(0)
 
         # Test case 3: One new listing added
-        mock.insert(0, {"cardId": "4"})
+        mock.insert(0, Listing.from_card({"cardId": "4"}))
         new_ids, _ = oikotool._filter_unseen_listings(mock, seen)
         assert new_ids == [
             "1",
@@ -64,3 +66,23 @@ class TestSeenListings:
             "3",
             "4",
         ], "Expected to keep only the most recent 'limit' items"
+
+
+class TestSeenListingsStore:
+    def test_membership(self) -> None:
+        seen = SeenListings(["3", "2", "abc", "007"])
+        assert "3" in seen
+        assert "abc" in seen
+        assert "007" in seen
+        assert "7" not in seen
+        assert 3 not in seen
+        assert len(seen) == 4
+
+    def test_insertion_order(self) -> None:
+        seen = SeenListings(["3", "1"])
+        assert seen.add("2")
+        assert not seen.add("3")
+        assert not seen.add("")
+        assert list(seen) == ["3", "1", "2"]
+        assert seen.recent(2) == ["1", "2"]
+        assert seen.recent(0) == []
@@ -0,0 +1,84 @@
+# SPDX-License-Identifier: MIT
+
+import io
+import json
+import time
+from pathlib import Path
+from typing import Any
+
+import pytest
+import requests
+from mocks import MockHtmlProvider
+
+from oikotool.core import Oikotool
+from oikotool.utils import HttpUtils
+
+
+class MockResponse(requests.Response):
+    def __init__(self, status_code: int = 200, text: str = "") -> None:
+        super().__init__()
+        self.status_code = status_code
+        self.raw = io.BytesIO(text.encode())
+
+
+class TestSessionCache:
+    def test_session_is_cached_on_disk(self, tmp_path: Path) -> None:
+        oikotool = Oikotool(cache_dir=tmp_path)
+        html = MockHtmlProvider()
+        session = oikotool._extract_session_headers(html.website_with_session_headers)
+        oikotool._write_session_file(session)
+
+        data = json.loads((tmp_path / Oikotool.SESSION_FILE).read_text())
+        assert data["headers"] == session
+        assert data["expires"] == 1719792000 + Oikotool.SESSION_MAX_AGE
+
+    def test_expired_session_is_ignored(self, tmp_path: Path) -> None:
+        oikotool = Oikotool(cache_dir=tmp_path)
+        session = {"OTA-cuid": "a", "OTA-loaded": "0", "OTA-token": "b"}
+        oikotool._write_session_file(session)
+        assert oikotool._read_session_file() is None
+
+    def test_valid_session_is_reused(
+        self, tmp_path: Path, monkeypatch: pytest.MonkeyPatch
+    ) -> None:
+        session = {
+            "OTA-cuid": "a",
+            "OTA-loaded": str(int(time.time())),
+            "OTA-token": "b",
+        }
+        Oikotool(cache_dir=tmp_path)._write_session_file(session)
+
+        def fail(*args: Any, **kwargs: Any) -> None:
+            raise AssertionError("Homepage should not be fetched")
+
+        monkeypatch.setattr(HttpUtils, "get_with_retry", fail)
+        assert Oikotool(cache_dir=tmp_path)._initialize_session() == session
+
+    def test_session_refreshed_on_auth_error(
+        self, tmp_path: Path, monkeypatch: pytest.MonkeyPatch
+    ) -> None:
+        stale = {"OTA-cuid": "a", "OTA-loaded": str(int(time.time())), "OTA-token": "b"}
+        Oikotool(cache_dir=tmp_path)._write_session_file(stale)
+        html = MockHtmlProvider()
+        requested_headers = []
+
+        def get(url: str, headers: Any = None, **kwargs: Any) -> requests.Response:
+            if url == Oikotool.OIKOTIE_ASUNNOT_WEB_URL:
+                return MockResponse(text=html.website_with_session_headers)
+            requested_headers.append(headers)
+            response = MockResponse(403 if headers == stale else 200, '{"cards": []}')
+            response.raise_for_status()
+            return response
+
+        monkeypatch.setattr(HttpUtils, "get_with_retry", get)
+        oikotool = Oikotool(cache_dir=tmp_path)
+        response = oikotool._fetch_api_response("https://asunnot.oikotie.fi/api/search")
+
+        assert response.json() == {"cards": []}
+        assert requested_headers[0] == stale
+        assert (
+            requested_headers[1]["OTA-cuid"]
+            == "adc83b19e793491b1c6ea0fd8b46cd9f32e592fc"
+        )
+        data = json.loads((tmp_path / Oikotool.SESSION_FILE).read_text())
+        assert data["headers"] == requested_headers[1]
@@ -1,5 +1,7 @@
 # SPDX-License-Identifier: MIT
 
+from collections.abc import Iterator
+
 import pytest
 from mocks import MockHtmlProvider
 
@@ -24,3 +26,36 @@ class TestSessionHeaders:
         html = MockHtmlProvider()
         with pytest.raises(OikotieSessionError):
             oikotool._extract_session_headers(html.website_without_session_headers)
+
+    def test_extract_session_headers_stops_after_head(self) -> None:
+        oikotool = Oikotool()
+        html = MockHtmlProvider().website_with_session_headers
+        head, body = html.split("<body>")
+        consumed = []
+
+        def chunks() -> Iterator[str]:
+            for chunk in (head, "<body>", body):
+                consumed.append(chunk)
+                yield chunk
+
+        oikotool._extract_session_headers(chunks())
+        assert consumed == [head]
+
+    def test_extract_session_headers_ignores_body(self) -> None:
+        oikotool = Oikotool()
+        html = MockHtmlProvider()
+        website = html.website_without_session_headers.replace(
+            "<body>", '<body><meta name="cuid" content="x" />'
+        )
+        with pytest.raises(OikotieSessionError):
+            oikotool._extract_session_headers(website)
+
+    def test_extract_session_headers_missing_content(self) -> None:
+        oikotool = Oikotool()
+        html = MockHtmlProvider()
+        website = html.website_with_session_headers.replace(
+            'name="cuid" content="adc83b19e793491b1c6ea0fd8b46cd9f32e592fc"',
+            'name="cuid"',
+        )
+        with pytest.raises(OikotieSessionError):
+            oikotool._extract_session_headers(website)
@@ -0,0 +1,89 @@
+# SPDX-License-Identifier: MIT
+
+
+import requests
+from mocks import MockListingProvider, MockSlackMessageProvider
+from tenacity import RetryCallState, Retrying
+from tenacity.wait import wait_fixed
+
+from oikotool.core import Oikotool
+from oikotool.formatters import FormattedListing, ListingBatchFormatter
+from oikotool.utils import HttpUtils, WaitRetryAfter
+
+
+def mock_listings(count: int) -> list[FormattedListing]:
+    listings = []
+    for i in range(count):
+        listing = MockListingProvider().complete_listing
+        listing["url"] = f"https://asunnot.oikotie.fi/myytavat-asunnot/helsinki/{i}"
+        listings.append(listing)
+    return ListingBatchFormatter().format(listings)
+
+
+def mock_http_error(status_code: int, retry_after: str) -> requests.HTTPError:
+    response = requests.Response()
+    response.status_code = status_code
+    response.headers["Retry-After"] = retry_after
+    return requests.HTTPError(response=response)
+
+
+class TestSlackBatching:
+    def test_single_listing_per_message(self) -> None:
+        oikotool = Oikotool()
+        listing = MockListingProvider()
+        slack = MockSlackMessageProvider()
+        result = oikotool._create_slack_messages(
+            ListingBatchFormatter().format([listing.complete_listing])
+        )
+        assert result == [slack.complete_listing]
+
+    def test_listings_are_batched_in_order(self) -> None:
+        oikotool = Oikotool()
+        listings = mock_listings(5)
+        result = oikotool._create_slack_messages(listings, batch=2)
+
+        assert [len(message["blocks"]) for message in result] == [9, 9, 4]
+        assert result[0]["blocks"][4] == {"type": "divider"}
+        assert result[0]["text"] == "\n".join(["Oikotie 1, Kaivopuisto, Helsinki"] * 2)
+
+        urls = [
+            block["elements"][0]["elements"][1]["url"]
+            for message in result
+            for block in message["blocks"]
+            if block["type"] == "rich_text"
+        ]
+        assert urls == [listing.url for listing in listings]
+
+    def test_block_limit(self) -> None:
+        oikotool = Oikotool()
+        result = oikotool._create_slack_messages(mock_listings(25), batch=100)
+        assert [len(message["blocks"]) for message in result] == [49, 49, 24]
+
+
+class TestRetryAfter:
+    def test_retry_after_seconds(self) -> None:
+        result = HttpUtils.get_retry_after(mock_http_error(429, "7"))
+        assert result == 7
+
+    def test_retry_after_date(self) -> None:
+        result = HttpUtils.get_retry_after(
+            mock_http_error(503, "Wed, 21 Oct 2015 07:28:00 GMT")
+        )
+        assert result == 0
+
+    def test_retry_after_ignored_for_other_statuses(self) -> None:
+        result = HttpUtils.get_retry_after(mock_http_error(500, "7"))
+        assert result is None
+
+    def test_wait_strategy(self) -> None:
+        wait = WaitRetryAfter(wait_fixed(3), max_wait=60)
+        state = RetryCallState(Retrying(), None, (), {})
+
+        state.set_exception((requests.HTTPError, mock_http_error(429, "10"), None))
+        assert wait(state) == 10
+
+        state.set_exception((requests.HTTPError, mock_http_error(429, "600"), None))
+        assert wait(state) == 60
+
+        state.set_exception((ValueError, ValueError(), None))
+        assert wait(state) == 3
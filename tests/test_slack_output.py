@@ -3,6 +3,7 @@
 from mocks import MockListingProvider, MockSlackMessageProvider
 
 from oikotool.core import Oikotool
+from oikotool.formatters import ListingBatchFormatter
 
 
 class TestSlackOutput:
@@ -10,54 +11,70 @@ class TestSlackOutput:
         oikotool = Oikotool()
         listing = MockListingProvider()
         slack = MockSlackMessageProvider()
-        result = oikotool._create_slack_message(listing.complete_listing)
+        result = oikotool._create_slack_message(
+            ListingBatchFormatter().format([listing.complete_listing])[0]
+        )
         assert result == slack.complete_listing
 
     def test_float_size(self) -> None:
         oikotool = Oikotool()
         listing = MockListingProvider()
         slack = MockSlackMessageProvider()
-        result = oikotool._create_slack_message(listing.float_size)
+        result = oikotool._create_slack_message(
+            ListingBatchFormatter().format([listing.float_size])[0]
+        )
         assert result == slack.float_size
 
     def test_undefined_district(self) -> None:
         oikotool = Oikotool()
         listing = MockListingProvider()
         slack = MockSlackMessageProvider()
-        result = oikotool._create_slack_message(listing.undefined_district)
+        result = oikotool._create_slack_message(
+            ListingBatchFormatter().format([listing.undefined_district])[0]
+        )
         assert result == slack.undefined_district
 
     def test_undefined_image(self) -> None:
         oikotool = Oikotool()
         listing = MockListingProvider()
         slack = MockSlackMessageProvider()
-        result = oikotool._create_slack_message(listing.undefined_image)
+        result = oikotool._create_slack_message(
+            ListingBatchFormatter().format([listing.undefined_image])[0]
+        )
         assert result == slack.undefined_image
 
     def test_undefined_price(self) -> None:
         oikotool = Oikotool()
         listing = MockListingProvider()
         slack = MockSlackMessageProvider()
-        result = oikotool._create_slack_message(listing.undefined_price)
+        result = oikotool._create_slack_message(
+            ListingBatchFormatter().format([listing.undefined_price])[0]
+        )
         assert result == slack.undefined_price
 
     def test_undefined_size(self) -> None:
         oikotool = Oikotool()
         listing = MockListingProvider()
         slack = MockSlackMessageProvider()
-        result = oikotool._create_slack_message(listing.undefined_size)
+        result = oikotool._create_slack_message(
+            ListingBatchFormatter().format([listing.undefined_size])[0]
+        )
         assert result == slack.undefined_size
 
     def test_zero_price(self) -> None:
         oikotool = Oikotool()
         listing = MockListingProvider()
         slack = MockSlackMessageProvider()
-        result = oikotool._create_slack_message(listing.zero_price)
+        result = oikotool._create_slack_message(
+            ListingBatchFormatter().format([listing.zero_price])[0]
+        )
         assert result == slack.zero_price
 
     def test_zero_size(self) -> None:
         oikotool = Oikotool()
         listing = MockListingProvider()
         slack = MockSlackMessageProvider()
-        result = oikotool._create_slack_message(listing.zero_size)
+        result = oikotool._create_slack_message(
+            ListingBatchFormatter().format([listing.zero_size])[0]
+        )
         assert result == slack.zero_size
@@ -0,0 +1,76 @@
+# SPDX-License-Identifier: MIT
+
+import json
+from pathlib import Path
+
+import pytest
+from mocks import MockListingProvider, MockSlackMessageProvider
+
+from oikotool.core import Oikotool
+from oikotool.exceptions import OikotoolConfigError
+from oikotool.formatters import FormattedListing, ListingBatchFormatter
+from oikotool.templates import SlackTemplate
+from oikotool.translations import Language, Translations
+
+
+def format_card(**changes: str) -> FormattedListing:
+    listing = ListingBatchFormatter().format([MockListingProvider().complete_listing])
+    return listing[0]._replace(**changes)
+
+
+class TestSlackTemplate:
+    def test_default_template_renders_current_layout(self) -> None:
+        template = SlackTemplate(SlackTemplate.DEFAULT, Translations(Language.FINNISH))
+        result = SlackTemplate.compose([template.render(format_card())])
+        assert result == json.dumps(MockSlackMessageProvider().complete_listing)
+
+    def test_custom_template(self, tmp_path: Path) -> None:
+        path = tmp_path / "template.json"
+        path.write_text(
+            json.dumps(
+                {
+                    "text": "{{ address }} ({{id}})",
+                    "blocks": [
+                        {
+                            "type": "section",
+                            "text": {
+                                "type": "mrkdwn",
+                                "text": "{{label_price}}: {{price}} {x}",
+                            },
+                        }
+                    ],
+                }
+            )
+        )
+        template = SlackTemplate.load(path, Translations(Language.ENGLISH))
+        listing = format_card(address='Oikotie "1" {a}', price="")
+        result = json.loads(SlackTemplate.compose([template.render(listing)] * 2))
+        assert result["text"] == "\n".join(['Oikotie "1" {a} (12345678)'] * 2)
+        assert result["blocks"][1] == {"type": "divider"}
+        assert result["blocks"][2]["text"]["text"] == "Price: Not specified {x}"
+
+    def test_invalid_templates(self, tmp_path: Path) -> None:
+        translations = Translations(Language.FINNISH)
+        with pytest.raises(OikotoolConfigError, match="Unknown placeholder"):
+            SlackTemplate({"blocks": [{"text": "{{missing}}"}]}, translations)
+        with pytest.raises(OikotoolConfigError):
+            SlackTemplate({"blocks": []}, translations)
+        with pytest.raises(OikotoolConfigError):
+            SlackTemplate({"blocks": [{}], "channel": "#general"}, translations)
+        with pytest.raises(OikotoolConfigError):
+            SlackTemplate.load(tmp_path / "missing.json", translations)
+
+    def test_batches_stay_within_payload_limit(self) -> None:
+        oikotool = Oikotool()
+        listings = [format_card(address="x" * 2000, id=str(i)) for i in range(50)]
+        batches = oikotool._create_slack_batches(listings, batch=50)
+
+        assert [s for ids, _ in batches for s in ids] == [str(i) for i in range(50)]
+        for ids, payload in batches:
+            assert len(payload) <= Oikotool.SLACK_MAX_PAYLOAD
+            assert len(json.loads(payload)["blocks"]) == len(ids) * 5 - 1
+        # Each message is filled up to the limit before a new one is started
+        first = len(batches[0][1])
+        assert first + len(batches[1][1]) // len(batches[1][0]) > (
+            Oikotool.SLACK_MAX_PAYLOAD
+        )
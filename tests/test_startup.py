@@ -0,0 +1,71 @@
+# SPDX-License-Identifier: MIT
+
+import os
+import subprocess
+import sys
+
+# Cold startup is measured in a fresh interpreter, the budget is generous so
+# that slow test machines pass while an accidental heavy import still fails
+STARTUP_BUDGET_US = 500_000
+DEFERRED_MODULES = (
+    "bs4",
+    "cProfile",
+    "pstats",
+    "requests",
+    "tenacity",
+    "tracemalloc",
+    "urllib3",
+)
+CHECK_HELP = (
+    "import sys; sys.argv = ['oikotool', 'check', '--help']\n"
+    "from oikotool.cli import main\n"
+    "try:\n"
+    "    main()\n"
+    "except SystemExit:\n"
+    "    pass\n"
+)
+
+
+def run_python(code: str, *options: str) -> subprocess.CompletedProcess[str]:
+    env = dict(os.environ, PYTHONPATH=os.pathsep.join(sys.path))
+    return subprocess.run(
+        [sys.executable, *options, "-c", code],
+        env=env,
+        capture_output=True,
+        text=True,
+        check=True,
+    )
+
+
+def command_time(code: str) -> int:
+    # The clock starts before the first import, so the time covers importing
+    # the command line interface, setting up the commands and running them
+    timed = (
+        "import sys, time; _start = time.perf_counter()\n"
+        f"{code}"
+        "print(int((time.perf_counter() - _start) * 1e6), file=sys.stderr)\n"
+    )
+    result = run_python(timed)
+    return int(result.stderr.splitlines()[-1])
+
+
+def import_times(code: str) -> dict[str, int]:
+    result = run_python(code, "-X", "importtime")
+
+    times = {}
+    for line in result.stderr.splitlines():
+        if not line.startswith("import time:") or "cumulative" in line:
+            continue
+        _, cumulative, module = line[len("import time:") :].split("|")
+        times[module.strip()] = int(cumulative)
+    return times
+
+
+class TestStartup:
+    def test_check_help_defers_heavy_imports(self) -> None:
+        times = import_times(CHECK_HELP)
+        assert "oikotool.cli" in times
+        assert not [m for m in times if m.split(".")[0] in DEFERRED_MODULES]
+
+    def test_check_help_within_budget(self) -> None:
+        assert command_time(CHECK_HELP) < STARTUP_BUDGET_US
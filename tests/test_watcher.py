@@ -0,0 +1,57 @@
+# SPDX-License-Identifier: MIT
+
+import threading
+import time
+from pathlib import Path
+from typing import Any
+
+import pytest
+
+from oikotool.config import QueryConfig
+from oikotool.core import Oikotool
+from oikotool.watcher import Watcher
+
+
+class TestWatcher:
+    def test_queries_run_on_their_intervals(
+        self, tmp_path: Path, monkeypatch: pytest.MonkeyPatch
+    ) -> None:
+        queries = [
+            QueryConfig(name="fast", url="https://x/?a=1", interval=0.05),
+            QueryConfig(name="slow", url="https://x/?a=2", interval=2),
+            QueryConfig(name="failing", url="https://x/?a=3", interval=0.05),
+        ]
+        runs: dict[str, int] = {}
+        active: set[str] = set()
+        overlaps = []
+        lock = threading.Lock()
+
+        def check(name: str, **kwargs: Any) -> None:
+            with lock:
+                if name in active:
+                    overlaps.append(name)
+                active.add(name)
+                runs[name] = runs.get(name, 0) + 1
+            time.sleep(0.02)
+            with lock:
+                active.discard(name)
+            if name == "failing":
+                raise RuntimeError("Boom")
+
+        oikotool = Oikotool()
+        monkeypatch.setattr(oikotool, "check", check)
+        Watcher(oikotool, queries, tmp_path, quiet=True).run(duration=0.5)
+
+        assert runs["fast"] >= 5
+        assert runs["failing"] >= 5
+        assert runs["slow"] == 1
+        assert not overlaps
+
+    def test_stop(self, tmp_path: Path) -> None:
+        queries = [QueryConfig(name="a", url="https://x/?a=1", interval=3600)]
+        watcher = Watcher(Oikotool(), queries, tmp_path)
+        thread = threading.Thread(target=watcher.run)
+        thread.start()
+        watcher.stop()
+        thread.join(timeout=5)
+        assert not thread.is_alive()